@@ -0,0 +1 @@
+"""Offline benchmarks: the agent and its tools against local stand-ins for Bedrock, Tavily and AgentCore."""
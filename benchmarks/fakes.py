@@ -0,0 +1,176 @@
+"""
+Local stand-ins for the paid remote services, with configurable latency and payload sizes.
+
+    FakeBedrockRuntime   - bedrock-runtime `converse` (SQL generation, PDF answers)
+    FakeTavilyClient     - AsyncTavilyClient.search
+    FakeCodeInterpreter  - AgentCore CodeInterpreter (start/stop/invoke)
+    ScriptedChatModel    - the agent's chat model, replaying scripted tool calls
+"""
+import asyncio
+import re
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from .scenarios import SQL_CATALOG
+
+FALLBACK_SQL = "SELECT COUNT(*) AS sales_rows FROM sales"
+
+
+@dataclass
+class FakeLatency:
+    """Simulated remote latencies, in seconds, and payload sizes."""
+
+    bedrock: float = 0.8
+    model: float = 1.0
+    tavily: float = 0.5
+    sandbox_start: float = 2.0
+    sandbox_call: float = 0.3
+    pdf_answer_chars: int = 800
+    search_content_chars: int = 1500
+    png_bytes: int = 40_000
+
+
+def _tiny_png(size: int) -> bytes:
+    """A valid PNG padded with an ancillary chunk to roughly `size` bytes."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return len(data).to_bytes(4, 'big') + kind + data + zlib.crc32(kind + data).to_bytes(4, 'big')
+
+    ihdr = chunk(b'IHDR', (1).to_bytes(4, 'big') * 2 + bytes([8, 0, 0, 0, 0]))
+    idat = chunk(b'IDAT', zlib.compress(b'\x00\x00'))
+    padding = chunk(b'tEXt', b'pad\x00' + b'x' * max(0, size - 80))
+    return b'\x89PNG\r\n\x1a\n' + ihdr + padding + idat + chunk(b'IEND', b'')
+
+
+class FakeBedrockRuntime:
+    """Answers `converse` calls like bedrock-runtime, after a fixed delay."""
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self.calls = 0
+
+    def converse(self, modelId: str, messages: List[Dict[str, Any]], inferenceConfig: Optional[Dict] = None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency.bedrock)
+        text = "\n".join(part.get("text", "") for part in messages[-1]["content"])
+        prompt_chars = len(text) + sum(
+            len(part["document"]["source"]["bytes"]) for part in messages[-1]["content"] if "document" in part
+        )
+
+        if "Generate a SQL query" in text:
+            answer = next((sql for question, sql in SQL_CATALOG.items() if question in text), FALLBACK_SQL)
+        else:
+            numbered = re.findall(r'^(\d+)\. ', text, flags=re.M)
+            body = ("The label states: " + "dosing details " * self.latency.pdf_answer_chars)[:self.latency.pdf_answer_chars]
+            if len(numbered) > 1:
+                answer = "\n".join(f'<answer id="{n}">{body}</answer>' for n in numbered)
+            else:
+                answer = body
+
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": answer}]}},
+            "usage": {"inputTokens": prompt_chars // 4, "outputTokens": len(answer) // 4},
+            "ResponseMetadata": {"RetryAttempts": 0},
+        }
+
+
+class FakeTavilyClient:
+    """Async drop-in for AsyncTavilyClient with distinct, deterministic results per query."""
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self.calls = 0
+
+    async def search(self, query: str, max_results: int = 5, **kwargs) -> Dict[str, Any]:
+        self.calls += 1
+        await asyncio.sleep(self.latency.tavily)
+        results = []
+        for i in range(max_results):
+            words = " ".join(f"{query.split()[0].lower()}{i}w{j}" for j in range(self.latency.search_content_chars // 12))
+            results.append({
+                "title": f"{query} - source {i + 1}",
+                "url": f"https://example.com/{abs(hash(query)) % 10_000}/{i}",
+                "content": words[:self.latency.search_content_chars],
+                "score": round(0.95 - 0.1 * i, 2),
+                "raw_content": None,
+            })
+        return {"query": query, "follow_up_questions": None, "answer": None, "images": [], "results": results}
+
+
+class FakeCodeInterpreter:
+    """Stand-in for bedrock_agentcore's CodeInterpreter; returns a fixed chart PNG."""
+
+    def __init__(self, latency: FakeLatency):
+        self.latency = latency
+        self.files: Dict[str, int] = {}
+        self._png = _tiny_png(latency.png_bytes)
+
+    def start(self) -> str:
+        time.sleep(self.latency.sandbox_start)
+        return f"fake-session-{id(self):x}"
+
+    def stop(self) -> None:
+        pass
+
+    def invoke(self, tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        time.sleep(self.latency.sandbox_call)
+        if tool_name == "writeFiles":
+            for entry in arguments["content"]:
+                self.files[entry["path"]] = len(entry.get("blob") or entry.get("text", ""))
+            result = {"content": [{"type": "text", "text": "ok"}], "isError": False}
+        elif tool_name == "executeCode":
+            result = {"content": [{"type": "text", "text": "chart saved"}], "isError": False}
+        elif tool_name == "readFiles":
+            result = {"content": [{"type": "resource", "resource": {"mimeType": "image/png", "blob": self._png}}]}
+        else:
+            result = {"content": [{"type": "text", "text": "\n".join(self.files)}], "isError": False}
+        return {"stream": [{"result": result}]}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that replays a scripted conversation turn.
+
+    `steps` is the list of model steps for every user turn: a list of
+    (tool name, args) pairs to call together, or a final text answer. The
+    step is picked from the number of model replies since the last user
+    message, so one instance serves any number of concurrent conversations.
+    """
+
+    steps_by_prompt: Dict[str, List[Any]]
+    latency: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-benchmark"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _reply(self, messages) -> AIMessage:
+        last_user = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        step_index = sum(1 for m in messages[last_user:] if isinstance(m, AIMessage))
+        steps = self.steps_by_prompt[messages[last_user].content]
+        step = steps[min(step_index, len(steps) - 1)]
+        usage = {"input_tokens": sum(len(str(m.content)) for m in messages) // 4, "output_tokens": 60, "total_tokens": 0}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        if isinstance(step, str):
+            return AIMessage(content=step, usage_metadata=usage)
+        calls = [
+            {"name": name, "args": args, "id": f"call_{step_index}_{i}", "type": "tool_call"}
+            for i, (name, args) in enumerate(step)
+        ]
+        return AIMessage(content="", tool_calls=calls, usage_metadata=usage)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
@@ -0,0 +1,366 @@
+"""
+Offline end-to-end benchmark suite.
+
+Generates sales databases at several scale factors, then, for each scale and
+cache mode, runs a worker process that swaps Bedrock, Tavily and the AgentCore
+CodeInterpreter for local fakes with configurable latency and payloads, and
+measures:
+
+    - each tool invoked on its own (p50/p95/mean latency)
+    - scripted analyst conversations through create_agent_executor (per turn
+      and per conversation latency, conversations/sec)
+    - peak RSS of the worker
+    - startup: time to import the agent module in a fresh interpreter, and
+      whether that import pulls in any heavy dependency eagerly
+
+Results are written as JSON so two runs can be compared for regressions.
+
+Usage:
+    python -m benchmarks.run_benchmarks --scales 1,4,16 --iterations 3
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/base.json benchmarks/results/new.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import fields
+from typing import Any, Dict, List
+
+from .fakes import FakeLatency
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary (seconds) with nearest-rank percentiles."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+
+    return {
+        "count": len(ordered),
+        "p50": percentile(50),
+        "p95": percentile(95),
+        "mean": sum(ordered) / len(ordered),
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+# ---------------------------------------------------------------------------
+# Worker: runs inside a fresh process per (scale, cache mode)
+# ---------------------------------------------------------------------------
+
+def _install_fakes(latency: FakeLatency, cache_dir: str, cold: bool, sandbox_pool_size: int):
+    from tools.bedrock_client import BedrockClient, set_bedrock_client
+    from tools.sandbox_pool import SandboxSessionPool, set_sandbox_pool
+    from tools.web_search_tools import WebSearch, set_search_client
+
+    from .fakes import FakeBedrockRuntime, FakeCodeInterpreter, FakeTavilyClient
+
+    bedrock = FakeBedrockRuntime(latency)
+    set_bedrock_client(BedrockClient(client_factory=lambda *args, **kwargs: bedrock))
+    set_sandbox_pool(SandboxSessionPool(client_factory=lambda: FakeCodeInterpreter(latency), max_size=sandbox_pool_size))
+
+    search_client = WebSearch(
+        tavily_api_key='benchmark', output_dir=os.path.join(cache_dir, 'search_results'), use_cache=not cold,
+    )
+    search_client.tavily_async = FakeTavilyClient(latency)
+    set_search_client(search_client, tavily_api_key='benchmark')
+    return {"bedrock": bedrock, "tavily": search_client.tavily_async}
+
+
+def _clear_caches() -> None:
+    from tools import chart_cache, database_tools, document_reader_tools
+
+    database_tools._sql_cache.clear()
+    database_tools._result_cache.clear()
+    chart_cache._chart_cache.clear()
+    document_reader_tools._answer_cache.clear()
+
+
+def _bench_tools(iterations: int, cold: bool) -> Dict[str, Dict[str, float]]:
+    import tools
+    from tools.artifacts import create_artifact_space, use_artifacts
+
+    from .scenarios import TOOL_CALLS
+
+    space = create_artifact_space('tool-bench')
+    results = {}
+    with use_artifacts(space):
+        for name, calls in TOOL_CALLS.items():
+            tool = getattr(tools, name)
+            samples = []
+            for _ in range(iterations):
+                for args in calls:
+                    if cold:
+                        _clear_caches()
+                    if name == 'execute_code_with_agentcore':
+                        # Chart code needs a query result to plot.
+                        tools.generate_and_execute_sql.invoke(TOOL_CALLS['generate_and_execute_sql'][0])
+                    start = time.perf_counter()
+                    tool.invoke(args)
+                    samples.append(time.perf_counter() - start)
+            results[name] = summarize(samples)
+    space.cleanup()
+    return results
+
+
+async def _bench_conversations(iterations: int, concurrency: int, cold: bool, model_latency: float) -> Dict[str, Any]:
+    from pharma_salesanalysts_agent import build_initial_prompt, create_agent_executor, run_turn
+    from tools.artifacts import create_artifact_space, use_artifacts
+
+    from .fakes import ScriptedChatModel
+    from .scenarios import CONVERSATIONS
+
+    steps_by_prompt = {}
+    for conversation in CONVERSATIONS:
+        for index, (user_message, steps) in enumerate(conversation):
+            steps_by_prompt[build_initial_prompt(user_message) if index == 0 else user_message] = steps
+    agent = create_agent_executor(model=ScriptedChatModel(steps_by_prompt=steps_by_prompt, latency=model_latency))
+
+    turn_samples: List[float] = []
+    conversation_samples: List[float] = []
+    slots = asyncio.Semaphore(concurrency)
+
+    async def converse(conversation) -> None:
+        async with slots:
+            space = create_artifact_space()
+            messages: List[Dict[str, Any]] = []
+            started = time.perf_counter()
+            with use_artifacts(space):
+                for user_message, _ in conversation:
+                    content = build_initial_prompt(user_message) if not messages else user_message
+                    messages.append({"role": "user", "content": content})
+                    turn_start = time.perf_counter()
+                    result = await run_turn(agent, messages)
+                    turn_samples.append(time.perf_counter() - turn_start)
+                    messages.extend(result["messages"][-1:])
+            conversation_samples.append(time.perf_counter() - started)
+            space.cleanup()
+
+    wall = 0.0
+    for _ in range(iterations):
+        if cold:
+            _clear_caches()
+        started = time.perf_counter()
+        await asyncio.gather(*(converse(conversation) for conversation in CONVERSATIONS))
+        wall += time.perf_counter() - started
+
+    return {
+        "turns": summarize(turn_samples),
+        "conversations": summarize(conversation_samples),
+        "conversations_per_sec": len(conversation_samples) / wall if wall else 0.0,
+        "wall_seconds": wall,
+    }
+
+
+def run_worker(args) -> Dict[str, Any]:
+    latency = FakeLatency(**{f.name: getattr(args, f.name) for f in fields(FakeLatency)})
+    cold = args.cache == 'cold'
+    fakes = _install_fakes(latency, os.environ['PHARMA_CACHE_DIR'], cold, args.concurrency)
+
+    from tools.bedrock_client import bedrock_metrics
+    from tools.concurrent_executor import get_tool_executor
+    from tools.database_tools import sql_cache_stats
+    from tools.sql_admission import admission_stats, index_report
+
+    output = open(os.devnull, 'w') if not args.verbose else sys.stdout
+    with contextlib.redirect_stdout(output):
+        tool_results = _bench_tools(args.iterations, cold)
+        conversation_results = asyncio.run(
+            _bench_conversations(args.iterations, args.concurrency, cold, latency.model)
+        )
+
+    return {
+        "scale": args.scale,
+        "cache": args.cache,
+        "tools": tool_results,
+        **conversation_results,
+        "peak_rss_mb": peak_rss_mb(),
+        "remote_calls": {"bedrock": fakes["bedrock"].calls, "tavily": fakes["tavily"].calls},
+        "bedrock_metrics": bedrock_metrics(),
+        "tool_executor": get_tool_executor().stats(),
+        "sql_cache": sql_cache_stats(),
+        "sql_admission": admission_stats(),
+        "index_advisor": index_report(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Orchestrator
+# ---------------------------------------------------------------------------
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(args) -> Dict[str, Any]:
+    sys.path.insert(0, REPO_ROOT)
+    from data.create_pharma_data import create_pharma_database
+    from tools.startup import measure_import, refresh_summaries
+
+    modes = ['cold', 'warm'] if args.cache == 'both' else [args.cache]
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "granularity": args.granularity,
+            "chart_backend": args.chart_backend,
+            "latency": {f.name: getattr(args, f.name) for f in fields(FakeLatency)},
+        },
+        "runs": [],
+    }
+
+    startup = measure_import('pharma_salesanalysts_agent', runs=max(args.iterations, 3))
+    report["startup"] = dict(summarize(startup["seconds"]), packages=startup["packages"], heavy=startup["heavy"])
+    print(f"🚦 Agent import p50 {report['startup']['p50']:.3f}s"
+          + (f", eager heavy imports: {', '.join(startup['heavy'])}" if startup["heavy"] else ""))
+
+    for scale in [int(s) for s in args.scales.split(',')]:
+        workdir = tempfile.mkdtemp(prefix=f'pharma-bench-s{scale}-')
+        try:
+            db_path = os.path.join(workdir, 'pharma_sales.db')
+            print(f"🏗️ Generating scale {scale} database...")
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                generation = create_pharma_database(scale=scale, granularity=args.granularity, db_path=db_path)
+                refresh_summaries(db_path)
+
+            for mode in modes:
+                print(f"⏱️ Benchmarking scale {scale} ({generation['rows']:,} rows), {mode} caches...")
+                cache_dir = os.path.join(workdir, f'cache-{mode}')
+                result_file = os.path.join(workdir, f'result-{mode}.json')
+                env = dict(
+                    os.environ,
+                    PHARMA_DB_PATH=db_path,
+                    PHARMA_CACHE_DIR=cache_dir,
+                    PHARMA_ARTIFACT_ROOT=os.path.join(workdir, 'artifacts'),
+                    CHART_EXECUTION_BACKEND=args.chart_backend,
+                    TAVILY_API_KEY='benchmark',
+                )
+                command = [sys.executable, '-m', 'benchmarks.run_benchmarks', '--worker',
+                           '--scale', str(scale), '--cache', mode, '--result-file', result_file,
+                           '--iterations', str(args.iterations), '--concurrency', str(args.concurrency)]
+                for f in fields(FakeLatency):
+                    command += [f"--{f.name.replace('_', '-')}", str(getattr(args, f.name))]
+                if args.verbose:
+                    command.append('--verbose')
+                subprocess.run(command, cwd=REPO_ROOT, env=env, check=True)
+
+                with open(result_file) as f:
+                    run = json.load(f)
+                run["rows"] = generation["rows"]
+                run["db_generation_seconds"] = generation["seconds"]
+                report["runs"].append(run)
+                print(f"   turns p50 {run['turns']['p50']:.2f}s p95 {run['turns']['p95']:.2f}s, "
+                      f"{run['conversations_per_sec']:.2f} conversations/s, peak RSS {run['peak_rss_mb']:.0f} MB")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def compare(baseline_path: str, candidate_path: str, threshold: float) -> int:
+    """Print p50/p95 changes between two reports; returns 1 if anything regressed beyond `threshold`."""
+    with open(baseline_path) as f:
+        baseline_report = json.load(f)
+    with open(candidate_path) as f:
+        candidate_report = json.load(f)
+    baseline = {(r["scale"], r["cache"]): r for r in baseline_report["runs"]}
+    candidate = {(r["scale"], r["cache"]): r for r in candidate_report["runs"]}
+
+    regressions = 0
+    old_startup, new_startup = baseline_report.get("startup"), candidate_report.get("startup")
+    if old_startup and new_startup:
+        print("\nStartup")
+        change = (new_startup["p50"] - old_startup["p50"]) / old_startup["p50"] if old_startup["p50"] else 0.0
+        newly_heavy = sorted(set(new_startup["heavy"]) - set(old_startup["heavy"]))
+        flag = "  ⚠️ regression" if change > threshold or newly_heavy else ""
+        regressions += bool(flag)
+        print(f"  {'agent import':42s} p50: {old_startup['p50']:8.3f}s -> {new_startup['p50']:8.3f}s ({change:+.0%}){flag}")
+        if newly_heavy:
+            print(f"  {'now imported eagerly':42s} {', '.join(newly_heavy)}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        old, new = baseline[key], candidate[key]
+        print(f"\nScale {key[0]}, {key[1]} caches")
+        rows = [(f"tool {name}", old["tools"][name], new["tools"].get(name, {})) for name in old["tools"]]
+        rows += [("turn", old["turns"], new["turns"]), ("conversation", old["conversations"], new["conversations"])]
+        for label, old_stats, new_stats in rows:
+            for metric in ("p50", "p95"):
+                if metric not in old_stats or metric not in new_stats:
+                    continue
+                change = (new_stats[metric] - old_stats[metric]) / old_stats[metric] if old_stats[metric] else 0.0
+                flag = "  ⚠️ regression" if change > threshold else ""
+                regressions += bool(flag)
+                print(f"  {label:42s} {metric}: {old_stats[metric]:8.3f}s -> {new_stats[metric]:8.3f}s ({change:+.0%}){flag}")
+        print(f"  {'throughput':42s} {old['conversations_per_sec']:.2f} -> {new['conversations_per_sec']:.2f} conversations/s")
+        print(f"  {'peak RSS':42s} {old['peak_rss_mb']:.0f} -> {new['peak_rss_mb']:.0f} MB")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the analyst agent and its tools.")
+    parser.add_argument('--scales', default='1,4,16', help="Comma-separated create_pharma_data scale factors")
+    parser.add_argument('--granularity', default='quarter', choices=['quarter', 'month', 'week'])
+    parser.add_argument('--iterations', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=4, help="Conversations run at once")
+    parser.add_argument('--cache', default='both', choices=['cold', 'warm', 'both'])
+    parser.add_argument('--chart-backend', default='agentcore', choices=['agentcore', 'local'])
+    parser.add_argument('--output', help="Report path (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'))
+    parser.add_argument('--threshold', type=float, default=0.2, help="Relative p50/p95 increase reported as a regression")
+    parser.add_argument('--verbose', action='store_true', help="Show tool output")
+    defaults = FakeLatency()
+    for f in fields(FakeLatency):
+        parser.add_argument(f"--{f.name.replace('_', '-')}", type=type(getattr(defaults, f.name)),
+                            default=getattr(defaults, f.name))
+    # Internal: a single (scale, cache mode) run in a fresh process.
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--scale', type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, threshold=args.threshold))
+
+    if args.worker:
+        result = run_worker(args)
+        with open(args.result_file, 'w') as f:
+            json.dump(result, f, default=str)
+        return
+
+    report = run_suite(args)
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"📄 Benchmark report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
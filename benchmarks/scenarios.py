@@ -0,0 +1,105 @@
+"""Scripted analyst workload shared by the fakes and the benchmark runner."""
+
+# Question -> SQL the fake Bedrock returns for it.
+SQL_CATALOG = {
+    "Revenue by product and year": (
+        "SELECT p.product_name, s.year, SUM(s.revenue_usd) AS revenue "
+        "FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "GROUP BY p.product_name, s.year ORDER BY p.product_name, s.year"
+    ),
+    "Quarterly Cosentyx revenue by region": (
+        "SELECT s.year, s.quarter, s.region, SUM(s.revenue_usd) AS revenue "
+        "FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "WHERE p.product_name = 'Cosentyx' GROUP BY s.year, s.quarter, s.region "
+        "ORDER BY s.year, s.quarter"
+    ),
+    "Units sold per therapeutic area in 2024": (
+        "SELECT p.therapeutic_area, SUM(s.units_sold) AS units "
+        "FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "WHERE s.year = 2024 GROUP BY p.therapeutic_area"
+    ),
+    "Top 10 countries by Entresto revenue": (
+        "SELECT s.country, SUM(s.revenue_usd) AS revenue "
+        "FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "WHERE p.product_name = 'Entresto' GROUP BY s.country ORDER BY revenue DESC LIMIT 10"
+    ),
+    "All Kesimpta sales rows": (
+        "SELECT s.* FROM sales s JOIN products p ON s.product_id = p.product_id "
+        "WHERE p.product_name = 'Kesimpta'"
+    ),
+}
+
+WEB_QUERIES = [
+    "Cosentyx competitors psoriasis market share 2024",
+    "Entresto generic entry heart failure",
+    "Kesimpta multiple sclerosis competition",
+]
+
+PDF_QUESTIONS = [
+    ("cosentyx.pdf", "What is the recommended dosage for plaque psoriasis?"),
+    ("entresto.pdf", "What are the contraindications?"),
+    ("kesimpta.pdf", "How is Kesimpta administered?"),
+]
+
+CHART_CODE = """import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+df = load_data()
+df.plot(kind='bar')
+plt.savefig('chart.png', bbox_inches='tight')
+print('chart saved')
+"""
+
+# Each conversation is a list of (user message, model steps) turns. A model
+# step either calls tools (together, in one model turn) or answers with text.
+CONVERSATIONS = [
+    [
+        ("How did our brands' revenue develop and who competes with Cosentyx?", [
+            [("generate_and_execute_sql", {"question": "Revenue by product and year"}),
+             ("web_search", {"query": WEB_QUERIES[0]}),
+             ("ask_pdf_question", {"pdf_name": PDF_QUESTIONS[0][0], "question": PDF_QUESTIONS[0][1]})],
+            [("execute_code_with_agentcore", {"csv_filename": "temp_data.csv", "code": CHART_CODE})],
+            "Cosentyx leads revenue in every year; see chart.png.",
+        ]),
+        ("Break Cosentyx down by region per quarter.", [
+            [("generate_and_execute_sql", {"question": "Quarterly Cosentyx revenue by region"})],
+            [("execute_code_with_agentcore", {"csv_filename": "temp_data.csv", "code": CHART_CODE})],
+            "Europe and North America drive most of the growth.",
+        ]),
+    ],
+    [
+        ("Where does Entresto sell best and what threatens it?", [
+            [("generate_and_execute_sql", {"question": "Top 10 countries by Entresto revenue"}),
+             ("web_search", {"query": WEB_QUERIES[1]}),
+             ("ask_pdf_question", {"pdf_name": PDF_QUESTIONS[1][0], "question": PDF_QUESTIONS[1][1]})],
+            "Entresto revenue is concentrated in a handful of markets.",
+        ]),
+    ],
+    [
+        ("Compare therapeutic areas in 2024 and chart them.", [
+            [("get_database_schema", {})],
+            [("generate_and_execute_sql", {"question": "Units sold per therapeutic area in 2024"}),
+             ("web_search", {"query": WEB_QUERIES[2]}),
+             ("ask_pdf_question", {"pdf_name": PDF_QUESTIONS[2][0], "question": PDF_QUESTIONS[2][1]})],
+            [("execute_code_with_agentcore", {"csv_filename": "temp_data.csv", "code": CHART_CODE})],
+            "Neurology is the fastest growing area.",
+        ]),
+    ],
+    [
+        ("Which brand is declining?", [
+            [("get_sales_insights", {})],
+            "Cosentyx: revenue is down about two thirds year over year and keeps losing share.",
+        ]),
+    ],
+]
+
+# Standalone per-tool calls.
+TOOL_CALLS = {
+    "get_database_schema": [{}],
+    "generate_and_execute_sql": [{"question": question} for question in SQL_CATALOG],
+    "get_sales_insights": [{}, {"product": "Cosentyx"}],
+    "web_search": [{"query": query} for query in WEB_QUERIES],
+    "ask_pdf_question": [{"pdf_name": pdf, "question": question} for pdf, question in PDF_QUESTIONS],
+    "execute_code_with_agentcore": [{"csv_filename": "temp_data.csv", "code": CHART_CODE}],
+}
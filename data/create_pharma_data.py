@@ -1,11 +1,141 @@
-import sqlite3
+import argparse
+import itertools
 import random
-from datetime import datetime, timedelta
+import sqlite3
+import time
+from datetime import date, timedelta
+
+DB_PATH = 'data/pharma_sales.db'
+DEFAULT_SEED = 42
+
+BASE_PRODUCTS = [
+    (1, 'Cosentyx', 'Immunology', '2015-01-15'),
+    (2, 'Entresto', 'Cardiovascular', '2015-07-07'),
+    (3, 'Kesimpta', 'Neurology', '2020-08-20'),
+    (4, 'Zolgensma', 'Gene Therapy', '2019-05-24'),
+    (5, 'Kisqali', 'Oncology', '2017-03-13')
+]
+THERAPEUTIC_AREAS = ['Immunology', 'Cardiovascular', 'Neurology', 'Gene Therapy', 'Oncology']
+
+REGION_COUNTRIES = {
+    'North America': ['USA', 'Canada'],
+    'Europe': ['Germany', 'UK', 'France'],
+    'Asia Pacific': ['Japan', 'China'],
+    'Latin America': ['Brazil'],
+}
+QUARTERS = ['Q1', 'Q2', 'Q3', 'Q4']
+YEARS = [2022, 2023, 2024]
+
+# Rows per quarter and the extra period column each granularity adds.
+GRANULARITIES = {
+    'quarter': (1, None),
+    'month': (3, 'month'),
+    'week': (13, 'week'),
+}
+
+
+def _products(scale, rng):
+    products = list(BASE_PRODUCTS)
+    for product_id in range(len(BASE_PRODUCTS) + 1, len(BASE_PRODUCTS) * scale + 1):
+        launch = date(2010, 1, 1) + timedelta(days=rng.randint(0, 365 * 12))
+        area = THERAPEUTIC_AREAS[product_id % len(THERAPEUTIC_AREAS)]
+        products.append((product_id, f'Brand {product_id:03d}', area, launch.isoformat()))
+    return products
+
+
+def _markets(scale, rng):
+    """Return (region, country) pairs; `scale` countries per region."""
+    markets = []
+    for region, countries in REGION_COUNTRIES.items():
+        if scale == 1:
+            markets.append((region, rng.choice(countries)))
+            continue
+        names = list(countries)
+        while len(names) < scale:
+            names.append(f'{region} Market {len(names) + 1:02d}')
+        markets.extend((region, country) for country in names[:scale])
+    return markets
+
+
+def _generate_sales(products, markets, years, granularity, rng):
+    """Yield sales rows one at a time so arbitrarily large datasets stream to SQLite."""
+    periods, period_column = GRANULARITIES[granularity]
+    for product_id, *_ in products:
+        for year in years:
+            for q_index, quarter in enumerate(QUARTERS):
+                for region, country in markets:
+                    for period in range(periods):
+                        if product_id == 1:  # Cosentyx - brutal decline
+                            base_units = 45000 if year == 2022 else (25000 if year == 2023 else 8000)
+                            units = base_units + rng.randint(-2000, 2000)
+                        else:  # Other drugs - stable
+                            units = rng.randint(18000, 22000)
+                        units //= periods
+
+                        revenue = units * rng.uniform(150, 300)
+                        row = (product_id, region, country, quarter, year, units, revenue)
+                        if period_column is not None:
+                            row += (q_index * periods + period + 1,)
+                        yield row
+
+
+def create_pharma_database(
+    scale: int = 1,
+    granularity: str = 'quarter',
+    seed: int = DEFAULT_SEED,
+    db_path: str = DB_PATH,
+    years=YEARS,
+    batch_size: int = 100_000,
+    overwrite: bool = False,
+):
+    """
+    Build the synthetic sales database.
+
+    Args:
+        scale: Multiplies the number of products (5 * scale) and the number of
+            countries per region; rows grow roughly with 240 * scale^2
+        granularity: 'quarter', 'month' or 'week' rows within each quarter
+        seed: Seed for the random generator, so every run is reproducible
+        db_path: SQLite file to (re)create
+        years: Years to generate sales for
+        batch_size: Rows inserted per transaction
+        overwrite: Drop the tables of an existing database at `db_path`
+
+    Returns:
+        dict: Row count, elapsed seconds and rows/s of the sales load
 
-def create_pharma_database():
-    conn = sqlite3.connect('data/pharma_sales.db')
+    Raises:
+        FileExistsError: If `db_path` already holds sales data and `overwrite` is False
+    """
+    if scale < 1:
+        raise ValueError("scale must be >= 1")
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {sorted(GRANULARITIES)}")
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
+
+    existing = {name for (name,) in cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('sales', 'products')")}
+    if existing and not overwrite:
+        conn.close()
+        raise FileExistsError(f"{db_path} already has the {', '.join(sorted(existing))} table(s); "
+                              f"pass overwrite=True (--overwrite) to replace them")
+
+    # Bulk-load settings; the journal is switched to WAL once loading is done.
+    cursor.execute('PRAGMA journal_mode=OFF')
+    cursor.execute('PRAGMA synchronous=OFF')
+    cursor.execute('PRAGMA cache_size=-262144')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+
+    cursor.execute('DROP TABLE IF EXISTS sales')
+    cursor.execute('DROP TABLE IF EXISTS products')
+    # Forces tools/rollups.py and tools/insights.py to rebuild their summaries from the new data.
+    cursor.execute('DROP TABLE IF EXISTS rollup_state')
+    cursor.execute('DROP TABLE IF EXISTS insights_state')
+    cursor.execute('DROP TABLE IF EXISTS insights_quarterly')
+
     # Create tables
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS products (
@@ -15,8 +145,10 @@ def create_pharma_database():
             launch_date DATE
         )
     ''')
-    
-    cursor.execute('''
+
+    period_column = GRANULARITIES[granularity][1]
+    period_ddl = f',\n            {period_column} INTEGER' if period_column else ''
+    cursor.execute(f'''
         CREATE TABLE IF NOT EXISTS sales (
             smind INTEGER PRIMARY KEY AUTOINCREMENT,
             product_id INTEGER,
@@ -25,52 +157,73 @@ def create_pharma_database():
             quarter TEXT,
             year INTEGER,
             units_sold INTEGER,
-            revenue_usd REAL,
+            revenue_usd REAL{period_ddl},
             FOREIGN KEY (product_id) REFERENCES products (product_id)
         )
     ''')
-    
+
     # Insert products
-    products = [
-        (1, 'Cosentyx', 'Immunology', '2015-01-15'),
-        (2, 'Entresto', 'Cardiovascular', '2015-07-07'),
-        (3, 'Kesimpta', 'Neurology', '2020-08-20'),
-        (4, 'Zolgensma', 'Gene Therapy', '2019-05-24'),
-        (5, 'Kisqali', 'Oncology', '2017-03-13')
-    ]
-    
+    products = _products(scale, rng)
     cursor.executemany('INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?)', products)
-    
-    # Generate sales data with specific patterns
-    regions = ['North America', 'Europe', 'Asia Pacific', 'Latin America']
-    countries = ['USA', 'Germany', 'Japan', 'Brazil', 'UK', 'France', 'China', 'Canada']
-    quarters = ['Q1', 'Q2', 'Q3', 'Q4']
-    years = [2022, 2023, 2024]
-    
-    sales_data = []
-    for product_id in range(1, 6):
-        for year in years:
-            for quarter in quarters:
-                for region in regions:
-                    country = random.choice(countries)
-                    
-                    if product_id == 1:  # Cosentyx - brutal decline
-                        base_units = 45000 if year == 2022 else (25000 if year == 2023 else 8000)
-                        units = base_units + random.randint(-2000, 2000)
-                    else:  # Other drugs - stable
-                        units = random.randint(18000, 22000)
-                    
-                    revenue = units * random.uniform(150, 300)
-                    sales_data.append((product_id, region, country, quarter, year, units, revenue))
-    
-    cursor.executemany('''
-        INSERT INTO sales (product_id, region, country, quarter, year, units_sold, revenue_usd)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', sales_data)
-    
     conn.commit()
+
+    # Stream sales rows in large batched transactions
+    columns = 'product_id, region, country, quarter, year, units_sold, revenue_usd'
+    if period_column:
+        columns += f', {period_column}'
+    placeholders = ', '.join('?' * len(columns.split(', ')))
+    insert_sql = f'INSERT INTO sales ({columns}) VALUES ({placeholders})'
+
+    rows = _generate_sales(products, _markets(scale, rng), years, granularity, rng)
+    start = time.perf_counter()
+    total = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            break
+        cursor.executemany(insert_sql, batch)
+        conn.commit()
+        total += len(batch)
+    load_seconds = time.perf_counter() - start
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_product_year_quarter ON sales (product_id, year, quarter)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_region_country ON sales (region, country)')
+    cursor.execute('ANALYZE')
+    conn.commit()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    elapsed = time.perf_counter() - start
+
     conn.close()
-    print("Pharmaceutical sales database created successfully!")
+
+    rows_per_sec = total / load_seconds if load_seconds else float('inf')
+    print(f"Pharmaceutical sales database created successfully! "
+          f"{total:,} sales rows in {elapsed:.1f}s ({rows_per_sec:,.0f} rows/s load, "
+          f"{load_seconds:.1f}s load + {elapsed - load_seconds:.1f}s indexing)")
+    return {'rows': total, 'seconds': elapsed, 'load_seconds': load_seconds, 'rows_per_sec': rows_per_sec}
+
 
 if __name__ == "__main__":
-    create_pharma_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the synthetic pharma sales database.")
+    parser.add_argument('--scale', type=int, default=1,
+                        help="5*scale products and scale countries per region; "
+                             "about 240*scale^2 sales rows at quarter granularity, "
+                             "3x that by month and 13x by week (default: 1)")
+    parser.add_argument('--granularity', choices=sorted(GRANULARITIES), default='quarter')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--db-path', default=DB_PATH)
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Replace the sales tables if --db-path already has them")
+    args = parser.parse_args()
+
+    try:
+        create_pharma_database(
+            scale=args.scale,
+            granularity=args.granularity,
+            seed=args.seed,
+            db_path=args.db_path,
+            batch_size=args.batch_size,
+            overwrite=args.overwrite,
+        )
+    except FileExistsError as e:
+        parser.error(str(e))
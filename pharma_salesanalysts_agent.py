@@ -1,37 +1,41 @@
-from langchain.agents import create_agent
-from tools import get_database_schema, generate_and_execute_sql, execute_code_with_agentcore, display_chart, web_search, ask_pdf_question
+import asyncio
+
+from tools.startup import load_env, prewarm, refresh_summaries, warm_tool_clients
+from tools.tracing import span, start_metrics_server
 
 BEDROCK_MODEL = 'amazon.nova-premier-v1:0'
 
 
-def create_agent_executor():
-    tools = [get_database_schema, generate_and_execute_sql,
-             execute_code_with_agentcore, display_chart, web_search, ask_pdf_question]
+def create_agent_executor(model=None):
+    """Build the analyst agent; `model` overrides the Bedrock chat model (e.g. a local stand-in for benchmarks)."""
+    # LangChain and the tool modules are imported here rather than at module
+    # level so the CLI can show its prompt while they load.
+    from langchain.agents import create_agent
+    from tools.concurrent_executor import ToolConcurrencyMiddleware
+    from tools import get_database_schema, generate_and_execute_sql, get_sales_insights, execute_code_with_agentcore, display_chart, web_search, ask_pdf_question, ask_pdf_questions
+
+    load_env()
+    tools = [get_database_schema, generate_and_execute_sql, get_sales_insights,
+             execute_code_with_agentcore, display_chart, web_search, ask_pdf_question, ask_pdf_questions]
 
     agent = create_agent(
-        model=f"bedrock:us.{BEDROCK_MODEL}",
+        model=model or f"bedrock:us.{BEDROCK_MODEL}",
         tools=tools,
+        middleware=[ToolConcurrencyMiddleware()],
         system_prompt="You are a pharmaceutical data analyst. Use the tools at your disposal to help the sales rep: You can query the document database cosentyx.pdf, entresto.pdf and kesimpta.pdf to answer questions on this products. You can also query the database & create data visualizations or search the internet."
     )
 
     return agent
 
-def main():
-    print("🚀 Starting Pharmaceutical Data Analysis Agent with AgentCore")
-    print("=" * 60)
-
-    agent = create_agent_executor()
-    messages = []
-
-    while True:
-        if not messages:
-            question = input("What would you like to analyze? ")
-            initial_prompt = f"""Analyze: {question}. 
+def build_initial_prompt(question: str) -> str:
+    """Wrap the first question of a conversation with the tool instructions."""
+    return f"""Analyze: {question}. 
     
     You have access to multiple tools: 
-    - You can generate and execute SQL queries on the companies own products and save the output table as a csv file (the output table will always be saved as temp_data.csv)
-    - You can generate python code to generate visualisations based on a csv file
-       - The CSV file will be automatically uploaded to the AgentCore session
+    - You can look up precomputed sales insights (QoQ/YoY growth, share shifts, trends and anomalies per product and region) in a single call: use them first for questions like which brands are declining or growing
+    - You can generate and execute SQL queries on the companies own products and save the output table as a data file (the output table is saved as temp_data.csv, or temp_data.parquet / temp_data.arrow when a columnar format is configured)
+    - You can generate python code to generate visualisations based on the saved data file
+       - The data file will be automatically uploaded to the AgentCore session
        - Create an appropriate visualization using the uploaded data
        - Always save the resulting chart as "chart.png"
        - IMPORTANT: The code must include:
@@ -39,7 +43,7 @@ def main():
          matplotlib.use('Agg')
          import matplotlib.pyplot as plt
          import pandas as pd
-       - Read data from "temp_data.csv"
+       - Read the data with df = load_data() (it loads the uploaded temp_data file whether it is CSV, Parquet or Arrow)
        - Handle data types properly (quarter column may be string like 'Q1', 'Q2')
        - Create proper time period labels for x-axis
        - Always call plt.savefig('chart.png', bbox_inches='tight') to save the chart
@@ -51,7 +55,37 @@ def main():
     When you need to learn more about the competition, search the internet using the Tavily Search tool: Generate a good search query first
 
        """
-            messages.append({"role": "user", "content": initial_prompt})
+
+
+async def run_turn(agent, messages, **attributes):
+    """Run one agent turn inside an `agent.turn` span that records the model's token usage."""
+    with span('agent.turn', **attributes) as trace:
+        result = await agent.ainvoke({"messages": messages})
+        new_messages = result["messages"][len(messages):]
+        for message in new_messages:
+            usage = getattr(message, "usage_metadata", None) or {}
+            trace.add("input_tokens", usage.get("input_tokens", 0))
+            trace.add("output_tokens", usage.get("output_tokens", 0))
+        trace.set(model_calls=sum(1 for m in new_messages if getattr(m, "type", None) == "ai"),
+                  tool_calls=sum(1 for m in new_messages if getattr(m, "type", None) == "tool"))
+    return result
+
+
+async def amain():
+    print("🚀 Starting Pharmaceutical Data Analysis Agent with AgentCore")
+    print("=" * 60)
+
+    start_metrics_server()
+    # Build the agent and import the tools' heavy dependencies while the user types.
+    pending_agent = asyncio.get_running_loop().run_in_executor(None, create_agent_executor)
+    prewarm(warm_tool_clients, refresh_summaries)
+    agent = None
+    messages = []
+
+    while True:
+        if not messages:
+            question = input("What would you like to analyze? ")
+            messages.append({"role": "user", "content": build_initial_prompt(question)})
         else:
             follow_up = input(
                 "\nAny follow-up questions? (or 'quit' to exit): ")
@@ -62,7 +96,10 @@ def main():
         print(f"\n🎯 Processing request...")
         print("=" * 60)
 
-        result = agent.invoke({"messages": messages})
+        if agent is None:
+            agent = await pending_agent
+
+        result = await run_turn(agent, messages)
 
         # Add assistant response to conversation history
         messages.extend(result["messages"][-1:])
@@ -74,5 +111,9 @@ def main():
     print("\n👋 Goodbye!")
 
 
+def main():
+    asyncio.run(amain())
+
+
 if __name__ == "__main__":
     main()
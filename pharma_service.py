@@ -0,0 +1,285 @@
+"""
+Multi-session HTTP service for the pharmaceutical analysis agent.
+
+Runs many conversations in one process. Every session gets its own
+artifact directory (query results, charts), agent turns run with bounded
+concurrency, and requests beyond the queue limit are rejected with 503 so
+clients back off instead of piling up.
+
+Endpoints:
+    POST   /sessions                  -> {"session_id"}
+    POST   /sessions/<id>/messages    {"content": "..."} -> {"response", "chart"}
+    GET    /sessions/<id>/chart       -> image/png
+    DELETE /sessions/<id>
+    GET    /metrics                   -> service counters, incl. sessions/sec
+    GET    /metrics/prometheus        -> per-span latency histograms and token/row/byte counters
+
+Usage:
+    python pharma_service.py --host 0.0.0.0 --port 8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from pharma_salesanalysts_agent import build_initial_prompt, create_agent_executor, run_turn
+from tools.artifacts import ArtifactSpace, create_artifact_space, use_artifacts
+from tools.chart_cache import last_chart_png
+from tools.startup import prewarm, refresh_summaries
+from tools.tracing import prometheus_text
+
+MAX_CONCURRENT_TURNS = int(os.getenv('SERVICE_MAX_CONCURRENT_TURNS', '16'))
+MAX_QUEUED_TURNS = int(os.getenv('SERVICE_MAX_QUEUED_TURNS', '64'))
+SESSION_IDLE_TIMEOUT = float(os.getenv('SERVICE_SESSION_IDLE_TIMEOUT', '1800'))
+MAX_BODY_BYTES = 1024 * 1024
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+               500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class Session:
+    """One conversation: its message history and artifact space."""
+
+    def __init__(self, artifacts: ArtifactSpace):
+        self.artifacts = artifacts
+        self.messages: List[Dict[str, Any]] = []
+        self.busy = asyncio.Lock()
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class AgentService:
+    """
+    Hosts concurrent agent sessions.
+
+    Attributes:
+        agent: Compiled agent shared by all sessions (it keeps no per-session state)
+        max_concurrent_turns (int): Agent turns allowed to run at once
+        max_queued_turns (int): Turns allowed to wait for a slot before new ones get 503
+        session_idle_timeout (float): Seconds after which an unused session is dropped
+    """
+
+    def __init__(
+        self,
+        agent=None,
+        max_concurrent_turns: int = MAX_CONCURRENT_TURNS,
+        max_queued_turns: int = MAX_QUEUED_TURNS,
+        session_idle_timeout: float = SESSION_IDLE_TIMEOUT,
+    ):
+        self.agent = agent or create_agent_executor()
+        self.max_concurrent_turns = max_concurrent_turns
+        self.max_queued_turns = max_queued_turns
+        self.session_idle_timeout = session_idle_timeout
+
+        self.sessions: Dict[str, Session] = {}
+        self._slots = asyncio.Semaphore(max_concurrent_turns)
+        self._waiting = 0
+        self._running = 0
+        self._started_at = time.monotonic()
+        self._stats = {"sessions_created": 0, "sessions_closed": 0, "turns": 0, "turn_errors": 0,
+                       "rejected": 0, "turn_seconds": 0.0}
+
+    def create_session(self) -> Session:
+        session = Session(create_artifact_space())
+        self.sessions[session.artifacts.session_id] = session
+        self._stats["sessions_created"] += 1
+        return session
+
+    def close_session(self, session_id: str) -> bool:
+        session = self.sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.artifacts.cleanup()
+        self._stats["sessions_closed"] += 1
+        return True
+
+    def reap_idle(self) -> int:
+        cutoff = time.monotonic() - self.session_idle_timeout
+        stale = [sid for sid, s in self.sessions.items() if s.last_used < cutoff and not s.busy.locked()]
+        for session_id in stale:
+            self.close_session(session_id)
+        return len(stale)
+
+    def overloaded(self) -> bool:
+        return self._waiting >= self.max_queued_turns
+
+    async def run_turn(self, session: Session, content: str) -> Dict[str, Any]:
+        """Run one agent turn for `session` inside its artifact space."""
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            async with session.busy:
+                if not session.messages:
+                    content = build_initial_prompt(content)
+                session.messages.append({"role": "user", "content": content})
+                # `chart` reports charts drawn (or served from the chart cache) during this turn only.
+                session.artifacts.last_chart_key = None
+                start = time.perf_counter()
+                try:
+                    with use_artifacts(session.artifacts):
+                        result = await run_turn(self.agent, session.messages,
+                                                session_id=session.artifacts.session_id)
+                        chart = last_chart_png() is not None
+                except Exception:
+                    session.messages.pop()
+                    self._stats["turn_errors"] += 1
+                    raise
+                finally:
+                    self._stats["turn_seconds"] += time.perf_counter() - start
+                    session.last_used = time.monotonic()
+                session.messages.extend(result["messages"][-1:])
+                self._stats["turns"] += 1
+                return {"response": result["messages"][-1].content, "chart": chart}
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def chart(self, session: Session) -> Optional[bytes]:
+        with use_artifacts(session.artifacts):
+            return last_chart_png()
+
+    def metrics(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self._started_at
+        turns = self._stats["turns"]
+        return dict(
+            self._stats,
+            uptime_s=uptime,
+            active_sessions=len(self.sessions),
+            running_turns=self._running,
+            queued_turns=self._waiting,
+            sessions_per_sec=self._stats["sessions_created"] / uptime if uptime else 0.0,
+            turns_per_sec=turns / uptime if uptime else 0.0,
+            avg_turn_s=self._stats["turn_seconds"] / turns if turns else 0.0,
+        )
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Route one request. Returns (status, content type, body)."""
+        parts = [p for p in path.split('?')[0].split('/') if p]
+
+        if parts == ['metrics'] and method == 'GET':
+            return _json(200, self.metrics())
+        if parts == ['metrics', 'prometheus'] and method == 'GET':
+            return 200, 'text/plain; version=0.0.4', prometheus_text().encode()
+        if parts == ['sessions'] and method == 'POST':
+            session = self.create_session()
+            return _json(201, {"session_id": session.artifacts.session_id})
+        if len(parts) < 2 or parts[0] != 'sessions':
+            return _json(404, {"error": "not found"})
+
+        session = self.sessions.get(parts[1])
+        if session is None:
+            return _json(404, {"error": f"unknown session {parts[1]}"})
+
+        if len(parts) == 2 and method == 'DELETE':
+            self.close_session(parts[1])
+            return 204, 'application/json', b''
+        if parts[2:] == ['chart'] and method == 'GET':
+            png = self.chart(session)
+            if png is None:
+                return _json(404, {"error": "no chart for this session"})
+            return 200, 'image/png', png
+        if parts[2:] == ['messages'] and method == 'POST':
+            try:
+                content = json.loads(body or b'{}')["content"]
+            except (ValueError, KeyError, TypeError):
+                return _json(400, {"error": 'expected JSON body {"content": "..."}'})
+            if self.overloaded():
+                self._stats["rejected"] += 1
+                return _json(503, {"error": "server busy, retry later"})
+            if session.busy.locked():
+                return _json(409, {"error": "a turn is already running for this session"})
+            try:
+                return _json(200, await self.run_turn(session, content))
+            except Exception as e:
+                print(f"❌ Turn failed for session {parts[1]}: {e}")
+                return _json(500, {"error": str(e)})
+        return _json(405, {"error": "method not allowed"})
+
+
+def _json(status: int, payload: Dict[str, Any]) -> Tuple[int, str, bytes]:
+    return status, 'application/json', json.dumps(payload).encode()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', '0'))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("payload too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path, body
+
+
+async def _serve_connection(service: AgentService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        try:
+            request = await _read_request(reader)
+            if request is None:
+                return
+            status, content_type, payload = await service.handle(*request)
+        except ValueError as e:
+            status, content_type, payload = _json(413 if 'too large' in str(e) else 400, {"error": str(e)})
+        headers = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                   f"Content-Type: {content_type}",
+                   f"Content-Length: {len(payload)}",
+                   "Connection: close"]
+        if status == 503:
+            headers.append("Retry-After: 5")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode('latin-1') + payload)
+        await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def _reaper(service: AgentService, interval: float = 60.0) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        closed = service.reap_idle()
+        if closed:
+            print(f"🧹 Closed {closed} idle sessions")
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8080, service: Optional[AgentService] = None) -> None:
+    prewarm(refresh_summaries)
+    service = service or AgentService()
+    server = await asyncio.start_server(lambda r, w: _serve_connection(service, r, w), host, port)
+    reaper = asyncio.create_task(_reaper(service))
+    print(f"🚀 Pharma analysis service listening on http://{host}:{port} "
+          f"({service.max_concurrent_turns} concurrent turns, queue {service.max_queued_turns})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        reaper.cancel()
+        for session_id in list(service.sessions):
+            service.close_session(session_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the analysis agent as a multi-session HTTP service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import pytest
+
+from data.create_pharma_data import create_pharma_database
+from tools.db_pool import SQLiteConnectionPool
+
+
+@pytest.fixture
+def sales_db(tmp_path):
+    """Path of a freshly generated scale-1 sales database (240 rows)."""
+    path = str(tmp_path / "pharma_sales.db")
+    create_pharma_database(scale=1, db_path=path)
+    return path
+
+
+@pytest.fixture
+def pool(sales_db):
+    pool = SQLiteConnectionPool(sales_db, max_size=2)
+    yield pool
+    pool.close()
@@ -0,0 +1,68 @@
+import logging
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+from botocore.exceptions import ClientError
+
+from tools.bedrock_client import BedrockClient, TokenBucket
+
+
+class _Runtime:
+    """Stub bedrock-runtime client replaying canned responses or errors."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def converse(self, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def _client(*outcomes):
+    runtime = _Runtime(*outcomes)
+    return BedrockClient(max_attempts=8, client_factory=lambda *args, **kwargs: runtime)
+
+
+def _error(code, retries):
+    return ClientError({"Error": {"Code": code, "Message": code},
+                        "ResponseMetadata": {"RetryAttempts": retries}}, "Converse")
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+
+    start = time.monotonic()
+    waited = bucket.acquire()
+    assert waited > 0
+    assert time.monotonic() - start >= 0.04
+
+
+def test_retried_successes_count_as_retries_not_throttles():
+    client = _client({"usage": {"inputTokens": 10, "outputTokens": 5},
+                      "ResponseMetadata": {"RetryAttempts": 2}})
+    client.converse(modelId="m")
+
+    metrics = client.metrics()["m"]
+    assert (metrics["calls"], metrics["errors"], metrics["throttles"], metrics["retries"]) == (1, 0, 0, 2)
+    assert (metrics["input_tokens"], metrics["output_tokens"]) == (10, 5)
+
+
+def test_throttled_error_logs_the_actual_retry_count(caplog):
+    client = _client(_error("ThrottlingException", 3), _error("ValidationException", 0))
+
+    with caplog.at_level(logging.WARNING, logger="tools.bedrock_client"):
+        with pytest.raises(ClientError):
+            client.converse(modelId="m")
+    assert "after 3 retries" in caplog.text
+
+    with pytest.raises(ClientError):
+        client.converse(modelId="m")
+
+    metrics = client.metrics()["m"]
+    assert (metrics["calls"], metrics["errors"], metrics["throttles"], metrics["retries"]) == (2, 2, 1, 3)
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from tools.concurrent_executor import ConcurrentToolExecutor, ToolConcurrencyMiddleware, ToolLimit, ToolTimeout
+
+
+def _executor(max_concurrency=2, timeout=5.0):
+    return ConcurrentToolExecutor({"tool": ToolLimit(max_concurrency=max_concurrency, timeout=timeout)})
+
+
+class _Gauge:
+    """Tracks the peak number of calls running at once."""
+
+    def __init__(self):
+        self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self.running -= 1
+
+
+def test_sync_calls_are_capped_per_tool():
+    executor, gauge = _executor(max_concurrency=2), _Gauge()
+
+    def work():
+        with gauge:
+            time.sleep(0.05)
+        return "ok"
+
+    threads = [threading.Thread(target=executor.call_sync, args=("tool", work)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert gauge.peak == 2
+    assert executor.stats()["tool"]["calls"] == 6
+
+
+def test_async_calls_are_capped_per_tool():
+    executor, gauge = _executor(max_concurrency=2), _Gauge()
+
+    async def work():
+        with gauge:
+            await asyncio.sleep(0.05)
+        return "ok"
+
+    async def main():
+        return await asyncio.gather(*(executor.call("tool", work) for _ in range(6)))
+
+    assert asyncio.run(main()) == ["ok"] * 6
+    assert gauge.peak == 2
+
+
+def test_sync_timeout_raises_tool_timeout_and_keeps_the_slot():
+    executor, release = _executor(max_concurrency=1, timeout=0.05), threading.Event()
+
+    with pytest.raises(ToolTimeout):
+        executor.call_sync("tool", release.wait)
+    # The hung call still owns the only slot, so the next one waits for it.
+    started = time.perf_counter()
+    threading.Timer(0.2, release.set).start()
+    assert executor.call_sync("tool", lambda: "ok") == "ok"
+    assert time.perf_counter() - started >= 0.15
+    assert executor.stats()["tool"]["timeouts"] == 1
+
+
+def test_async_timeout_raises_tool_timeout_and_keeps_the_slot():
+    executor, release = _executor(max_concurrency=1, timeout=0.05), threading.Event()
+
+    async def main():
+        with pytest.raises(ToolTimeout):
+            await executor.call("tool", lambda: asyncio.to_thread(release.wait))
+        threading.Timer(0.2, release.set).start()
+        started = time.perf_counter()
+        assert await executor.call("tool", lambda: asyncio.sleep(0, "ok")) == "ok"
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) >= 0.15
+
+
+def test_timeout_error_from_the_tool_propagates_unchanged():
+    executor = _executor()
+
+    def fail():
+        raise TimeoutError("pool checkout")
+
+    async def afail():
+        fail()
+
+    with pytest.raises(TimeoutError, match="pool checkout") as sync_error:
+        executor.call_sync("tool", fail)
+    with pytest.raises(TimeoutError, match="pool checkout") as async_error:
+        asyncio.run(executor.call("tool", afail))
+    assert not isinstance(sync_error.value, ToolTimeout)
+    assert not isinstance(async_error.value, ToolTimeout)
+    assert executor.stats()["tool"]["errors"] == 2
+
+
+def test_middleware_turns_a_sync_timeout_into_an_error_message():
+    middleware = ToolConcurrencyMiddleware(_executor(timeout=0.05))
+    request = SimpleNamespace(tool_call={"name": "tool", "id": "call-1", "args": {}})
+
+    message = middleware.wrap_tool_call(request, lambda request: time.sleep(0.2))
+    assert message.status == "error"
+    assert message.tool_call_id == "call-1"
+    assert "timed out" in message.content
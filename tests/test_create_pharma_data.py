@@ -0,0 +1,18 @@
+import sqlite3
+
+import pytest
+
+from data.create_pharma_data import create_pharma_database
+
+
+def test_existing_database_is_kept_without_overwrite(sales_db):
+    with pytest.raises(FileExistsError, match="overwrite"):
+        create_pharma_database(scale=2, db_path=sales_db)
+
+    conn = sqlite3.connect(sales_db)
+    assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 240
+    conn.close()
+
+
+def test_overwrite_replaces_the_tables(sales_db):
+    assert create_pharma_database(scale=2, db_path=sales_db, overwrite=True)["rows"] == 240 * 2 ** 2
@@ -0,0 +1,71 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from tools.data_handoff import _ArrowResultWriter
+
+
+def _write(tmp_path, fmt, chunks, column_types=None, columns=("product", "value")):
+    path = str(tmp_path / f"result.{fmt}")
+    writer = _ArrowResultWriter(path, fmt, column_types or {})
+    writer.write(list(columns), [])
+    for rows in chunks:
+        writer.write(list(columns), rows)
+    writer.close()
+    if fmt == 'parquet':
+        return pq.read_table(path)
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_null_first_chunk(tmp_path, fmt):
+    table = _write(tmp_path, fmt, [[("A", None), ("B", None)], [("C", 1.5), ("D", 2)]])
+    assert table.column("value").to_pylist() == [None, None, 1.5, 2.0]
+    assert table.schema.field("value").type == pa.float64()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_int_then_float_chunks(tmp_path, fmt):
+    table = _write(tmp_path, fmt, [[("A", 100), ("B", 200)], [("C", 150.25)]])
+    assert table.column("value").to_pylist() == [100.0, 200.0, 150.25]
+
+
+def test_declared_integer_column_stays_integer(tmp_path):
+    table = _write(tmp_path, "parquet", [[(2022, 1.0)], [(2023, 2.5)]],
+                   column_types={"year": "INTEGER"}, columns=("year", "value"))
+    assert table.schema.field("year").type == pa.int64()
+    assert table.column("year").to_pylist() == [2022, 2023]
+
+
+def test_column_that_stays_null_is_written_as_string(tmp_path):
+    table = _write(tmp_path, "arrow", [[("A", None)], [("B", None)]])
+    assert table.num_rows == 2
+    assert table.schema.field("value").type == pa.string()
+
+
+def test_empty_result_keeps_the_columns(tmp_path):
+    table = _write(tmp_path, "parquet", [])
+    assert table.num_rows == 0
+    assert table.column_names == ["product", "value"]
+
+
+@pytest.mark.parametrize("note", ["'n/a'", "NULL"])
+def test_byte_cap_truncates_a_parquet_stream(tmp_path, note):
+    import sqlite3
+
+    from tools.sql_stream import stream_query
+
+    conn = sqlite3.connect(":memory:")
+    sql = (
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 50000) "
+        f"SELECT i AS id, 'product ' || i AS product, {note} AS note FROM n"
+    )
+    writer = _ArrowResultWriter(str(tmp_path / "result.parquet"), "parquet", {})
+    summary = stream_query(conn, sql, writer, chunk_size=1000, max_bytes=20_000)
+    writer.close()
+
+    assert summary.truncated
+    assert summary.row_count < 50000
+    assert pq.read_table(str(tmp_path / "result.parquet")).num_rows == summary.row_count
@@ -0,0 +1,62 @@
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("pandas")
+
+from tools.execution_backends import LocalProcessBackend
+
+CHART_CODE = """import matplotlib.pyplot as plt
+plt.plot([1, 2, 3])
+plt.savefig('chart.png')
+print('saved')
+"""
+
+
+@pytest.fixture
+def backend():
+    backend = LocalProcessBackend(max_workers=1, timeout=15.0, cpu_seconds=10)
+    yield backend
+    backend.close()
+
+
+def _text(result):
+    return result.output["content"][0]["text"]
+
+
+def test_chart_is_returned_in_memory(backend):
+    result = backend.run(CHART_CODE, None)
+    assert not result.output["isError"]
+    assert result.png.startswith(b"\x89PNG")
+    assert "saved" in _text(result)
+
+
+def test_timeout_replaces_the_worker(backend):
+    backend.timeout = 1.0
+    result = backend.run("import time\ntime.sleep(30)", None)
+    assert result.output["isError"]
+    assert "wall-clock" in _text(result)
+
+    backend.timeout = 15.0
+    assert backend.run(CHART_CODE, None).png is not None
+    stats = backend.stats()
+    assert (stats["timeouts"], stats["workers_started"], stats["jobs"]) == (1, 2, 2)
+
+
+def test_crashed_worker_is_respawned(backend):
+    result = backend.run("import os\nos._exit(1)", None)
+    assert result.output["isError"]
+    assert "crashed" in _text(result)
+
+    assert backend.run(CHART_CODE, None).png is not None
+    stats = backend.stats()
+    assert (stats["crashes"], stats["workers_started"]) == (1, 2)
+
+
+def test_acquire_gives_up_when_every_worker_stays_busy(backend):
+    worker = backend._acquire(1.0)
+    try:
+        with pytest.raises(TimeoutError, match="busy"):
+            backend._acquire(0.2)
+    finally:
+        backend._release(worker, healthy=True)
+    assert backend._acquire(0.2) is worker
@@ -0,0 +1,26 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pandas")
+
+from tools.insights import insights_fresh, lookup_insights, refresh_insights
+
+
+def test_insights_go_stale_when_sales_grow(sales_db, pool):
+    assert not insights_fresh(pool)
+    refresh_insights(sales_db)
+    assert insights_fresh(pool)
+
+    conn = sqlite3.connect(sales_db)
+    conn.execute("INSERT INTO sales (product_id, region, country, quarter, year, units_sold, revenue_usd) "
+                 "SELECT product_id, region, country, quarter, year + 1, units_sold, revenue_usd FROM sales LIMIT 1")
+    conn.commit()
+    conn.close()
+    assert not insights_fresh(pool)
+
+
+def test_lookup_reports_a_product(sales_db, pool):
+    refresh_insights(sales_db)
+    report = lookup_insights(product="Cosentyx", pool=pool)
+    assert "Cosentyx" in report
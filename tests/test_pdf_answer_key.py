@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from tools.document_reader_tools import _answer_key
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "label.pdf"
+    path.write_bytes(b"%PDF-1.4 label")
+    return str(path)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Is the dose > 10 mg?", "Is the dose < 10 mg?"),
+    ("Adverse events above 1.5%", "Adverse events above 15%"),
+    ("Change of -3 points", "Change of 3 points"),
+])
+def test_questions_with_different_answers_do_not_share_a_key(pdf, first, second):
+    assert _answer_key(pdf, first) != _answer_key(pdf, second)
+
+
+def test_case_whitespace_and_trailing_punctuation_are_ignored(pdf):
+    assert _answer_key(pdf, "What is the  DOSE?") == _answer_key(pdf, "what is the dose")
+
+
+def test_key_depends_on_the_document(pdf, tmp_path):
+    other = tmp_path / "other.pdf"
+    other.write_bytes(b"%PDF-1.4 other")
+    assert _answer_key(pdf, "What is the dose?") != _answer_key(str(other), "What is the dose?")
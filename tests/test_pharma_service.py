@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("langchain")
+
+from pharma_service import AgentService
+from tools.artifacts import artifact_path, current_artifacts
+from tools.chart_cache import put_chart, write_chart_file
+
+
+class FakeAgent:
+    """Stands in for the compiled agent: writes the turn's artifacts like the tools do."""
+
+    async def ainvoke(self, state):
+        question = state["messages"][-1]["content"]
+        session_id = current_artifacts().session_id
+        await asyncio.sleep(0.01)  # Let the sessions' turns interleave.
+        await asyncio.to_thread(self._write_data, session_id)
+        if "Plot" in question:  # The initial prompt itself mentions charts.
+            png = f"png of {session_id} {uuid.uuid4().hex}".encode()
+            await asyncio.to_thread(self._draw_chart, png)
+        return {"messages": state["messages"] + [SimpleNamespace(type="ai", content=f"answer for {session_id}")]}
+
+    @staticmethod
+    def _write_data(session_id):
+        with open(artifact_path("temp_data.csv"), "w") as f:
+            f.write(f"session,{session_id}\n")
+
+    @staticmethod
+    def _draw_chart(png):
+        put_chart(uuid.uuid4().hex, png, output="")
+        write_chart_file(png)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("PHARMA_ARTIFACT_ROOT", str(tmp_path / "artifacts"))
+    service = AgentService(agent=FakeAgent())
+    yield service
+    for session_id in list(service.sessions):
+        service.close_session(session_id)
+
+
+async def _post(service, path, payload=None):
+    status, _, body = await service.handle("POST", path, json.dumps(payload or {}).encode())
+    return status, json.loads(body)
+
+
+def test_sessions_never_see_each_others_artifacts(service):
+    async def main():
+        ids = [(await _post(service, "/sessions"))[1]["session_id"] for _ in range(2)]
+        replies = await asyncio.gather(*(
+            _post(service, f"/sessions/{sid}/messages", {"content": "Plot a chart of sales"}) for sid in ids
+        ))
+        charts = [await service.handle("GET", f"/sessions/{sid}/chart", b"") for sid in ids]
+        return ids, replies, charts
+
+    ids, replies, charts = asyncio.run(main())
+    for sid, (status, reply), (chart_status, content_type, png) in zip(ids, replies, charts):
+        root = service.sessions[sid].artifacts.root
+        assert status == 200 and reply["chart"] is True
+        assert reply["response"] == f"answer for {sid}"
+        with open(os.path.join(root, "temp_data.csv")) as f:
+            assert f.read() == f"session,{sid}\n"
+        with open(os.path.join(root, "chart.png"), "rb") as f:
+            assert f.read() == png
+        assert (chart_status, content_type) == (200, "image/png")
+        assert png.startswith(f"png of {sid}".encode())
+    assert len({service.sessions[sid].artifacts.root for sid in ids}) == 2
+
+
+def test_chart_flag_reports_this_turn_only(service):
+    async def main():
+        sid = (await _post(service, "/sessions"))[1]["session_id"]
+        other = (await _post(service, "/sessions"))[1]["session_id"]
+        first = await _post(service, f"/sessions/{sid}/messages", {"content": "Plot a chart of sales"})
+        second = await _post(service, f"/sessions/{sid}/messages", {"content": "Which region grew?"})
+        unrelated = await _post(service, f"/sessions/{other}/messages", {"content": "Which region grew?"})
+        missing = await service.handle("GET", f"/sessions/{other}/chart", b"")
+        return first, second, unrelated, missing
+
+    first, second, unrelated, missing = asyncio.run(main())
+    assert first[1]["chart"] is True
+    assert second[1]["chart"] is False
+    assert unrelated[1]["chart"] is False
+    assert missing[0] == 404
+
+
+def test_closing_a_session_removes_its_artifacts(service):
+    async def main():
+        sid = (await _post(service, "/sessions"))[1]["session_id"]
+        await _post(service, f"/sessions/{sid}/messages", {"content": "Plot a chart of sales"})
+        root = service.sessions[sid].artifacts.root
+        status, _, _ = await service.handle("DELETE", f"/sessions/{sid}", b"")
+        return status, root
+
+    status, root = asyncio.run(main())
+    assert status == 204
+    assert not os.path.exists(root)
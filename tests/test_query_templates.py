@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+import tools.query_templates as query_templates
+from tools.query_templates import QueryTemplates
+from tools.schema_cache import SchemaCache
+
+
+@pytest.fixture
+def templates(pool, monkeypatch):
+    schema_cache = SchemaCache(pool)
+    monkeypatch.setattr(query_templates, "get_schema_cache", lambda: schema_cache)
+    return QueryTemplates(pool)
+
+
+def _rows(pool, match):
+    with pool.connection() as conn:
+        cursor = conn.execute(match.sql, match.params)
+        columns = [d[0] for d in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def test_matches_vocabulary_from_the_database(templates):
+    match = templates.match("Quarterly Cosentyx revenue by region in 2023")
+    assert match is not None
+    assert match.params == ("Cosentyx", 2023)
+    assert "s.region" in match.sql and "s.quarter" in match.sql
+    assert "SUM(s.revenue_usd)" in match.sql and "units_sold" not in match.sql
+
+
+@pytest.mark.parametrize("question", [
+    "Top 10 countries by Entresto revenue",
+    "Average revenue per therapeutic area",
+    "Revenue by product in 2031",
+    "List the products",
+])
+def test_unsupported_questions_fall_back(templates, question):
+    assert templates.match(question) is None
+
+
+def test_hit_rate_counts_matches_and_fallbacks(templates):
+    templates.match("Revenue by product and year")
+    templates.match("Revenue by product")
+    templates.match("Which brand has the best margin?")
+    stats = templates.stats()
+    assert (stats["matched"], stats["fallbacks"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_yoy_compares_with_the_previous_year(templates, pool):
+    match = templates.match("Cosentyx revenue growth by year")
+    rows = _rows(pool, match)
+    assert [row["year"] for row in rows] == [2022, 2023, 2024]
+    assert rows[0]["revenue_usd_yoy_change"] is None
+    assert rows[1]["revenue_usd_yoy_change"] == pytest.approx(rows[1]["revenue_usd"] - rows[0]["revenue_usd"])
+
+
+def test_yoy_is_null_when_the_previous_year_has_no_sales(templates, pool, sales_db):
+    conn = sqlite3.connect(sales_db)
+    conn.execute("DELETE FROM sales WHERE product_id = 2 AND year = 2023")
+    conn.commit()
+    conn.close()
+
+    rows = _rows(pool, templates.match("Entresto units growth by year"))
+    assert [row["year"] for row in rows] == [2022, 2024]
+    assert rows[1]["units_sold_yoy_change"] is None
+    assert rows[1]["units_sold_yoy_pct"] is None
+
+
+def test_yoy_for_a_requested_year_reads_its_predecessor(templates, pool):
+    match = templates.match("Cosentyx revenue growth in 2024")
+    assert 2023 in match.params
+    rows = _rows(pool, match)
+    assert [row["year"] for row in rows] == [2024]
+    assert rows[0]["revenue_usd_yoy_pct"] < 0
@@ -0,0 +1,76 @@
+import sqlite3
+
+import pytest
+
+import tools.rollups as rollups
+from tools.rollups import ROLLUPS, _choose_rollup, refresh_rollups, rewrite_query
+from tools.schema_cache import SchemaCache
+
+SALES_COLUMNS = ['smind', 'product_id', 'region', 'country', 'quarter', 'year', 'units_sold', 'revenue_usd']
+COLUMNS = {'sales': SALES_COLUMNS, 'products': ['product_id', 'product_name', 'therapeutic_area', 'launch_date']}
+ROW_COUNTS = {name: 10 * (len(ROLLUPS) - i) for i, name in enumerate(ROLLUPS)}
+
+BY_PRODUCT_YEAR = (
+    "SELECT p.product_name, s.year, SUM(s.revenue_usd) AS revenue "
+    "FROM sales s JOIN products p ON s.product_id = p.product_id "
+    "GROUP BY p.product_name, s.year ORDER BY p.product_name, s.year"
+)
+
+
+@pytest.mark.parametrize("sql, rollup", [
+    (BY_PRODUCT_YEAR, 'sales_rollup_product_year'),
+    ("SELECT region, SUM(units_sold) FROM sales WHERE year = 2024 GROUP BY region",
+     'sales_rollup_product_year_region'),
+    ("SELECT country, COUNT(*) FROM sales GROUP BY country",
+     'sales_rollup_product_year_quarter_region_country'),
+])
+def test_aggregates_use_the_smallest_covering_rollup(sql, rollup):
+    choice = _choose_rollup(sql, COLUMNS, ROW_COUNTS)
+    assert choice is not None and choice[0] == rollup
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM sales WHERE year = 2024",
+    "SELECT region, AVG(revenue_usd) FROM sales GROUP BY region",
+    "SELECT region, SUM(revenue_usd / units_sold) FROM sales GROUP BY region",
+    "SELECT smind, SUM(units_sold) FROM sales GROUP BY smind",
+    "SELECT region, SUM(units_sold) FROM sales GROUP BY region UNION SELECT 'x', 1",
+    "SELECT s.region, SUM(t.units_sold) FROM sales s JOIN sales t ON s.smind = t.smind GROUP BY s.region",
+])
+def test_queries_a_rollup_cannot_answer_are_left_alone(sql):
+    assert _choose_rollup(sql, COLUMNS, ROW_COUNTS) is None
+
+
+@pytest.fixture
+def schema(pool, monkeypatch):
+    schema_cache = SchemaCache(pool)
+    monkeypatch.setattr(rollups, "get_schema_cache", lambda: schema_cache)
+
+
+def _result(pool, sql):
+    with pool.connection() as conn:
+        return [tuple(round(v, 4) if isinstance(v, float) else v for v in row) for row in conn.execute(sql)]
+
+
+def test_rewritten_query_returns_the_same_rows(pool, sales_db, schema):
+    refresh_rollups(sales_db)
+    rewritten = rewrite_query(BY_PRODUCT_YEAR, pool)
+    assert 'sales_rollup_product_year' in rewritten
+    assert _result(pool, rewritten) == _result(pool, BY_PRODUCT_YEAR)
+
+
+def test_stale_rollups_are_not_used(pool, sales_db, schema):
+    assert rewrite_query(BY_PRODUCT_YEAR, pool) == BY_PRODUCT_YEAR
+
+    refresh_rollups(sales_db)
+    assert rewrite_query(BY_PRODUCT_YEAR, pool) != BY_PRODUCT_YEAR
+
+    conn = sqlite3.connect(sales_db)
+    conn.execute("INSERT INTO sales (product_id, region, country, quarter, year, units_sold, revenue_usd) "
+                 "VALUES (1, 'Europe', 'UK', 'Q1', 2024, 10, 1000.0)")
+    conn.commit()
+    conn.close()
+    assert rewrite_query(BY_PRODUCT_YEAR, pool) == BY_PRODUCT_YEAR
+
+    refresh_rollups(sales_db)
+    assert _result(pool, rewrite_query(BY_PRODUCT_YEAR, pool)) == _result(pool, BY_PRODUCT_YEAR)
@@ -0,0 +1,126 @@
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from benchmarks.fakes import FakeCodeInterpreter, FakeLatency
+from tools.sandbox_pool import SandboxSessionPool
+
+NO_LATENCY = FakeLatency(sandbox_start=0.0, sandbox_call=0.0, png_bytes=200)
+
+
+class FlakyInterpreter(FakeCodeInterpreter):
+    """Fake interpreter whose session can be made to fail its health check."""
+
+    def __init__(self):
+        super().__init__(NO_LATENCY)
+        self.broken = False
+        self.stopped = False
+
+    def stop(self) -> None:
+        self.stopped = True
+
+    def invoke(self, tool_name, arguments):
+        if self.broken:
+            raise ConnectionError("session expired")
+        return super().invoke(tool_name, arguments)
+
+
+@pytest.fixture
+def clients():
+    return []
+
+
+@pytest.fixture
+def make_pool(clients):
+    pools = []
+
+    def make(**kwargs):
+        def factory():
+            clients.append(FlakyInterpreter())
+            return clients[-1]
+
+        pool = SandboxSessionPool(client_factory=factory, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_sessions_are_reused(make_pool, clients):
+    pool = make_pool(max_size=2)
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+    assert second is first
+    stats = pool.stats()
+    assert (stats["sessions_started"], stats["checkouts"], stats["idle"]) == (1, 2, 1)
+
+
+def test_concurrent_checkouts_get_separate_sessions(make_pool):
+    pool = make_pool(max_size=2)
+    first, second = pool.acquire(), pool.acquire()
+    assert first is not second
+    pool.release(first)
+    pool.release(second)
+    assert pool.stats()["open"] == 2
+
+
+def test_checkout_times_out_when_the_pool_is_exhausted(make_pool):
+    pool = make_pool(max_size=1, checkout_timeout=0.1)
+    session = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire()
+    pool.release(session)
+
+
+def test_idle_sessions_expire(make_pool, clients):
+    pool = make_pool(idle_timeout=0.05)
+    with pool.session():
+        pass
+    time.sleep(0.1)
+    assert pool.reap_idle() == 1
+    assert clients[0].stopped
+    assert pool.stats()["open"] == 0
+
+    with pool.session():
+        pass
+    assert pool.stats()["sessions_started"] == 2
+
+
+def test_session_failing_its_health_check_is_replaced(make_pool, clients):
+    pool = make_pool(health_check_after=0.0)
+    with pool.session() as first:
+        pass
+    clients[0].broken = True
+
+    with pool.session() as second:
+        assert second is not first
+    assert clients[0].stopped
+    stats = pool.stats()
+    assert (stats["health_check_failures"], stats["sessions_started"], stats["open"]) == (1, 2, 1)
+
+
+def test_session_that_failed_during_use_is_stopped(make_pool, clients):
+    pool = make_pool()
+    with pytest.raises(RuntimeError):
+        with pool.session():
+            raise RuntimeError("executeCode failed")
+    assert clients[0].stopped
+    assert pool.stats()["open"] == 0
+
+
+def test_unchanged_files_are_not_uploaded_again(make_pool, clients):
+    pool = make_pool()
+    entry = {"path": "temp_data.csv", "text": "a,b\n1,2\n"}
+    with pool.session() as session:
+        assert pool.upload(session, [entry]) is not None
+        assert pool.upload(session, [dict(entry)]) is None
+        assert pool.upload(session, [{"path": "temp_data.csv", "text": "a,b\n3,4\n"}]) is not None
+    stats = pool.stats()
+    assert (stats["uploads"], stats["uploads_skipped"]) == (2, 1)
+    assert clients[0].files == {"temp_data.csv": 8}
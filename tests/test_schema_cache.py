@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from tools.db_pool import SQLiteConnectionPool
+from tools.schema_cache import SchemaCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "sales.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sales (id INTEGER PRIMARY KEY, region TEXT, country TEXT, year INTEGER)")
+    conn.executemany(
+        "INSERT INTO sales (region, country, year) VALUES (?, ?, ?)",
+        [(["Europe", "Asia"][i % 2], f"Country {i}", 2022 + i % 3) for i in range(2000)],
+    )
+    conn.execute("CREATE TABLE codes (code TEXT PRIMARY KEY, kind TEXT) WITHOUT ROWID")
+    conn.executemany("INSERT INTO codes VALUES (?, ?)", [(f"c{i}", "a" if i % 2 else "b") for i in range(10)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _tables(db_path, **kwargs):
+    pool = SQLiteConnectionPool(db_path)
+    try:
+        return SchemaCache(pool, **kwargs).get()
+    finally:
+        pool.close()
+
+
+def test_values_are_collected_from_a_bounded_sample(db_path):
+    tables = _tables(db_path, sample_rows=100)
+    assert tables["sales"]["row_count"] == 2000
+    assert tables["sales"]["values"] == {"region": ["Asia", "Europe"], "year": [2022, 2023, 2024]}
+    assert tables["codes"]["row_count"] == 10
+    assert tables["codes"]["values"] == {"kind": ["a", "b"]}
+
+
+def test_analyze_statistics_skip_high_cardinality_columns(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX idx_sales_country ON sales (country)")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+    tables = _tables(db_path)
+    assert tables["sales"]["row_count"] == 2000
+    assert "country" not in tables["sales"]["values"]
+    assert tables["sales"]["values"]["region"] == ["Asia", "Europe"]
+
+
+def test_current_schema_version_follows_ddl(db_path):
+    pool = SQLiteConnectionPool(db_path)
+    try:
+        cache = SchemaCache(pool)
+        before = cache.current_schema_version()
+        assert cache.schema_version == before
+
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE notes (id INTEGER PRIMARY KEY)")
+        conn.commit()
+        conn.close()
+
+        assert cache.current_schema_version() > before
+        assert "notes" in cache.get()
+    finally:
+        pool.close()
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from tools.web_search_tools import WebSearch, _hamming, allocate_snippets, simhash
+
+ARTICLE = (
+    "Novartis reported that Cosentyx sales declined in the third quarter as biosimilar "
+    "competition intensified in the psoriasis market, while Kisqali and Entresto kept growing "
+    "strongly across Europe and the United States according to the quarterly results."
+)
+
+
+def test_simhash_treats_mirrored_text_as_near_duplicate():
+    mirrored = ARTICLE + " Read more at our partner site."
+    assert _hamming(simhash(ARTICLE), simhash(mirrored)) <= WebSearch.NEAR_DUPLICATE_BITS
+
+
+def test_simhash_separates_unrelated_text():
+    other = (
+        "The heart failure guideline update recommends starting sacubitril valsartan earlier in "
+        "hospitalised patients, citing reduced readmissions in several randomised clinical trials."
+    )
+    assert _hamming(simhash(ARTICLE), simhash(other)) > WebSearch.NEAR_DUPLICATE_BITS
+
+
+def _result(i, score, chars=4000):
+    return {"title": f"r{i}", "url": f"https://example.com/{i}", "content": " ".join(["word"] * (chars // 5)),
+            "score": score}
+
+
+def test_number_of_results_is_capped():
+    results = [_result(i, 1.0 - i / 20) for i in range(10)]
+    assert len(allocate_snippets(results, token_budget=600)) == 3
+    assert len(allocate_snippets(results, token_budget=600, max_results=5)) == 5
+
+
+def test_budget_is_shared_by_score_and_respected():
+    snippets = allocate_snippets([_result(0, 0.9), _result(1, 0.3)], token_budget=200, min_tokens=20)
+    assert len(snippets[0]) > len(snippets[1]) >= 4 * 20
+    # About 4 characters per token, plus the "..." of each cut.
+    assert sum(len(s) for s in snippets) <= 4 * 200 + 2 * 3
+
+
+def test_results_below_the_minimum_share_are_dropped():
+    results = [_result(i, 0.5) for i in range(3)]
+    assert len(allocate_snippets(results, token_budget=80, min_tokens=40)) == 2
+
+
+def test_raw_content_fills_a_short_snippet():
+    result = {"title": "t", "url": "u", "score": 1.0, "content": "Short summary.", "raw_content": "Full page text " * 50}
+    (snippet,) = allocate_snippets([result], token_budget=100, max_results=1)
+    assert snippet.startswith("Short summary.\nFull page text")
+    assert len(snippet) <= 4 * 100 + 3
+
+
+def test_near_duplicates_are_merged_into_the_best_scoring_copy():
+    response = {"results": [
+        {"url": "https://a.example/1", "content": ARTICLE, "score": 0.6},
+        {"url": "https://b.example/1", "content": ARTICLE + " Read more at our partner site.", "score": 0.9},
+        {"url": "https://c.example/1", "content": "Unrelated guidance on heart failure treatment in hospital.", "score": 0.5},
+    ]}
+    kept = WebSearch._deduplicate_sources(WebSearch.__new__(WebSearch), [response])
+    assert [source["url"] for source in kept] == ["https://b.example/1", "https://c.example/1"]
+    assert kept[0]["duplicates"] == 1
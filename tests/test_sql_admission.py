@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from tools.sql_admission import QueryRejected, explain, query_budget, table_statistics
+
+CROSS_JOIN = "SELECT COUNT(*) FROM sales a, sales b, sales c"
+
+
+@pytest.mark.parametrize("sql", [
+    "DELETE FROM sales",
+    "UPDATE sales SET units_sold = 0",
+    "INSERT INTO products VALUES (99, 'X', 'Y', '2024-01-01')",
+    "CREATE TABLE scratch (a)",
+    "DROP TABLE sales",
+    "ATTACH DATABASE ':memory:' AS other",
+    "PRAGMA journal_mode = DELETE",
+    "PRAGMA query_only = 0",
+])
+def test_writes_and_pragmas_are_rejected(pool, sql):
+    with pool.connection() as conn:
+        with pytest.raises(QueryRejected, match="read-only"):
+            explain(conn, sql)
+
+
+def test_read_only_pragma_is_allowed(pool):
+    with pool.connection() as conn:
+        explain(conn, "PRAGMA table_info(sales)")
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; DROP TABLE sales",
+    "SELECT 1; SELECT 2",
+    "SELECT 1;;",
+])
+def test_multiple_statements_are_rejected(pool, sql):
+    with pool.connection() as conn:
+        with pytest.raises(QueryRejected, match="single SQL statement"):
+            explain(conn, sql)
+
+
+@pytest.mark.parametrize("sql", ["SELECT 1;", "SELECT 1; -- done", "SELECT ';' AS semicolon"])
+def test_single_statement_with_trailing_semicolon_or_comment_is_admitted(pool, sql):
+    with pool.connection() as conn:
+        explain(conn, sql)
+
+
+def test_cross_join_is_classified_cartesian(pool):
+    with pool.connection() as conn:
+        plan = explain(conn, CROSS_JOIN, table_statistics(pool))
+    assert plan.category == "cartesian"
+    assert plan.loops == 3
+
+
+def test_budget_interrupts_a_cross_join(pool):
+    with pool.connection() as conn:
+        with pytest.raises(QueryRejected, match="VM steps"):
+            with query_budget(conn, timeout=0, max_vm_steps=100_000):
+                conn.execute(CROSS_JOIN).fetchall()
+        # The handler is removed again afterwards.
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 240
+
+
+def test_statistics_count_without_rowid_tables(pool, sales_db):
+    conn = sqlite3.connect(sales_db)
+    conn.execute("CREATE TABLE insights_quarterly (product TEXT, quarter TEXT, PRIMARY KEY (product, quarter)) WITHOUT ROWID")
+    conn.executemany("INSERT INTO insights_quarterly VALUES (?, ?)", [("A", "Q1"), ("A", "Q2"), ("B", "Q1")])
+    conn.commit()
+    conn.close()
+
+    statistics = table_statistics(pool)
+    assert statistics.row_counts["insights_quarterly"] == 3
+    assert statistics.row_counts["sales"] == 240
+    assert statistics.index_rows["idx_sales_region_country"]
@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from tools.database_tools import _normalize_question
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Products with units > 100", "Products with units < 100"),
+    ("Products with units >= 100", "Products with units = 100"),
+    ("Brands with growth above 1.5%", "Brands with growth above 15%"),
+    ("Brands with growth above 5%", "Brands with growth above -5%"),
+    ("Revenue change of -3 in Q1", "Revenue change of 3 in Q1"),
+])
+def test_questions_that_need_different_sql_do_not_share_a_key(first, second):
+    assert _normalize_question(first) != _normalize_question(second)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("Revenue by product and year", "revenue  by product and YEAR"),
+    ("Revenue by product and year?", "Revenue by product and year"),
+    ("  Revenue by product and year.\n", "Revenue by product and year"),
+])
+def test_case_whitespace_and_trailing_punctuation_are_ignored(first, second):
+    assert _normalize_question(first) == _normalize_question(second)
+
+
+def test_trailing_decimal_point_is_not_confused_with_the_number():
+    assert _normalize_question("Brands with growth above 1.5") != _normalize_question("Brands with growth above 15")
@@ -0,0 +1,29 @@
+import os
+
+from tools.tracing import Span, _JSONLExporter
+
+
+def test_trace_file_is_rotated_and_bounded(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    exporter = _JSONLExporter(path, max_bytes=2_000, backups=2)
+    try:
+        for batch in range(20):
+            exporter._write([Span("tool.call", None, {"batch": batch, "payload": "x" * 200}) for _ in range(5)])
+    finally:
+        exporter.close()
+
+    files = set(os.listdir(tmp_path))
+    assert {"traces.jsonl.1", "traces.jsonl.2"} <= files <= {"traces.jsonl", "traces.jsonl.1", "traces.jsonl.2"}
+    # Each file holds at most one batch past the limit.
+    assert all(os.path.getsize(tmp_path / name) < 2_000 + 5 * 400 for name in files)
+
+
+def test_trace_file_without_backups_is_truncated(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    exporter = _JSONLExporter(path, max_bytes=1_000, backups=0)
+    try:
+        for batch in range(10):
+            exporter._write([Span("tool.call", None, {"payload": "x" * 300})])
+    finally:
+        exporter.close()
+    assert os.listdir(tmp_path) in ([], ["traces.jsonl"])
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+pytest.importorskip("langchain_core")
+pytest.importorskip("tavily")
+
+from benchmarks.fakes import FakeLatency, FakeTavilyClient
+from tools.web_search_tools import SearchCache, WebSearch
+
+
+@pytest.fixture
+def client(tmp_path):
+    client = WebSearch(tavily_api_key="test", output_dir=str(tmp_path / "search_results"))
+    client.tavily_async = FakeTavilyClient(FakeLatency(tavily=0.0, search_content_chars=200))
+    return client
+
+
+def test_repeated_search_is_served_from_the_cache(client):
+    first = asyncio.run(client.search(["Cosentyx competitors 2024"]))
+    second = asyncio.run(client.search(["cosentyx  competitors 2024?"]))
+    assert second == first
+    assert client.tavily_async.calls == 1
+    assert client.cache.stats["hits"] == 1
+
+
+def test_expired_entry_is_fetched_again(client, tmp_path):
+    asyncio.run(client.search(["Entresto generic entry"]))
+    client.cache.ttl_seconds = 0.01
+    time.sleep(0.05)
+    asyncio.run(client.search(["Entresto generic entry"]))
+    assert client.tavily_async.calls == 2
+
+
+def test_expired_entry_is_served_when_the_search_fails(client):
+    asyncio.run(client.search(["Kesimpta competition"]))
+    client.cache.ttl_seconds = 0.0
+
+    async def offline(*args, **kwargs):
+        raise ConnectionError("offline")
+
+    client.tavily_async.search = offline
+    assert asyncio.run(client.search(["Kesimpta competition"]))
+    assert client.cache.stats["stale_hits"] == 1
+
+
+def test_cache_is_bounded_by_size(tmp_path):
+    cache = SearchCache(str(tmp_path), max_bytes=3_000)
+    for i in range(10):
+        cache.put(f"query {i}", {"query": f"query {i}", "results": [{"content": "x" * 500}]})
+    files = list(tmp_path.glob("search_*.json"))
+    assert sum(f.stat().st_size for f in files) <= 3_000
+    assert cache.stats["evictions"] > 0
+    assert "query 9" in {json.loads(f.read_text())["query"] for f in files}
+
+
+def test_set_search_client_replaces_the_shared_client(client, monkeypatch):
+    from tools import web_search_tools
+
+    monkeypatch.setattr(web_search_tools, "_search_client", None)
+    monkeypatch.setattr(web_search_tools, "_search_client_key", None)
+    web_search_tools.set_search_client(client, tavily_api_key="test")
+    assert web_search_tools._get_search_client("test") is client
+    assert web_search_tools._get_search_client("other") is not client
@@ -1,13 +1,45 @@
-from .database_tools import get_database_schema, generate_and_execute_sql
-from .agentcore_tools import execute_code_with_agentcore, display_chart
-from .web_search import web_search
-from .document_reader_tools import ask_pdf_question
+"""
+Agent tools.
+
+The tool modules are imported on first access (`from tools import web_search`),
+so importing a lightweight helper such as `tools.tracing` does not load every
+tool, and the heavy third-party dependencies behind each tool (pandas, boto3,
+tavily, bedrock_agentcore) are only imported when the tool first runs.
+"""
+import importlib
+
+_TOOL_MODULES = {
+    'get_database_schema': 'database_tools',
+    'generate_and_execute_sql': 'database_tools',
+    'get_sales_insights': 'insights',
+    'execute_code_with_agentcore': 'agentcore_tools',
+    'display_chart': 'agentcore_tools',
+    'web_search': 'web_search_tools',
+    'ask_pdf_question': 'document_reader_tools',
+    'ask_pdf_questions': 'document_reader_tools',
+}
 
 __all__ = [
     'get_database_schema',
-    'generate_and_execute_sql', 
+    'generate_and_execute_sql',
+    'get_sales_insights',
     'execute_code_with_agentcore',
     'display_chart',
     'web_search',
-    'ask_pdf_question'
+    'ask_pdf_question',
+    'ask_pdf_questions'
 ]
+
+
+def __getattr__(name):
+    module = _TOOL_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
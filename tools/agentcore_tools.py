@@ -1,6 +1,15 @@
 import json
+import os
 from langchain_core.tools import tool
-from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
+
+from .artifacts import artifact_path, current_artifacts
+from .chart_cache import chart_key, get_chart, last_chart_png, put_chart, write_chart_file
+from .data_handoff import with_loader
+from .execution_backends import get_execution_backend
+from .tracing import current_span
+
+# Pooled sessions keep their filesystem, so never read back a previous run's chart.
+CHART_RESET = "import os as _os\nif _os.path.exists('chart.png'):\n    _os.remove('chart.png')\n"
 
 
 def call_tool(client, tool_name: str, arguments):
@@ -47,73 +56,44 @@ def extract_png_from_aws_response(response):
         return None
 
 
-def save_png_from_aws_response(response, filename='extracted_chart.png'):
-    """Complete function to extract and save PNG from AWS response."""
-    print(f"Extracting PNG from AWS response...")
-    
-    png_data = extract_png_from_aws_response(response)
-    
-    if png_data:
-        try:
-            with open(filename, 'wb') as f:
-                f.write(png_data)
-            print(f"✅ Successfully saved PNG as {filename}")
-            print(f"File size: {len(png_data)} bytes")
-            return True
-        except Exception as e:
-            print(f"❌ Error saving file: {e}")
-            return False
-    else:
-        print("❌ No PNG data to save")
-        return False
-
-
 @tool
 def execute_code_with_agentcore(csv_filename: str, code: str) -> str:
-    """Execute Python code using AgentCore CodeInterpreter with uploaded CSV data."""
+    """Execute Python chart code (AgentCore CodeInterpreter or a local worker pool) with the uploaded query data (CSV, Parquet or Arrow). The code can call load_data() to read it."""
     print("🔧 Tool Called: execute_code_with_agentcore")
     print(f"📄 Code to execute:\n{code[:200]}{'...' if len(code) > 200 else ''}")
     
-    code_client = CodeInterpreter('us-west-2')
-    code_client.start()
-    code_session_id = code_client.start()
+    artifacts = current_artifacts()
+    data_file = artifacts.resolve(csv_filename)
+    if not os.path.exists(data_file):
+        data_file = artifact_path("temp_data.csv")
 
-    data_file = "temp_data.csv"
-
-    try:
-        with open(data_file, 'r', encoding='utf-8') as data_file_content:
-            data_file_content = data_file_content.read()
-    except FileNotFoundError:
+    if not os.path.exists(data_file):
         print(f"Error: The file '{data_file}' was not found.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
-
-    files_to_create = [{"path": "temp_data.csv", "text": data_file_content}]
-    writing_files = call_tool(code_client, "writeFiles", {"content": files_to_create})
-    listing_files = call_tool(code_client, "listFiles", {"path": ""})
-    print("\nFiles in sandbox:")
-    print(listing_files)
-
-    print("⚡ Executing code in AgentCore...")
-
-    execute_response = code_client.invoke("executeCode", {
-        "code": code,
-        "language": "python",
-        "clearContext": False
-    })
-    
-    listing_files = call_tool(code_client, "listFiles", {"path": ""})
-    print("\nFiles in sandbox after:")
-    print(listing_files)
-
-    read_response = code_client.invoke("readFiles", {"paths": ["chart.png"]})
-    print("downloading response")
-    save_png_from_aws_response(read_response, 'chart.png')
+        data_file = None
+
+    backend = get_execution_backend()
+    full_code = CHART_RESET + with_loader(code, data_file or "temp_data.csv")
+
+    key = chart_key(full_code, data_file, backend.version)
+    cached = get_chart(key)
+    current_span().set(backend=backend.name, cache_hit=cached is not None)
+    if cached is not None:
+        write_chart_file(cached["png"])
+        print(f"⚡ Chart cache hit, skipped {backend.name} execution ({len(cached['png'])} bytes)")
+        return f"Execution results: {json.dumps(cached['output'])}"
+
+    result = backend.run(full_code, data_file)
+
+    if result.png:
+        current_span().set(bytes=len(result.png))
+        write_chart_file(result.png)
+        print(f"✅ Saved chart.png from {backend.name} backend ({len(result.png)} bytes)")
+        if not (result.output or {}).get("isError"):
+            put_chart(key, result.png, result.output)
+    else:
+        print("❌ No chart produced")
 
-    code_client.stop()
-    print("✅ Session stopped")
-    for event in execute_response["stream"]:
-        return f"Execution results: {json.dumps(event['result'])}"
+    return f"Execution results: {json.dumps(result.output)}"
 
 
 @tool
@@ -122,7 +102,14 @@ def display_chart() -> str:
     import os
     from IPython.display import Image, display
     
-    chart_path = 'chart.png'
+    chart_path = artifact_path('chart.png')
+    png = last_chart_png()
+    if png is not None:
+        try:
+            display(Image(data=png, format='png'))
+            return f"✅ Chart displayed successfully from cache ({len(png)} bytes)"
+        except Exception as e:
+            return f"❌ Error displaying chart: {e}"
     if os.path.exists(chart_path):
         try:
             display(Image(chart_path))
@@ -0,0 +1,77 @@
+import contextvars
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Optional
+
+
+class ArtifactSpace:
+    """
+    Where one conversation's files (query results, charts) live.
+
+    The CLI uses the working directory; the service gives every session its
+    own temp dir so concurrent analysts never overwrite each other's
+    temp_data / chart.png.
+
+    Attributes:
+        session_id (str): Owner of the artifacts
+        root (str): Directory the artifacts are written to
+        last_chart_key (Optional[str]): Chart cache key of the session's latest chart
+        lock (threading.Lock): Serializes writers of the session's result file
+    """
+
+    def __init__(self, session_id: str, root: str, owns_root: bool = False):
+        self.session_id = session_id
+        self.root = root
+        self.owns_root = owns_root
+        self.last_chart_key: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        """Path of artifact `name` in this space."""
+        return os.path.normpath(os.path.join(self.root, os.path.basename(name)))
+
+    def resolve(self, name: str) -> str:
+        """Map a file name the model passed back to this space; only the local space may fall back to `name` itself."""
+        candidate = self.path(name)
+        return candidate if self.owns_root or os.path.exists(candidate) else name
+
+    def cleanup(self) -> None:
+        if self.owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+_DEFAULT_SPACE = ArtifactSpace('local', '.')
+_current: contextvars.ContextVar[ArtifactSpace] = contextvars.ContextVar('artifact_space', default=_DEFAULT_SPACE)
+
+
+def current_artifacts() -> ArtifactSpace:
+    """The artifact space of the conversation running in this context."""
+    return _current.get()
+
+
+def artifact_path(name: str) -> str:
+    return current_artifacts().path(name)
+
+
+def create_artifact_space(session_id: Optional[str] = None) -> ArtifactSpace:
+    """Create a session artifact space in its own temp dir under $PHARMA_ARTIFACT_ROOT."""
+    session_id = session_id or uuid.uuid4().hex
+    base = os.getenv('PHARMA_ARTIFACT_ROOT') or None
+    if base:
+        os.makedirs(base, exist_ok=True)
+    root = tempfile.mkdtemp(prefix=f'session-{session_id[:12]}-', dir=base)
+    return ArtifactSpace(session_id, root, owns_root=True)
+
+
+@contextmanager
+def use_artifacts(space: ArtifactSpace):
+    """Route tool artifacts to `space` for code in this context (asyncio tasks and to_thread calls inherit it)."""
+    token = _current.set(space)
+    try:
+        yield space
+    finally:
+        _current.reset(token)
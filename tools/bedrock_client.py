@@ -0,0 +1,194 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+BEDROCK_REGION = os.getenv('BEDROCK_REGION', 'us-east-1')
+THROTTLING_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException'}
+
+
+class TokenBucket:
+    """Client-side request rate limiter (requests per second with a burst allowance)."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a request may be sent. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class BedrockClient:
+    """
+    Shared bedrock-runtime client with connection pooling, adaptive retries,
+    per-model client-side rate limiting and call metrics.
+
+    Attributes:
+        region (str): AWS region of the runtime endpoint
+        max_pool_connections (int): Size of the underlying HTTP connection pool
+        max_attempts (int): Total attempts per call in botocore's adaptive retry mode
+        default_rate (float): Requests/second allowed per model (0 = unlimited)
+        model_rates (Dict[str, float]): Per-model overrides of `default_rate`
+    """
+
+    def __init__(
+        self,
+        region: str = BEDROCK_REGION,
+        max_pool_connections: int = 32,
+        max_attempts: int = 8,
+        default_rate: float = 0.0,
+        model_rates: Optional[Dict[str, float]] = None,
+        client_factory: Optional[Callable[..., Any]] = None,
+    ):
+        self.region = region
+        self.max_pool_connections = max_pool_connections
+        self.max_attempts = max_attempts
+        self.default_rate = default_rate
+        self.model_rates = dict(model_rates or {})
+
+        # boto3/botocore take a noticeable share of startup; import them with the first client.
+        import boto3
+        from botocore.config import Config
+
+        config = Config(
+            region_name=region,
+            max_pool_connections=max_pool_connections,
+            tcp_keepalive=True,
+            retries={'mode': 'adaptive', 'max_attempts': max_attempts},
+        )
+        factory = client_factory or boto3.client
+        self.client = factory('bedrock-runtime', region_name=region, config=config)
+
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def _bucket(self, model_id: str) -> Optional[TokenBucket]:
+        with self._lock:
+            if model_id not in self._buckets:
+                rate = self.model_rates.get(model_id, self.default_rate)
+                self._buckets[model_id] = TokenBucket(rate) if rate > 0 else None
+            return self._buckets[model_id]
+
+    def _record(self, model_id: str, **values: float) -> None:
+        with self._lock:
+            metrics = self._metrics.setdefault(model_id, {
+                "calls": 0, "errors": 0, "throttles": 0, "retries": 0, "latency_s": 0.0,
+                "max_latency_s": 0.0, "rate_limit_wait_s": 0.0,
+                "input_tokens": 0, "output_tokens": 0,
+            })
+            for name, value in values.items():
+                if name == "max_latency_s":
+                    metrics[name] = max(metrics[name], value)
+                else:
+                    metrics[name] += value
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        """Call `converse`, applying the model's rate limit and recording metrics."""
+        from botocore.exceptions import ClientError
+
+        model_id = kwargs.get('modelId', '')
+        with span('bedrock.converse', model_id=model_id) as trace:
+            bucket = self._bucket(model_id)
+            waited = bucket.acquire() if bucket else 0.0
+
+            start = time.perf_counter()
+            try:
+                response = self.client.converse(**kwargs)
+            except ClientError as e:
+                code = e.response.get('Error', {}).get('Code', '')
+                retries = e.response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+                throttled = code in THROTTLING_CODES
+                if throttled:
+                    logger.warning("Bedrock throttled %s after %d retries", model_id, retries)
+                self._record(model_id, calls=1, errors=1, throttles=int(throttled), retries=retries,
+                             rate_limit_wait_s=waited)
+                trace.set(error_code=code, throttles=int(throttled), retries=retries, rate_limit_wait_s=waited)
+                raise
+            latency = time.perf_counter() - start
+
+            usage = response.get('usage', {})
+            # botocore's RetryAttempts counts every retried error (throttling,
+            # timeouts, 5xx), so it is recorded as retries, not throttles.
+            retries = response.get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            input_tokens, output_tokens = usage.get('inputTokens', 0), usage.get('outputTokens', 0)
+            self._record(
+                model_id, calls=1, retries=retries, latency_s=latency, max_latency_s=latency,
+                rate_limit_wait_s=waited, input_tokens=input_tokens, output_tokens=output_tokens,
+            )
+            trace.set(input_tokens=input_tokens, output_tokens=output_tokens, retries=retries,
+                      rate_limit_wait_s=waited)
+            return response
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Per-model call counts, errors, throttled calls, retries, latency and token usage."""
+        with self._lock:
+            result = {}
+            for model_id, metrics in self._metrics.items():
+                metrics = dict(metrics)
+                successes = metrics["calls"] - metrics["errors"]
+                metrics["avg_latency_s"] = metrics["latency_s"] / successes if successes else 0.0
+                result[model_id] = metrics
+            return result
+
+
+def _parse_model_rates(spec: str) -> Dict[str, float]:
+    """Parse BEDROCK_MODEL_RATES, e.g. 'us.amazon.nova-premier-v1:0=2,us.anthropic...=1'."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        model_id, _, rate = item.rpartition('=')
+        rates[model_id] = float(rate)
+    return rates
+
+
+_clients: Dict[str, BedrockClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_bedrock_client(region: str = BEDROCK_REGION) -> BedrockClient:
+    """Return the process-wide Bedrock client for `region`, creating it on first use."""
+    with _clients_lock:
+        client = _clients.get(region)
+        if client is None:
+            client = BedrockClient(
+                region=region,
+                max_pool_connections=int(os.getenv('BEDROCK_MAX_CONNECTIONS', '32')),
+                max_attempts=int(os.getenv('BEDROCK_MAX_ATTEMPTS', '8')),
+                default_rate=float(os.getenv('BEDROCK_DEFAULT_RATE', '0')),
+                model_rates=_parse_model_rates(os.getenv('BEDROCK_MODEL_RATES', '')),
+            )
+            _clients[region] = client
+        return client
+
+
+def set_bedrock_client(client: BedrockClient, region: str = BEDROCK_REGION) -> None:
+    """Replace the shared client for `region` (e.g. with a stub in benchmarks)."""
+    with _clients_lock:
+        _clients[region] = client
+
+
+def bedrock_metrics() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Metrics of every shared client, keyed by region."""
+    with _clients_lock:
+        clients = dict(_clients)
+    return {region: client.metrics() for region, client in clients.items()}
@@ -0,0 +1,159 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_DIR = os.getenv('PHARMA_CACHE_DIR', '.cache')
+
+
+class PersistentLRUCache:
+    """
+    A size-bounded, disk-backed LRU cache for pickleable values.
+
+    Entries live in a small SQLite file so they survive restarts and can be
+    shared by several processes. Least recently used entries are evicted once
+    either the entry count or the total payload size exceeds its limit.
+
+    Attributes:
+        path (str): SQLite file holding the cache
+        namespace (str): Table name, so several caches can share one file
+        max_entries (int): Maximum number of entries kept
+        max_bytes (int): Maximum total size of pickled values
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str = "cache",
+        max_entries: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        if not namespace.isidentifier():
+            raise ValueError(f"Invalid cache namespace: {namespace!r}")
+
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL;")
+            conn.execute("PRAGMA synchronous=NORMAL;")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.namespace} (
+                    key TEXT PRIMARY KEY,
+                    value BLOB,
+                    size INTEGER,
+                    last_access REAL
+                )
+            """)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.namespace}_lru "
+                f"ON {self.namespace} (last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for `key`, or `default` on a miss."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                f"SELECT value FROM {self.namespace} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return default
+
+            conn.execute(
+                f"UPDATE {self.namespace} SET last_access = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            conn.commit()
+            self._stats["hits"] += 1
+
+        try:
+            return pickle.loads(row[0])
+        except Exception:
+            self.delete(key)
+            return default
+
+    def set(self, key: str, value: Any) -> bool:
+        """Store `value` under `key`. Returns False if the value is too large to cache."""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return False
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.namespace} (key, value, size, last_access) "
+                f"VALUES (?, ?, ?, ?)",
+                (key, payload, len(payload), time.time()),
+            )
+            self._stats["sets"] += 1
+            self._evict(conn)
+            conn.commit()
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+            conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(f"DELETE FROM {self.namespace}")
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        count, total = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.namespace}"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        victims = []
+        for key, size in conn.execute(
+            f"SELECT key, size FROM {self.namespace} ORDER BY last_access ASC"
+        ):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+
+        conn.executemany(f"DELETE FROM {self.namespace} WHERE key = ?", victims)
+        self._stats["evictions"] += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/eviction counters plus current entry count and size."""
+        with self._lock:
+            count, total = self._connection().execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.namespace}"
+            ).fetchone()
+            stats: Dict[str, Any] = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = count
+        stats["bytes"] = total
+        return stats
+
+
+def cache_path(name: str, directory: Optional[str] = None) -> str:
+    """Return the path of a cache file inside the shared cache directory."""
+    return os.path.join(directory or CACHE_DIR, name)
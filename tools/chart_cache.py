@@ -0,0 +1,66 @@
+import hashlib
+import os
+from typing import Any, Dict, Optional
+
+from .artifacts import artifact_path, current_artifacts
+from .cache import PersistentLRUCache, cache_path
+
+_chart_cache = PersistentLRUCache(
+    cache_path('chart_cache.sqlite'), namespace='charts',
+    max_entries=int(os.getenv('PHARMA_CHART_CACHE_ENTRIES', '500')),
+    max_bytes=int(os.getenv('PHARMA_CHART_CACHE_MB', '256')) * 1024 * 1024,
+)
+
+
+def chart_key(code: str, data_file: Optional[str], backend_version: str) -> str:
+    """Content address of a chart: hash of the code, the input data bytes and the backend version."""
+    digest = hashlib.sha256()
+    digest.update(backend_version.encode())
+    digest.update(b'\x00')
+    digest.update(code.encode('utf-8'))
+    digest.update(b'\x00')
+    if data_file:
+        with open(data_file, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def get_chart(key: str) -> Optional[Dict[str, Any]]:
+    """Return the cached {'png', 'output'} for `key`, remembering it as the session's latest chart."""
+    entry = _chart_cache.get(key)
+    current_artifacts().last_chart_key = key if entry is not None else None
+    return entry
+
+
+def put_chart(key: str, png: bytes, output: Any) -> None:
+    _chart_cache.set(key, {"png": png, "output": output})
+    current_artifacts().last_chart_key = key
+
+
+def last_chart_png() -> Optional[bytes]:
+    """PNG bytes of the session's most recently produced or served chart, if still cached."""
+    key = current_artifacts().last_chart_key
+    if key is None:
+        return None
+    entry = _chart_cache.get(key)
+    return entry["png"] if entry else None
+
+
+def write_chart_file(png: bytes, path: Optional[str] = None) -> bool:
+    """Write `png` to `path` (the session's chart.png by default) unless it already holds exactly these bytes."""
+    path = path or artifact_path('chart.png')
+    try:
+        if os.path.getsize(path) == len(png):
+            with open(path, 'rb') as f:
+                if f.read() == png:
+                    return False
+    except OSError:
+        pass
+    with open(path, 'wb') as f:
+        f.write(png)
+    return True
+
+
+def chart_cache_stats() -> Dict[str, Any]:
+    return _chart_cache.stats()
@@ -0,0 +1,247 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+
+from .tracing import span
+
+
+@dataclass(frozen=True)
+class ToolLimit:
+    """Concurrency and time limits for one tool."""
+
+    max_concurrency: int
+    timeout: float
+
+
+# Limits are process-wide, shared by every session; generate_and_execute_sql
+# additionally takes turns within a session on its result file.
+DEFAULT_TOOL_LIMITS: Dict[str, ToolLimit] = {
+    'generate_and_execute_sql': ToolLimit(max_concurrency=4, timeout=180.0),
+    'ask_pdf_question': ToolLimit(max_concurrency=4, timeout=180.0),
+    'ask_pdf_questions': ToolLimit(max_concurrency=2, timeout=300.0),
+    'web_search': ToolLimit(max_concurrency=4, timeout=60.0),
+    'execute_code_with_agentcore': ToolLimit(max_concurrency=2, timeout=300.0),
+}
+DEFAULT_LIMIT = ToolLimit(max_concurrency=4, timeout=120.0)
+
+
+def _parse_limits(spec: str) -> Dict[str, ToolLimit]:
+    """Parse TOOL_LIMITS, e.g. 'web_search=8:30,generate_and_execute_sql=1:120'."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, value = item.partition('=')
+        concurrency, _, timeout = value.partition(':')
+        default = DEFAULT_TOOL_LIMITS.get(name, DEFAULT_LIMIT)
+        limits[name] = ToolLimit(
+            max_concurrency=int(concurrency or default.max_concurrency),
+            timeout=float(timeout or default.timeout),
+        )
+    return limits
+
+
+class ToolTimeout(Exception):
+    """A tool call ran past its tool's time limit."""
+
+
+class ConcurrentToolExecutor:
+    """
+    Applies per-tool limits to tool calls that run concurrently.
+
+    Each tool gets its own concurrency cap and timeout. Blocking tools run
+    on worker threads; a timed-out call is abandoned, not interrupted: the
+    caller gets ToolTimeout at once, while the call keeps its concurrency
+    slot until its thread returns, so hung calls cannot pile up past the
+    tool's limit.
+
+    Attributes:
+        limits (Dict[str, ToolLimit]): Per-tool limits, by tool name
+        default_limit (ToolLimit): Limit for tools not listed in `limits`
+    """
+
+    def __init__(self, limits: Optional[Dict[str, ToolLimit]] = None, default_limit: ToolLimit = DEFAULT_LIMIT):
+        self.limits = dict(DEFAULT_TOOL_LIMITS if limits is None else limits)
+        self.default_limit = default_limit
+        self._async_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._thread_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def limit_for(self, name: str) -> ToolLimit:
+        return self.limits.get(name, self.default_limit)
+
+    def _async_semaphore(self, name: str) -> asyncio.Semaphore:
+        # asyncio semaphores belong to one event loop, so keep a set per loop.
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphores = self._async_semaphores.setdefault(loop, {})
+            if name not in semaphores:
+                semaphores[name] = asyncio.Semaphore(self.limit_for(name).max_concurrency)
+            return semaphores[name]
+
+    def _thread_semaphore(self, name: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if name not in self._thread_semaphores:
+                self._thread_semaphores[name] = threading.BoundedSemaphore(self.limit_for(name).max_concurrency)
+            return self._thread_semaphores[name]
+
+    def _record(self, name: str, elapsed: float, outcome: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(name, {"calls": 0, "errors": 0, "timeouts": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["calls"] += 1
+            stats["total_s"] += elapsed
+            stats["max_s"] = max(stats["max_s"], elapsed)
+            if outcome != "ok":
+                stats[outcome] += 1
+
+    async def call(self, name: str, awaitable_factory) -> Any:
+        """
+        Await `awaitable_factory()` under the limits of tool `name`.
+
+        Raises:
+            ToolTimeout: If the call exceeds the tool's timeout. A TimeoutError
+                raised by the tool itself (a pool checkout, a read timeout)
+                propagates unchanged.
+        """
+        limit = self.limit_for(name)
+        semaphore = self._async_semaphore(name)
+        await semaphore.acquire()
+        start = time.perf_counter()
+        outcome = "errors"
+        release = True
+        try:
+            task = asyncio.ensure_future(awaitable_factory())
+            try:
+                done, _ = await asyncio.wait({task}, timeout=limit.timeout)
+            except asyncio.CancelledError:
+                task.cancel()
+                raise
+            if not done:
+                # Async tools await worker threads, which cancelling would not
+                # stop; the task keeps the slot until it really finishes.
+                outcome = "timeouts"
+                release = False
+                task.add_done_callback(lambda finished: _release_after(semaphore, finished))
+                raise ToolTimeout(f"{name} timed out after {limit.timeout:g}s")
+            result = task.result()
+            outcome = "ok"
+            return result
+        finally:
+            if release:
+                semaphore.release()
+            self._record(name, time.perf_counter() - start, outcome)
+
+    def call_sync(self, name: str, func, *args, **kwargs) -> Any:
+        """
+        Call blocking `func` on a worker thread under the limits of tool `name`.
+
+        Raises:
+            ToolTimeout: If the call exceeds the tool's timeout. The thread keeps
+                running, and holds the tool's slot, until `func` returns.
+        """
+        limit = self.limit_for(name)
+        semaphore = self._thread_semaphore(name)
+        semaphore.acquire()
+        start = time.perf_counter()
+        outcome = "errors"
+        finished = threading.Event()
+        returned: Dict[str, Any] = {}
+
+        def run():
+            try:
+                returned["result"] = func(*args, **kwargs)
+            except BaseException as e:
+                returned["error"] = e
+            finally:
+                semaphore.release()
+                finished.set()
+
+        try:
+            # Copy the context so the call stays inside the caller's trace span.
+            context = contextvars.copy_context()
+            threading.Thread(target=context.run, args=(run,), name=f"tool-{name}", daemon=True).start()
+            if not finished.wait(limit.timeout):
+                outcome = "timeouts"
+                raise ToolTimeout(f"{name} timed out after {limit.timeout:g}s")
+            if "error" in returned:
+                raise returned["error"]
+            outcome = "ok"
+            return returned["result"]
+        finally:
+            self._record(name, time.perf_counter() - start, outcome)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+def _release_after(semaphore: asyncio.Semaphore, task: asyncio.Future) -> None:
+    """Free the slot of a timed-out task once it finishes, consuming its outcome."""
+    if not task.cancelled():
+        task.exception()
+    semaphore.release()
+
+
+class ToolConcurrencyMiddleware(AgentMiddleware):
+    """
+    Agent middleware that applies the executor's per-tool limits.
+
+    The agent already issues the tool calls of one model turn together;
+    under `ainvoke` they run concurrently. On both the sync and async paths
+    this middleware bounds each tool's concurrency and duration and traces
+    it as a `tool.<name>` span. A timed-out call becomes an error
+    ToolMessage so the model can react to it.
+    """
+
+    def __init__(self, executor: Optional[ConcurrentToolExecutor] = None):
+        super().__init__()
+        self.executor = executor or get_tool_executor()
+
+    def wrap_tool_call(self, request, handler):
+        name = request.tool_call["name"]
+        try:
+            with span(f'tool.{name}'):
+                return self.executor.call_sync(name, handler, request)
+        except ToolTimeout as e:
+            return self._timeout_message(request, e)
+
+    async def awrap_tool_call(self, request, handler):
+        name = request.tool_call["name"]
+        try:
+            with span(f'tool.{name}'):
+                return await self.executor.call(name, lambda: handler(request))
+        except ToolTimeout as e:
+            return self._timeout_message(request, e)
+
+    @staticmethod
+    def _timeout_message(request, error: ToolTimeout) -> ToolMessage:
+        return ToolMessage(
+            content=f"❌ Error: {error}",
+            tool_call_id=request.tool_call["id"],
+            name=request.tool_call["name"],
+            status="error",
+        )
+
+
+_executor: Optional[ConcurrentToolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ConcurrentToolExecutor:
+    """Return the shared executor, with limits overridable via $TOOL_LIMITS."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            limits = dict(DEFAULT_TOOL_LIMITS)
+            limits.update(_parse_limits(os.getenv('TOOL_LIMITS', '')))
+            _executor = ConcurrentToolExecutor(limits)
+        return _executor
@@ -0,0 +1,234 @@
+import csv
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from .artifacts import artifact_path
+
+RESULT_FORMAT = os.getenv('PHARMA_RESULT_FORMAT', 'csv').lower()
+
+# Rows a columnar writer holds back while a column has only been NULL so far.
+MAX_PENDING_ROWS = 100_000
+
+RESULT_FILES = {
+    'csv': 'temp_data.csv',
+    'parquet': 'temp_data.parquet',
+    'arrow': 'temp_data.arrow',
+}
+
+# Prepended to generated chart code so it can load the hand-off file in any format.
+LOADER_PRELUDE = '''
+def load_data(path={path!r}):
+    """Load the query result uploaded for this execution."""
+    import pandas as pd
+    if path.endswith('.arrow'):
+        import pyarrow as pa
+        with pa.memory_map(path, 'r') as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path, memory_map=True)
+    return pd.read_csv(path)
+'''
+
+
+class _CSVResultWriter:
+    """Incremental CSV writer; the header is written with the first chunk."""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._file = open(filename, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._header_written = False
+
+    def write(self, columns, rows) -> None:
+        if not self._header_written:
+            self._writer.writerow(columns)
+            self._header_written = True
+        self._writer.writerows(rows)
+
+    @property
+    def bytes_written(self) -> int:
+        return self._file.tell()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _declared_arrow_type(pa, declared: str):
+    """Arrow type for a SQLite declared type, by SQLite's affinity rules (None: infer from the data)."""
+    if 'INT' in declared:
+        return pa.int64()
+    if any(name in declared for name in ('CHAR', 'CLOB', 'TEXT')):
+        return pa.string()
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return pa.float64()
+    return None
+
+
+def _estimated_bytes(rows) -> int:
+    """Rough in-memory size of Python rows that have not been converted to Arrow yet."""
+    return sum(
+        len(value) if isinstance(value, (str, bytes)) else 8
+        for row in rows for value in row
+    )
+
+
+def _inferred_arrow_type(pa, values: List[Any]):
+    """Arrow type for the non-NULL values of a column (None if they are all NULL)."""
+    kinds = {type(value) for value in values if value is not None}
+    if not kinds:
+        return None
+    if kinds <= {int, bool, float}:
+        # SQLite is dynamically typed: an expression that returned INTEGER so
+        # far can return REAL further down, so numbers are kept as float64.
+        return pa.float64()
+    if kinds == {bytes}:
+        return pa.binary()
+    return pa.string()
+
+
+class _ArrowResultWriter:
+    """
+    Incremental Parquet / Arrow IPC writer.
+
+    The file schema is fixed once the writer opens, so every column type is
+    settled first. Columns with a declared SQLite type (by name, from
+    `column_types`) get that type. Other numbers become float64, and text
+    becomes string. Rows are held back while a column has only been NULL,
+    up to MAX_PENDING_ROWS, after which such columns are written as string.
+    `bytes_written` counts rows held back or buffered by the format writer,
+    not just what reached the file, so byte caps apply before the first flush.
+    """
+
+    def __init__(self, filename: str, fmt: str, column_types: Dict[str, str]):
+        import pyarrow as pa
+
+        self._pa = pa
+        self.filename = filename
+        self.fmt = fmt
+        self._column_types = column_types
+        self._sink = pa.OSFile(filename, 'wb')
+        self._writer = None
+        self._schema = None
+        self._columns = []
+        self._types: Dict[str, Any] = {}
+        self._pending: List[list] = []
+        self._pending_rows = 0
+        self._pending_bytes = 0
+        # Arrow bytes handed to the format writer since the file last grew.
+        self._unflushed_bytes = 0
+        self._flushed_position = 0
+
+    def _open(self) -> None:
+        pa = self._pa
+        self._schema = pa.schema([(name, self._types.get(name) or pa.string()) for name in self._columns])
+        if self.fmt == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self._sink, self._schema)
+        else:
+            # Uncompressed IPC file, so the reader can memory-map it without copying.
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+        for rows in self._pending:
+            self._write_rows(rows)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def _array(self, values: List[Any], arrow_type):
+        pa = self._pa
+        if pa.types.is_string(arrow_type):
+            values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+        try:
+            return pa.array(values, type=arrow_type)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # A REAL in a column declared INTEGER: SQLite stores it as is.
+            return pa.array(values).cast(arrow_type, safe=False)
+
+    def _write_rows(self, rows) -> None:
+        arrays = [
+            self._array([row[i] for row in rows], field.type) for i, field in enumerate(self._schema)
+        ]
+        table = self._pa.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table)
+        position = self._sink.tell()
+        if position > self._flushed_position:
+            self._flushed_position = position
+            self._unflushed_bytes = 0
+        else:
+            self._unflushed_bytes += table.nbytes
+
+    def write(self, columns, rows) -> None:
+        self._columns = columns
+        if not rows:
+            return
+        if self._writer is not None:
+            self._write_rows(rows)
+            return
+
+        for i, name in enumerate(columns):
+            if self._types.get(name) is None:
+                declared = _declared_arrow_type(self._pa, self._column_types.get(name, '').upper())
+                self._types[name] = declared or _inferred_arrow_type(self._pa, [row[i] for row in rows])
+        self._pending.append(rows)
+        self._pending_rows += len(rows)
+        self._pending_bytes += _estimated_bytes(rows)
+        if all(self._types.get(name) is not None for name in columns) or self._pending_rows >= MAX_PENDING_ROWS:
+            self._open()
+
+    @property
+    def bytes_written(self) -> int:
+        return self._sink.tell() + self._unflushed_bytes + self._pending_bytes
+
+    def close(self) -> None:
+        if self._writer is None:
+            # Empty result, or columns that stayed NULL: write what is held back.
+            self._open()
+        self._writer.close()
+        self._sink.close()
+
+
+def open_result_writer(fmt: str = RESULT_FORMAT, column_types: Optional[Dict[str, str]] = None):
+    """
+    Open a streaming writer for a query result in the sandbox hand-off format.
+
+    Parquet and Arrow IPC need pyarrow; without it (or for an unknown
+    format) the result is written as CSV. The file goes to the current
+    session's artifact space. The writer exposes `write(columns, rows)`,
+    `bytes_written`, `filename` and `close()`.
+
+    Args:
+        fmt (str): 'csv', 'parquet' or 'arrow'
+        column_types (Optional[Dict[str, str]]): Declared SQLite type per
+            column name for the columnar formats (default from the schema cache)
+    """
+    if fmt in ('parquet', 'arrow'):
+        try:
+            if column_types is None:
+                column_types = _schema_column_types()
+            return _ArrowResultWriter(artifact_path(RESULT_FILES[fmt]), fmt, column_types)
+        except ImportError:
+            print(f"⚠️ pyarrow not installed, falling back to CSV instead of {fmt}")
+    return _CSVResultWriter(artifact_path(RESULT_FILES['csv']))
+
+
+def _schema_column_types() -> Dict[str, str]:
+    from .schema_cache import get_schema_cache
+
+    try:
+        return get_schema_cache().column_types()
+    except sqlite3.Error:
+        return {}
+
+
+def upload_entry(path: str, sandbox_path: str = None) -> Dict[str, Any]:
+    """Build a `writeFiles` entry: text for CSV, raw bytes for columnar files."""
+    sandbox_path = sandbox_path or os.path.basename(path)
+    if path.endswith('.csv'):
+        with open(path, 'r', encoding='utf-8') as f:
+            return {"path": sandbox_path, "text": f.read()}
+    with open(path, 'rb') as f:
+        return {"path": sandbox_path, "blob": f.read()}
+
+
+def with_loader(code: str, data_path: str) -> str:
+    """Prefix generated code with the `load_data()` helper for `data_path`."""
+    return LOADER_PRELUDE.format(path=os.path.basename(data_path)) + "\n" + code
@@ -1,28 +1,44 @@
-import sqlite3
-import pandas as pd
-import boto3
+import asyncio
+import hashlib
+import os
 import re
-from langchain_core.tools import tool
+import sqlite3
+from langchain_core.tools import StructuredTool, tool
+
+from .artifacts import current_artifacts
+from .bedrock_client import get_bedrock_client
+from .cache import PersistentLRUCache, cache_path
+from .data_handoff import RESULT_FORMAT, open_result_writer
+from .db_pool import get_pool
+from .query_templates import get_query_templates
+from .rollups import rewrite_query
+from .schema_cache import get_schema_cache
+from .sql_admission import QueryRejected, guarded_execution
+from .sql_stream import ResultSummary, stream_query
+from .tracing import current_span, span, traced
 
 BEDROCK_MODEL = 'amazon.nova-premier-v1:0'
 
-def _get_schema():
-    """Helper function to get database schema."""
-    conn = sqlite3.connect('data/pharma_sales.db')
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
+# Caps that stop runaway LLM-generated queries early (0 = unlimited).
+SQL_MAX_ROWS = int(os.getenv('PHARMA_SQL_MAX_ROWS', '1000000'))
+SQL_MAX_BYTES = int(os.getenv('PHARMA_SQL_MAX_MB', '200')) * 1024 * 1024
+
+# Tier 1: normalized question + schema version -> generated SQL (skips Bedrock).
+_sql_cache = PersistentLRUCache(
+    cache_path('sql_cache.sqlite'), namespace='question_to_sql',
+    max_entries=int(os.getenv('PHARMA_SQL_CACHE_ENTRIES', '5000')),
+    max_bytes=16 * 1024 * 1024,
+)
+# Tier 2: SQL text + database data version -> result file and summary (skips SQLite).
+_result_cache = PersistentLRUCache(
+    cache_path('sql_cache.sqlite'), namespace='sql_to_result',
+    max_entries=int(os.getenv('PHARMA_RESULT_CACHE_ENTRIES', '500')),
+    max_bytes=int(os.getenv('PHARMA_RESULT_CACHE_MB', '256')) * 1024 * 1024,
+)
 
-    schema = {}
-    for table in tables:
-        table_name = table[0]
-        cursor.execute(f"PRAGMA table_info({table_name});")
-        columns = cursor.fetchall()
-        schema[table_name] = [col[1] for col in columns]
-
-    conn.close()
-    return "\n".join([f"- {table}: {', '.join(columns)}" for table, columns in schema.items()])
+def _get_schema():
+    """Helper function to get the cached, enriched database schema."""
+    return get_schema_cache().describe()
 
 
 @tool
@@ -30,17 +46,61 @@ def get_database_schema() -> str:
     """Retrieve database schema dynamically."""
     print("🔧 Tool Called: get_database_schema")
     result = _get_schema()
-    table_count = len(result.split('\n'))
+    table_count = len(get_schema_cache().get())
     print(f"✅ Schema retrieved: {table_count} tables found")
     return result
 
 
-@tool
-def generate_and_execute_sql(question: str) -> str:
-    """Generate SQL query and execute it based on user question."""
-    print(f"🔧 Tool Called: generate_and_execute_sql with question: '{question}'")
+def _normalize_question(question: str) -> str:
+    """
+    Normalize a question for the question->SQL and PDF answer cache keys.
+
+    Only case, whitespace and trailing punctuation are ignored: operators,
+    signs and decimal points change the SQL or the answer ("units > 100" vs
+    "units < 100", "1.5%" vs "15%"), so they stay in the key.
+    """
+    return " ".join(question.lower().split()).rstrip(" ?!.,;:")
+
+
+def _normalize_sql(sql_query: str) -> str:
+    return " ".join(sql_query.strip().rstrip(";").split())
+
 
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+def _cache_key(*parts) -> str:
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def sql_cache_stats() -> dict:
+    """Return hit/miss counters for the question->SQL and SQL->result caches and the template fast path."""
+    return {
+        "question_to_sql": _sql_cache.stats(),
+        "sql_to_result": _result_cache.stats(),
+        "fast_path": get_query_templates().stats(),
+    }
+
+
+def _describe_result(summary: ResultSummary) -> str:
+    """Render the bounded preview of a streamed result for the agent."""
+    import pandas as pd
+
+    lines = [f"Rows: {summary.row_count}."]
+    if summary.truncated:
+        lines.append(f"Result truncated ({summary.truncated_reason}); refine the query to aggregate or filter.")
+    if summary.numeric_stats:
+        stats = "; ".join(
+            f"{column}: min={s['min']:,.2f}, max={s['max']:,.2f}, sum={s['sum']:,.2f}"
+            for column, s in summary.numeric_stats.items()
+        )
+        lines.append(f"Column stats: {stats}")
+    lines.append(f"Data header: {pd.DataFrame(summary.head, columns=summary.columns)}")
+    if summary.row_count > len(summary.head):
+        sample = pd.DataFrame(summary.sample, columns=summary.columns)
+        lines.append(f"Random sample of {len(sample)} rows: {sample}")
+    return "\n".join(lines)
+
+
+@traced('sql.generate')
+def _generate_sql(question: str) -> str:
     schema = _get_schema()
 
     prompt = f"""Database schema:
@@ -51,23 +111,116 @@ def generate_and_execute_sql(question: str) -> str:
                 Generate a SQL query to answer this question. Return only the SQL query, no explanations."""
 
     print("🤖 Generating SQL query with Bedrock...")
-    response = bedrock.converse(
+    response = get_bedrock_client().converse(
         modelId=f"us.{BEDROCK_MODEL}",
         messages=[{"role": "user", "content": [{"text": prompt}]}],
         inferenceConfig={"maxTokens": 500, "temperature": 0.1}
     )
 
     sql_query = response['output']['message']['content'][0]['text'].strip()
-    sql_query = re.sub(r'```sql\n?|```\n?', '', sql_query)
-    print(f"📝 Generated SQL: {sql_query}")
+    return re.sub(r'```sql\n?|```\n?', '', sql_query)
+
 
-    print("💾 Executing SQL query...")
-    conn = sqlite3.connect('data/pharma_sales.db')
-    df = pd.read_sql_query(sql_query, conn)
-    conn.close()
+def _generate_and_execute_sql(question: str) -> str:
+    """Generate SQL query and execute it based on user question."""
+    print(f"🔧 Tool Called: generate_and_execute_sql with question: '{question}'")
 
-    csv_filename = "temp_data.csv"
-    df.to_csv(csv_filename, index=False)
-    print(f"✅ SQL executed successfully: {len(df)} rows saved to {csv_filename}")
+    pool = get_pool()
+    schema_cache = get_schema_cache()
+    sql_key = _cache_key(schema_cache.current_schema_version(), _normalize_question(question))
+
+    # Common questions are answered from parameterized templates without the LLM.
+    template = get_query_templates().match(question)
+    current_span().set(fast_path=template is not None)
+    if template is not None:
+        print(f"⚡ Fast path ({template.intent}) in {template.seconds * 1e6:.0f}µs, skipping Bedrock")
+        sql_query, params = template.rendered_sql(), template.params
+    else:
+        params = ()
+        sql_query = _sql_cache.get(sql_key)
+        current_span().set(sql_cache_hit=sql_query is not None)
+        if sql_query is not None:
+            print("⚡ SQL cache hit, skipping Bedrock")
+        else:
+            sql_query = _generate_sql(question)
+    print(f"📝 Generated SQL: {sql_query}")
 
-    return f"SQL Query: {sql_query}\nData saved to: {csv_filename}\nRows: {len(df)}. Data header: {df.head()}"
+    result_key = _cache_key(pool.data_version(), RESULT_FORMAT, _normalize_sql(sql_query))
+    # One result file per session: concurrent queries from the same session take turns.
+    artifacts = current_artifacts()
+    with artifacts.lock:
+        cached = _result_cache.get(result_key)
+        current_span().set(result_cache_hit=cached is not None)
+        if cached is not None:
+            print("⚡ Result cache hit, skipping query execution")
+            data_filename = artifacts.path(cached["filename"])
+            with open(data_filename, 'wb') as f:
+                f.write(cached["payload"])
+            summary = cached["summary"]
+        else:
+            print("💾 Executing SQL query...")
+            executed_sql = rewrite_query(template.sql if template else sql_query, pool)
+            with span('sqlite.query', format=RESULT_FORMAT) as trace:
+                writer = open_result_writer()
+                try:
+                    with pool.connection() as conn:
+                        with guarded_execution(conn, executed_sql, pool, params) as plan:
+                            trace.set(plan=plan.category, plan_cost=plan.cost)
+                            if plan.category != 'indexed':
+                                print(f"🔎 Query plan: {plan.describe()}")
+                            summary = stream_query(
+                                conn, executed_sql, writer,
+                                max_rows=SQL_MAX_ROWS, max_bytes=SQL_MAX_BYTES, params=params,
+                            )
+                except QueryRejected as e:
+                    print(f"🛑 Query rejected: {e}")
+                    trace.set(rejected=str(e))
+                    return (f"SQL Query: {sql_query}\n❌ Query rejected: {e}. "
+                            "Only read-only SELECT queries are allowed; aggregate or filter to keep them fast.")
+                except sqlite3.Error as e:
+                    print(f"❌ Query failed: {e}")
+                    trace.set(error=str(e))
+                    return f"SQL Query: {sql_query}\n❌ Query failed: {e}. Fix the SQL and try again."
+                finally:
+                    writer.close()
+                trace.set(rows=summary.row_count, bytes=summary.bytes_written, truncated=summary.truncated,
+                          fetch_s=summary.fetch_seconds, write_s=summary.write_seconds)
+            data_filename = writer.filename
+            stats = pool.stats()
+            print(f"🔌 DB pool: {stats['in_use']}/{stats['open']} in use, "
+                  f"{stats['checkouts']} checkouts, {stats['connections_created']} connects")
+
+            if not summary.truncated and os.path.getsize(data_filename) <= _result_cache.max_bytes:
+                with open(data_filename, 'rb') as f:
+                    payload = f.read()
+                _result_cache.set(result_key, {
+                    "filename": os.path.basename(data_filename), "payload": payload, "summary": summary,
+                })
+    if template is None:
+        _sql_cache.set(sql_key, sql_query)
+
+    current_span().set(rows=summary.row_count)
+    print(f"✅ SQL executed successfully: {summary.row_count} rows saved to {data_filename}")
+    if summary.truncated:
+        print(f"⚠️ Result truncated: {summary.truncated_reason}")
+
+    cache_stats = sql_cache_stats()
+    print(f"📊 SQL cache: {cache_stats['question_to_sql']['hits']} hits / "
+          f"{cache_stats['question_to_sql']['misses']} misses, result cache: "
+          f"{cache_stats['sql_to_result']['hits']} hits / {cache_stats['sql_to_result']['misses']} misses, "
+          f"fast path: {cache_stats['fast_path']['hit_rate']:.0%} of questions")
+
+    return f"SQL Query: {sql_query}\nData saved to: {data_filename}\n{_describe_result(summary)}"
+
+
+async def _agenerate_and_execute_sql(question: str) -> str:
+    # Bedrock and SQLite calls block, so run them on a worker thread.
+    return await asyncio.to_thread(_generate_and_execute_sql, question)
+
+
+generate_and_execute_sql = StructuredTool.from_function(
+    func=_generate_and_execute_sql,
+    coroutine=_agenerate_and_execute_sql,
+    name="generate_and_execute_sql",
+    description="Generate SQL query and execute it based on user question.",
+)
@@ -0,0 +1,211 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Tuple
+
+DB_PATH = os.getenv('PHARMA_DB_PATH', 'data/pharma_sales.db')
+
+
+class SQLiteConnectionPool:
+    """
+    A thread-safe pool of read-only SQLite connections to the sales database.
+
+    Connections are opened with a `mode=ro` URI and configured once (mmap,
+    page cache, statement cache) when they are created, so a tool call only
+    pays for a checkout instead of a connect and a cold page cache. The pool
+    never writes to the file: the journal mode (WAL, so readers do not block
+    on writers) is set by data/create_pharma_data.py.
+
+    Attributes:
+        db_path (str): Path to the SQLite database file
+        max_size (int): Maximum number of open connections
+        checkout_timeout (float): Seconds to wait for a free connection
+    """
+
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KB = 64 * 1024
+    CACHED_STATEMENTS = 256
+
+    def __init__(
+        self,
+        db_path: str = DB_PATH,
+        max_size: int = 8,
+        checkout_timeout: float = 30.0,
+    ):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+
+        self._idle = []
+        self._open_count = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "connections_created": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_s": 0.0,
+            "peak_in_use": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database file '{self.db_path}' not found")
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=self.CACHED_STATEMENTS,
+        )
+        conn.execute(f"PRAGMA mmap_size={self.MMAP_SIZE};")
+        conn.execute(f"PRAGMA cache_size=-{self.CACHE_SIZE_KB};")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check out a connection, opening a new one if the pool has room."""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._cond:
+            waited = False
+            start = time.monotonic()
+            while not self._idle and self._open_count >= self.max_size:
+                waited = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No SQLite connection available after {self.checkout_timeout}s"
+                    )
+                self._cond.wait(remaining)
+
+            if waited:
+                self._stats["waits"] += 1
+                self._stats["wait_time_s"] += time.monotonic() - start
+
+            self._stats["checkouts"] += 1
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                # Reserve the slot, then connect without holding the lock so a
+                # slow open does not stall other checkouts and releases.
+                conn = None
+                self._open_count += 1
+            in_use = self._open_count - len(self._idle)
+            self._stats["peak_in_use"] = max(self._stats["peak_in_use"], in_use)
+            if conn is not None:
+                return conn
+
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._open_count -= 1
+                self._stats["checkouts"] -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool."""
+        with self._cond:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def schema_version(self) -> int:
+        """Return `PRAGMA schema_version`, bumped by SQLite on every DDL change."""
+        with self.connection() as conn:
+            return conn.execute("PRAGMA schema_version;").fetchone()[0]
+
+    def data_version(self) -> str:
+        """
+        Return a token that changes whenever the database content changes.
+
+        `PRAGMA data_version` is only comparable within a single connection
+        and resets on reconnect, so for pooled connections (and for caches
+        that outlive the process) the token is derived from the size and
+        mtime of the main database file and its WAL.
+        """
+        parts = []
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                st = os.stat(path)
+                parts.append(f"{st.st_size}.{st.st_mtime_ns}")
+            except FileNotFoundError:
+                parts.append("0")
+        return "-".join(parts)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._open_count -= 1
+
+    def stats(self) -> Dict[str, float]:
+        """Return pool counters (connections, checkouts, waits, utilisation)."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open_count
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open_count - len(self._idle)
+            stats["max_size"] = self.max_size
+            return stats
+
+
+class DataVersionMemo:
+    """
+    A value read from the database, reused until the pool's data version changes.
+
+    Kept per database file, so pools for different files do not share entries.
+
+    Attributes:
+        load (Callable[[SQLiteConnectionPool], Any]): Reads the value through a pool
+    """
+
+    def __init__(self, load: Callable[[SQLiteConnectionPool], Any]):
+        self.load = load
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[str, Any]] = {}
+
+    def get(self, pool: SQLiteConnectionPool) -> Any:
+        # Read the version first: a change during `load` then only costs a reload.
+        version = pool.data_version()
+        key = os.path.abspath(pool.db_path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = self.load(pool)
+        with self._lock:
+            self._entries[key] = (version, value)
+        return value
+
+
+_pools: Dict[str, SQLiteConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str = DB_PATH) -> SQLiteConnectionPool:
+    """Return the shared pool for `db_path`, creating it on first use."""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            max_size = int(os.getenv('PHARMA_DB_POOL_SIZE', '8'))
+            pool = SQLiteConnectionPool(db_path, max_size=max_size)
+            _pools[key] = pool
+        return pool
@@ -1,65 +1,229 @@
-import boto3
+import asyncio
+import contextvars
+import hashlib
 import os
-from langchain_core.tools import tool
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from langchain_core.tools import StructuredTool, tool
 
+from .bedrock_client import get_bedrock_client
+from .cache import PersistentLRUCache, cache_path
+from .database_tools import _normalize_question
+from .pdf_index import pdf_sha256, retrieve
+from .tracing import current_span, traced
 
-@tool
-def ask_pdf_question(pdf_name: str, question: str) -> str:
-    """Ask a question about a PDF document using Bedrock's document analysis capabilities."""
-    print(f"🔧 Tool Called: ask_pdf_question with PDF: '{pdf_name}' and question: '{question}'")
-    
+PDF_MODEL_ID = "us.anthropic.claude-3-sonnet-20240229-v1:0"
+
+# Number of page chunks sent per question when retrieval is confident.
+PDF_TOP_K = int(os.getenv('PDF_TOP_K', '4'))
+# Documents queried concurrently by ask_pdf_questions.
+PDF_BATCH_WORKERS = int(os.getenv('PDF_BATCH_WORKERS', '4'))
+
+_answer_cache = PersistentLRUCache(
+    cache_path('pdf_answers.sqlite'), namespace='pdf_answers',
+    max_entries=int(os.getenv('PDF_ANSWER_CACHE_ENTRIES', '2000')),
+    max_bytes=32 * 1024 * 1024,
+)
+
+def _resolve_pdf_path(pdf_name: str) -> str:
     # Construct file path - assume PDFs are in data/ folder
     file_path = f"data/{pdf_name}"
     if not pdf_name.endswith('.pdf'):
         file_path += '.pdf'
-    
+    return file_path
+
+
+def _answer_key(file_path: str, question: str) -> str:
+    normalized = _normalize_question(question)
+    return hashlib.sha256(f"{pdf_sha256(file_path)}\x1f{normalized}".encode()).hexdigest()
+
+
+@traced('pdf.retrieve')
+def _document_content(file_path: str, questions: List[str]) -> List[Dict]:
+    """Relevant excerpts for all `questions`, or the whole PDF if any of them needs it."""
+    excerpts = {}
+    for question in questions:
+        chunks = retrieve(file_path, question, k=PDF_TOP_K)
+        if chunks is None:
+            excerpts = None
+            break
+        excerpts.update((chunk["id"], chunk) for chunk in chunks)
+
+    if excerpts is not None:
+        chunks = [excerpts[chunk_id] for chunk_id in sorted(excerpts)]
+        pages = sorted({chunk["page"] for chunk in chunks})
+        print(f"📑 Sending {len(chunks)} relevant excerpts (pages {', '.join(map(str, pages))})")
+        context = "\n\n".join(f"[Page {chunk['page']}]\n{chunk['text']}" for chunk in chunks)
+        current_span().set(mode="excerpts", chunks=len(chunks), bytes=len(context))
+        return [{"text": f"Excerpts from {os.path.basename(file_path)}:\n\n{context}"}]
+
+    print("📄 Retrieval not confident, sending the full document")
+    with open(file_path, "rb") as doc_file:
+        doc_bytes = doc_file.read()
+    current_span().set(mode="full_document", bytes=len(doc_bytes))
+    return [{
+        "document": {
+            "name": "Document",
+            "format": "pdf",
+            "source": {
+                "bytes": doc_bytes
+            }
+        }
+    }]
+
+
+@traced('pdf.ask')
+def _ask_document(file_path: str, questions: List[str]) -> List[str]:
+    """Answer several questions about one PDF with a single model call."""
+    content = _document_content(file_path, questions)
+    if len(questions) == 1:
+        content.append({"text": questions[0]})
+        max_tokens = 1000
+    else:
+        numbered = "\n".join(f"{i}. {q}" for i, q in enumerate(questions, start=1))
+        content.append({"text": (
+            "Answer each of the following questions about the document. Wrap the answer to "
+            "question N in <answer id=\"N\">...</answer> tags.\n\n" + numbered
+        )})
+        max_tokens = min(4000, 1000 * len(questions))
+
+    print("🤖 Analyzing PDF with Bedrock...")
+    response = get_bedrock_client().converse(
+        modelId=PDF_MODEL_ID,
+        messages=[{"role": "user", "content": content}],
+        inferenceConfig={
+            "maxTokens": max_tokens,
+            "temperature": 0.1
+        }
+    )
+    text = response['output']['message']['content'][0]['text']
+    if len(questions) == 1:
+        return [text]
+
+    answers = {
+        int(match.group(1)): match.group(2).strip()
+        for match in re.finditer(r'<answer id="(\d+)">(.*?)</answer>', text, flags=re.S)
+    }
+    return [answers.get(i, "❌ No answer returned for this question") for i in range(1, len(questions) + 1)]
+
+
+@traced('pdf.answer')
+def _answer_questions(file_path: str, questions: List[str]) -> List[str]:
+    """Serve cached answers and ask the model only about the rest, in one call."""
+    answers: List[Optional[str]] = [None] * len(questions)
+    pending = {}
+    for i, question in enumerate(questions):
+        key = _answer_key(file_path, question)
+        cached = _answer_cache.get(key)
+        if cached is not None:
+            answers[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+    current_span().set(document=os.path.basename(file_path), questions=len(questions), cache_hit=not pending)
+
+    if pending:
+        keys = list(pending)
+        fresh = _ask_document(file_path, [questions[pending[key][0]] for key in keys])
+        for key, answer in zip(keys, fresh):
+            if not answer.startswith("❌"):
+                _answer_cache.set(key, answer)
+            for i in pending[key]:
+                answers[i] = answer
+    else:
+        print("⚡ PDF answer cache hit")
+    return answers
+
+
+def _ask_pdf_question(pdf_name: str, question: str) -> str:
+    """Ask a question about a PDF document using Bedrock's document analysis capabilities."""
+    print(f"🔧 Tool Called: ask_pdf_question with PDF: '{pdf_name}' and question: '{question}'")
+
+    file_path = _resolve_pdf_path(pdf_name)
+
     try:
         if not os.path.exists(file_path):
             return f"❌ Error: PDF file '{file_path}' not found"
-        
-        bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-        
-        assert os.path.exists(file_path), f"PDF file '{file_path}' not found"
-
-        with open(file_path, "rb") as doc_file:
-            doc_bytes = doc_file.read()
-        
-        doc_message = {
-            "role": "user",
-            "content": [
-                {
-                    "document": {
-                        "name": "Document",
-                        "format": "pdf",
-                        "source": {
-                            "bytes": doc_bytes
-                        }
-                    }
-                },
-                {"text": question}
-            ]
-        }
-        
-        print("🤖 Analyzing PDF with Bedrock...")
-        response = bedrock.converse(
-            modelId="us.anthropic.claude-3-sonnet-20240229-v1:0",
-            messages=[doc_message],
-            inferenceConfig={
-                "maxTokens": 1000,
-                "temperature": 0.1
-            }
-        )
-        
-        result = response['output']['message']['content'][0]['text']
+
+        result = _answer_questions(file_path, [question])[0]
         print(f"✅ PDF analysis completed for {pdf_name}")
         return result
-        
+
     except Exception as e:
         error_msg = f"❌ Error analyzing PDF '{pdf_name}': {str(e)}"
         print(error_msg)
         return error_msg
 
 
+async def _aask_pdf_question(pdf_name: str, question: str) -> str:
+    return await asyncio.to_thread(_ask_pdf_question, pdf_name, question)
+
+
+ask_pdf_question = StructuredTool.from_function(
+    func=_ask_pdf_question,
+    coroutine=_aask_pdf_question,
+    name="ask_pdf_question",
+    description="Ask a question about a PDF document using Bedrock's document analysis capabilities.",
+)
+
+
+def ask_pdf_batch(queries: List[Dict[str, str]]) -> List[str]:
+    """
+    Answer a batch of (pdf_name, question) pairs.
+
+    Questions about the same document are grouped into one model call, and
+    different documents are queried concurrently on a bounded thread pool.
+
+    Args:
+        queries: [{'pdf_name': str, 'question': str}, ...]
+
+    Returns:
+        List[str]: One answer (or error message, e.g. for a query missing
+            a key) per query, in input order
+    """
+    answers: List[Optional[str]] = [None] * len(queries)
+    groups: Dict[str, List[int]] = {}
+    for i, query in enumerate(queries):
+        if not query.get("pdf_name") or not query.get("question"):
+            answers[i] = "❌ Error: each query needs a 'pdf_name' and a 'question'"
+            continue
+        file_path = _resolve_pdf_path(query["pdf_name"])
+        if not os.path.exists(file_path):
+            answers[i] = f"❌ Error: PDF file '{file_path}' not found"
+        else:
+            groups.setdefault(file_path, []).append(i)
+
+    def _run(file_path: str, indexes: List[int]) -> None:
+        try:
+            results = _answer_questions(file_path, [queries[i]["question"] for i in indexes])
+        except Exception as e:
+            results = [f"❌ Error analyzing PDF '{file_path}': {str(e)}"] * len(indexes)
+        for i, answer in zip(indexes, results):
+            answers[i] = answer
+
+    with ThreadPoolExecutor(max_workers=max(1, min(PDF_BATCH_WORKERS, len(groups)))) as executor:
+        # Copy the context so worker threads keep the caller's trace and artifact space.
+        futures = [
+            executor.submit(contextvars.copy_context().run, _run, path, indexes)
+            for path, indexes in groups.items()
+        ]
+        for future in futures:
+            future.result()
+    return answers
+
+
+@tool
+def ask_pdf_questions(queries: List[Dict[str, str]]) -> str:
+    """Ask several questions across one or more PDF documents at once. Each query is {"pdf_name": ..., "question": ...}; use this to compare labels (e.g. dosing for cosentyx.pdf vs kesimpta.pdf vs entresto.pdf)."""
+    print(f"🔧 Tool Called: ask_pdf_questions with {len(queries)} queries")
+    answers = ask_pdf_batch(queries)
+    print(f"✅ PDF batch completed: {len(answers)} answers")
+    return "\n\n".join(
+        f"[{i}] {query.get('pdf_name', '?')} - {query.get('question', '?')}\n{answer}"
+        for i, (query, answer) in enumerate(zip(queries, answers), start=1)
+    )
+
+
 if __name__ == "__main__":
     result = ask_pdf_question("cosentyx.pdf", "What is the dosage recommedation?")
     print(result)
@@ -0,0 +1,356 @@
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from .tracing import current_span, span, traced
+
+logger = logging.getLogger(__name__)
+
+CHART_FILE = 'chart.png'
+PRELOADED_MODULES = ['matplotlib', 'matplotlib.pyplot', 'pandas', 'numpy']
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of running chart code on a backend."""
+
+    output: Dict[str, Any]
+    png: Optional[bytes]
+    backend: str
+
+
+class AgentCoreBackend:
+    """Runs chart code in a pooled remote AgentCore CodeInterpreter session."""
+
+    name = 'agentcore'
+    version = 'agentcore-1'
+
+    def run(self, code: str, data_file: Optional[str]) -> ExecutionResult:
+        from .agentcore_tools import call_tool, extract_png_from_aws_response
+        from .data_handoff import upload_entry
+        from .sandbox_pool import get_sandbox_pool
+
+        files_to_create = [upload_entry(data_file)] if data_file else []
+        list_files = os.getenv('AGENTCORE_LIST_FILES', '0') == '1'
+
+        pool = get_sandbox_pool()
+        with pool.session() as session:
+            if pool.upload(session, files_to_create) is None and files_to_create:
+                print(f"♻️ {data_file} already in sandbox, skipping upload")
+
+            if list_files:
+                print("\nFiles in sandbox:")
+                print(call_tool(session, "listFiles", {"path": ""}))
+
+            print("⚡ Executing code in AgentCore...")
+            with span('sandbox.execute'):
+                execute_response = session.invoke("executeCode", {
+                    "code": code,
+                    "language": "python",
+                    "clearContext": True
+                })
+                output = None
+                for event in execute_response["stream"]:
+                    output = event["result"]
+                    break
+
+            if list_files:
+                print("\nFiles in sandbox after:")
+                print(call_tool(session, "listFiles", {"path": ""}))
+
+            with span('sandbox.read_chart') as trace:
+                read_response = session.invoke("readFiles", {"paths": [CHART_FILE]})
+                print("downloading response")
+                png = extract_png_from_aws_response(read_response)
+                trace.set(bytes=len(png or b''))
+
+        stats = pool.stats()
+        print(f"✅ Session returned to pool ({stats['idle']} idle, {stats['sessions_started']} started, "
+              f"{stats['uploads_skipped']} uploads skipped)")
+        return ExecutionResult(output=output, png=png, backend=self.name)
+
+
+def _apply_limits(memory_mb: int) -> None:
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _set_cpu_budget(cpu_seconds: int) -> None:
+    """Allow the next job `cpu_seconds` of CPU on top of what this worker already used."""
+    try:
+        import resource
+    except ImportError:
+        return
+    if not cpu_seconds:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    import matplotlib.pyplot as plt
+
+    _set_cpu_budget(job["cpu_seconds"])
+    workdir = tempfile.mkdtemp(prefix='chart-job-')
+    previous_cwd = os.getcwd()
+    stdout, stderr = io.StringIO(), io.StringIO()
+    error = None
+    png = None
+    try:
+        for name, content in job["files"].items():
+            with open(os.path.join(workdir, name), 'wb') as f:
+                f.write(content)
+        os.chdir(workdir)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            exec(compile(job["code"], '<chart-code>', 'exec'), {"__name__": "__main__"})
+        if os.path.exists(CHART_FILE):
+            with open(CHART_FILE, 'rb') as f:
+                png = f.read()
+    except BaseException:
+        error = traceback.format_exc()
+    finally:
+        plt.close('all')
+        os.chdir(previous_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "error": error, "png": png}
+
+
+def _worker_main(conn, memory_mb: int) -> None:
+    os.environ['MPLBACKEND'] = 'Agg'
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+
+    _apply_limits(memory_mb)
+    conn.send("ready")
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            # The parent closed the pipe (shutdown, or it gave up on this worker).
+            break
+        if job is None:
+            break
+        conn.send(_run_job(job))
+
+
+class _Worker:
+    def __init__(self, ctx, memory_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout: float) -> bool:
+        if not self.ready and self.conn.poll(timeout):
+            self.ready = self.conn.recv() == "ready"
+        return self.ready
+
+    def run(self, job: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        self.conn.send(job)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Chart code exceeded {timeout}s wall-clock limit")
+        return self.conn.recv()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class LocalProcessBackend:
+    """
+    Runs chart code in a local pool of pre-started, resource-limited worker processes.
+
+    Workers come from a forkserver that has already imported matplotlib
+    (Agg), pandas and numpy, so a job only pays for the code itself. Each job
+    runs in its own temp dir with a CPU-time budget, an address-space cap
+    and a wall-clock timeout; a worker that breaks a limit is killed and
+    replaced. The chart PNG is returned in memory.
+
+    Attributes:
+        max_workers (int): Number of worker processes
+        timeout (float): Wall-clock seconds per job
+        cpu_seconds (int): CPU seconds per job
+        memory_mb (int): Address-space limit per worker
+    """
+
+    name = 'local'
+    version = 'local-1'
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        timeout: float = 30.0,
+        cpu_seconds: int = 20,
+        memory_mb: int = 2048,
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        if 'forkserver' in methods:
+            self._ctx.set_forkserver_preload(PRELOADED_MODULES)
+
+        self._idle: List[_Worker] = []
+        self._open_count = 0
+        self._cond = threading.Condition()
+        self._stats = {"jobs": 0, "timeouts": 0, "crashes": 0, "workers_started": 0}
+
+    def _count(self, name: str) -> None:
+        with self._cond:
+            self._stats[name] += 1
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.memory_mb)
+        self._count("workers_started")
+        return worker
+
+    def prewarm(self) -> None:
+        """Start every worker now instead of on first use."""
+        with self._cond:
+            missing = self.max_workers - self._open_count
+            self._open_count += missing
+        workers = [self._spawn() for _ in range(missing)]
+        for worker in workers:
+            worker.wait_ready(self.timeout)
+        with self._cond:
+            self._idle.extend(workers)
+            self._cond.notify_all()
+
+    def _acquire(self, timeout: float) -> _Worker:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self._idle and self._open_count >= self.max_workers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"All {self.max_workers} chart workers stayed busy for {timeout:.0f} s; try again later"
+                    )
+                self._cond.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._open_count += 1
+        try:
+            return self._spawn()
+        except Exception:
+            with self._cond:
+                self._open_count -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if not healthy:
+            worker.kill()
+        with self._cond:
+            if healthy:
+                self._idle.append(worker)
+            else:
+                self._open_count -= 1
+            self._cond.notify()
+
+    @traced('local.execute')
+    def run(self, code: str, data_file: Optional[str]) -> ExecutionResult:
+        files = {}
+        if data_file:
+            with open(data_file, 'rb') as f:
+                files[os.path.basename(data_file)] = f.read()
+        job = {"code": code, "files": files, "cpu_seconds": self.cpu_seconds}
+
+        print("⚡ Executing code in local worker pool...")
+        start = time.perf_counter()
+        worker = None
+        healthy = False
+        try:
+            worker = self._acquire(self.timeout)
+            if not worker.wait_ready(self.timeout):
+                raise RuntimeError("Chart worker failed to start")
+            result = worker.run(job, self.timeout)
+            healthy = True
+        except TimeoutError as e:
+            self._count("timeouts")
+            result = {"stdout": "", "stderr": "", "error": str(e), "png": None}
+        except (EOFError, OSError, RuntimeError) as e:
+            # The worker died, typically from hitting its CPU or memory limit.
+            self._count("crashes")
+            result = {"stdout": "", "stderr": "", "error": f"Chart worker crashed (CPU or memory limit?): {e!r}", "png": None}
+        finally:
+            if worker is not None:
+                self._release(worker, healthy)
+        self._count("jobs")
+
+        current_span().set(bytes=len(result["png"] or b''), failed=result["error"] is not None)
+        text = result["stdout"] + result["stderr"] + (result["error"] or "")
+        output = {"content": [{"type": "text", "text": text}], "isError": result["error"] is not None}
+        print(f"✅ Local execution finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return ExecutionResult(output=output, png=result["png"], backend=self.name)
+
+    def close(self) -> None:
+        with self._cond:
+            workers, self._idle = self._idle, []
+            self._open_count -= len(workers)
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.kill()
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return dict(self._stats, open=self._open_count, idle=len(self._idle))
+
+
+_backends: Dict[str, Any] = {}
+_backends_lock = threading.Lock()
+
+
+def get_execution_backend(name: Optional[str] = None):
+    """
+    Return the shared execution backend for chart code.
+
+    Args:
+        name: 'agentcore' or 'local'; defaults to $CHART_EXECUTION_BACKEND,
+            then 'agentcore'
+    """
+    name = (name or os.getenv('CHART_EXECUTION_BACKEND', 'agentcore')).lower()
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            if name == 'agentcore':
+                backend = AgentCoreBackend()
+            elif name == 'local':
+                backend = LocalProcessBackend(
+                    max_workers=int(os.getenv('LOCAL_CHART_WORKERS', '2')),
+                    timeout=float(os.getenv('LOCAL_CHART_TIMEOUT', '30')),
+                    memory_mb=int(os.getenv('LOCAL_CHART_MEMORY_MB', '2048')),
+                )
+            else:
+                raise ValueError(f"Unknown chart execution backend: {name!r}")
+            _backends[name] = backend
+        return backend
@@ -0,0 +1,412 @@
+"""
+Precomputed sales insights.
+
+Per product, for every region and for all regions together, each quarter's
+QoQ and YoY growth, share of the region's revenue and its YoY shift, trend
+slope and anomaly score are computed in vectorized pandas/NumPy passes and
+stored in `insights_quarterly`. Questions like "which brand is declining?"
+then take one lookup instead of several SQL and chart round-trips.
+
+Usage:
+    python -m tools.insights                    # refresh, then print the overview
+    python -m tools.insights Cosentyx Europe
+"""
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from langchain_core.tools import tool
+
+from .db_pool import DB_PATH, DataVersionMemo, SQLiteConnectionPool, get_pool
+from .rollups import STATE_TABLE as ROLLUP_STATE_TABLE
+from .tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+INSIGHTS_TABLE = 'insights_quarterly'
+STATE_TABLE = 'insights_state'
+# Already aggregated to the grain the insights need; `sales` is read instead while it is stale.
+SOURCE_ROLLUP = 'sales_rollup_product_year_quarter_region'
+ALL_REGIONS = 'All'
+# Quarters of history behind each metric: YoY, share shift, slope and anomaly all look back 4.
+HISTORY_QUARTERS = 4
+ANOMALY_Z = 3.0
+
+PERIOD_SQL = "year * 4 + CAST(substr(quarter, 2) AS INTEGER) - 1"
+METRICS = (
+    'revenue_qoq_pct', 'revenue_yoy_pct', 'units_yoy_pct',
+    'share_pct', 'share_change_pts', 'slope_pct', 'anomaly_z',
+)
+COLUMNS = ('product_id', 'region', 'year', 'quarter', 'units_sold', 'revenue_usd') + METRICS
+
+_refresh_lock = threading.Lock()
+
+
+def _growth(current, previous):
+    import numpy as np
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(previous > 0, (current / previous - 1) * 100, np.nan)
+
+
+def compute_insights(quarterly, since: Optional[int] = None):
+    """
+    Compute the insight metrics from quarterly sales.
+
+    Args:
+        quarterly (pd.DataFrame): product_id, region, year, quarter, units_sold
+            and revenue_usd, one row per product, region and quarter
+        since (Optional[int]): First period (year * 4 + quarter - 1) to return;
+            earlier rows only serve as history
+
+    Returns:
+        pd.DataFrame: COLUMNS, one row per product, region (including
+        ALL_REGIONS) and quarter with sales in it or in the same quarter a
+        year earlier
+    """
+    import numpy as np
+    import pandas as pd
+    from numpy.lib.stride_tricks import sliding_window_view
+
+    if quarterly.empty:
+        return pd.DataFrame(columns=list(COLUMNS))
+    quarterly = quarterly.assign(
+        period=quarterly['year'].astype(int) * 4 + quarterly['quarter'].str[1].astype(int) - 1
+    )
+    totals = quarterly.groupby(['product_id', 'period'], as_index=False)[['units_sold', 'revenue_usd']].sum()
+    quarterly = pd.concat([quarterly, totals.assign(region=ALL_REGIONS)], ignore_index=True)
+
+    # One row per (product, region) series, one column per quarter, gaps filled with zero sales.
+    periods = np.arange(quarterly['period'].min(), quarterly['period'].max() + 1)
+    wide = quarterly.pivot_table(
+        index=['product_id', 'region'], columns='period',
+        values=['revenue_usd', 'units_sold'], aggfunc='sum', fill_value=0,
+    )
+    revenue_frame = wide['revenue_usd'].reindex(columns=periods, fill_value=0)
+    revenue = revenue_frame.to_numpy(dtype=float)
+    units = wide['units_sold'].reindex(columns=periods, fill_value=0).to_numpy(dtype=float)
+    # Each region's total revenue across products; the ALL_REGIONS series add up to the grand total.
+    region_totals = revenue_frame.groupby(level='region').transform('sum').to_numpy(dtype=float)
+
+    series, width = revenue.shape
+    metrics = {name: np.full((series, width), np.nan) for name in METRICS}
+    metrics['revenue_qoq_pct'][:, 1:] = _growth(revenue[:, 1:], revenue[:, :-1])
+    metrics['revenue_yoy_pct'][:, 4:] = _growth(revenue[:, 4:], revenue[:, :-4])
+    metrics['units_yoy_pct'][:, 4:] = _growth(units[:, 4:], units[:, :-4])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.where(region_totals > 0, revenue / region_totals * 100, np.nan)
+    metrics['share_pct'] = share
+    metrics['share_change_pts'][:, 4:] = share[:, 4:] - share[:, :-4]
+
+    window = HISTORY_QUARTERS
+    if width >= window:
+        # Least-squares slope over the last `window` quarters, in % of their mean per quarter.
+        trailing = sliding_window_view(revenue, window, axis=1)
+        x = np.arange(window) - (window - 1) / 2
+        slope = (trailing * x).sum(axis=2) / (x ** 2).sum()
+        mean = trailing.mean(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['slope_pct'][:, window - 1:] = np.where(mean > 0, slope / mean * 100, np.nan)
+    if width > window:
+        # z-score against the previous `window` quarters; the spread is floored
+        # at 1% of their mean so flat series do not divide by ~0.
+        previous = sliding_window_view(revenue[:, :-1], window, axis=1)
+        mean = previous.mean(axis=2)
+        spread = np.maximum(previous.std(axis=2), 0.01 * np.abs(mean))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            metrics['anomaly_z'][:, window:] = np.where(
+                spread > 0, (revenue[:, window:] - mean) / spread, np.nan
+            )
+
+    active = revenue > 0
+    active[:, 4:] |= revenue[:, :-4] > 0
+    if since is not None:
+        active[:, periods < since] = False
+    rows, columns = np.nonzero(active)
+    index = revenue_frame.index
+    result = pd.DataFrame({
+        'product_id': index.get_level_values('product_id').to_numpy()[rows],
+        'region': index.get_level_values('region').to_numpy()[rows],
+        'year': periods[columns] // 4,
+        'quarter': 'Q' + pd.Series(periods[columns] % 4 + 1).astype(str),
+        'units_sold': units[rows, columns].astype(np.int64),
+        'revenue_usd': revenue[rows, columns].round(2),
+    })
+    for name, values in metrics.items():
+        result[name] = values[rows, columns].round(2)
+    return result
+
+
+def _read_quarterly(conn: sqlite3.Connection, since: Optional[int]):
+    import pandas as pd
+
+    source = 'sales'
+    try:
+        rollup = conn.execute(
+            f'SELECT high_water FROM {ROLLUP_STATE_TABLE} WHERE name = ?', (SOURCE_ROLLUP,)
+        ).fetchone()
+        max_smind = conn.execute('SELECT COALESCE(MAX(smind), 0) FROM sales').fetchone()[0]
+        if rollup is not None and rollup[0] == max_smind:
+            source = SOURCE_ROLLUP
+    except sqlite3.OperationalError:
+        pass  # No rollups yet.
+
+    where = f"WHERE {PERIOD_SQL} >= ?" if since is not None else ""
+    return pd.read_sql_query(f'''
+        SELECT product_id, region, year, quarter,
+               SUM(units_sold) AS units_sold, SUM(revenue_usd) AS revenue_usd
+        FROM {source}
+        {where}
+        GROUP BY product_id, region, year, quarter
+    ''', conn, params=(since - HISTORY_QUARTERS,) if since is not None else None)
+
+
+def _sales_fingerprint(cursor: sqlite3.Cursor, smind: int) -> Optional[str]:
+    """The sales row at `smind`, to tell appended rows from a recreated table that reuses the ids."""
+    row = cursor.execute(
+        'SELECT product_id, region, country, quarter, year, units_sold, revenue_usd FROM sales WHERE smind = ?',
+        (smind,),
+    ).fetchone()
+    return None if row is None else repr(row)
+
+
+def refresh_insights(db_path: str = DB_PATH) -> Dict[str, Any]:
+    """
+    Bring `insights_quarterly` up to date with `sales`.
+
+    Like the rollups, the table tracks the highest `smind` it has absorbed.
+    Only quarters from the earliest one that new sales rows fall into are
+    recomputed, reading HISTORY_QUARTERS of earlier data for context.
+    The table is rebuilt when `sales` was recreated, detected by the last
+    absorbed row no longer matching what was stored for it. Updates and
+    deletes of other existing sales rows are not tracked.
+
+    Returns:
+        dict: mode ('full', 'incremental' or 'fresh'), first recomputed
+        period and rows written
+    """
+    with _refresh_lock:
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {INSIGHTS_TABLE} (
+                    product_id INTEGER,
+                    region TEXT,
+                    year INTEGER,
+                    quarter TEXT,
+                    units_sold INTEGER,
+                    revenue_usd REAL,
+                    {', '.join(f'{name} REAL' for name in METRICS)},
+                    PRIMARY KEY (product_id, region, year, quarter)
+                ) WITHOUT ROWID
+            ''')
+            if 'fingerprint' not in {row[1] for row in cursor.execute(f'PRAGMA table_info({STATE_TABLE})')}:
+                cursor.execute(f'DROP TABLE IF EXISTS {STATE_TABLE}')  # Written before fingerprints existed.
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                    name TEXT PRIMARY KEY,
+                    high_water INTEGER,
+                    fingerprint TEXT
+                )
+            ''')
+            max_smind = cursor.execute('SELECT COALESCE(MAX(smind), 0) FROM sales').fetchone()[0]
+            state = cursor.execute(
+                f"SELECT high_water, fingerprint FROM {STATE_TABLE} WHERE name = 'sales'"
+            ).fetchone()
+            high_water, fingerprint = state if state else (None, None)
+            recreated = high_water is not None and (
+                high_water > max_smind or _sales_fingerprint(cursor, high_water) != fingerprint
+            )
+
+            if high_water == max_smind and not recreated:
+                return {'mode': 'fresh', 'since': None, 'rows': 0}
+            if high_water is None or recreated:
+                mode, since = 'full', None
+                cursor.execute(f'DELETE FROM {INSIGHTS_TABLE}')
+            else:
+                mode = 'incremental'
+                since = cursor.execute(
+                    f'SELECT MIN({PERIOD_SQL}) FROM sales WHERE smind > ?', (high_water,)
+                ).fetchone()[0]
+                cursor.execute(f'DELETE FROM {INSIGHTS_TABLE} WHERE {PERIOD_SQL} >= ?', (since,))
+
+            insights = compute_insights(_read_quarterly(conn, since), since)
+            cursor.executemany(
+                f"INSERT INTO {INSIGHTS_TABLE} ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                # NaN becomes NULL; numpy scalars become Python numbers.
+                (
+                    tuple(None if value != value else value for value in row)
+                    for row in insights.astype(object).itertuples(index=False, name=None)
+                ),
+            )
+            cursor.execute(
+                f"INSERT OR REPLACE INTO {STATE_TABLE} (name, high_water, fingerprint) VALUES ('sales', ?, ?)",
+                (max_smind, _sales_fingerprint(cursor, max_smind)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    logger.info("Refreshed insights (%s from period %s): %d rows", mode, since, len(insights))
+    return {'mode': mode, 'since': since, 'rows': len(insights)}
+
+
+def _insights_cover_sales(pool: SQLiteConnectionPool) -> bool:
+    with pool.connection() as conn:
+        try:
+            state = conn.execute(f"SELECT high_water FROM {STATE_TABLE} WHERE name = 'sales'").fetchone()
+        except sqlite3.OperationalError:
+            return False  # Never refreshed.
+        max_smind = conn.execute('SELECT COALESCE(MAX(smind), 0) FROM sales').fetchone()[0]
+    return state is not None and state[0] == max_smind
+
+
+_fresh = DataVersionMemo(_insights_cover_sales)
+
+
+def insights_fresh(pool: Optional[SQLiteConnectionPool] = None) -> bool:
+    """
+    Return whether `insights_quarterly` covers every row of `sales`.
+
+    Only reads: `refresh_insights()` runs at startup
+    (tools.startup.refresh_summaries) and from `python -m tools.insights`.
+    """
+    return _fresh.get(pool or get_pool())
+
+
+def _fmt(value: Optional[float], unit: str = '%') -> str:
+    return 'n/a' if value is None else f"{value:+.1f}{unit}"
+
+
+def _format_row(row: sqlite3.Row, label: str) -> str:
+    return (f"{label}: revenue ${row['revenue_usd'] / 1e6:,.1f}M, QoQ {_fmt(row['revenue_qoq_pct'])}, "
+            f"YoY {_fmt(row['revenue_yoy_pct'])} (units {_fmt(row['units_yoy_pct'])}), "
+            f"share {row['share_pct'] or 0:.1f}% ({_fmt(row['share_change_pts'], ' pts')} YoY), "
+            f"trend {_fmt(row['slope_pct'], '%/qtr')}, anomaly z {_fmt(row['anomaly_z'], '')}")
+
+
+def lookup_insights(product: str = "", region: str = "", top_n: int = 5,
+                    pool: Optional[SQLiteConnectionPool] = None) -> str:
+    """
+    Summarize the stored insights.
+
+    Args:
+        product (str): Product name; empty for an overview of every product
+        region (str): Region name; empty for all regions together
+        top_n (int): Products listed per overview section
+        pool (Optional[SQLiteConnectionPool]): Pool to read from (default shared pool)
+
+    Returns:
+        str: The latest quarter's decliners, growers, share shifts and the
+        largest anomalies, or one product's quarterly history and regional split
+    """
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        try:
+            latest = cursor.execute(
+                f'SELECT year, quarter FROM {INSIGHTS_TABLE} ORDER BY year DESC, quarter DESC LIMIT 1'
+            ).fetchone()
+            if latest is None:
+                return "❌ No insights available: the sales table is empty."
+            regions = [row[0] for row in cursor.execute(f'SELECT DISTINCT region FROM {INSIGHTS_TABLE}')]
+            region_name = ALL_REGIONS if not region else next(
+                (name for name in regions if name.lower() == region.strip().lower()), None
+            )
+            if region_name is None:
+                return f"❌ Unknown region '{region}'. Known regions: {', '.join(sorted(regions))}"
+            names = dict(cursor.execute('SELECT product_id, product_name FROM products').fetchall())
+
+            if product:
+                product_id = next(
+                    (pid for pid, name in names.items() if name.lower() == product.strip().lower()), None
+                )
+                if product_id is None:
+                    return f"❌ Unknown product '{product}'."
+                return _product_report(cursor, product_id, names[product_id], region_name, latest)
+            return _overview(cursor, names, region_name, latest, top_n)
+        except sqlite3.OperationalError as e:
+            return f"❌ Insights are not available ({e}). Use generate_and_execute_sql instead."
+
+
+def _overview(cursor: sqlite3.Cursor, names: Dict[int, str], region: str, latest, top_n: int) -> str:
+    year, quarter = latest
+    scope = 'all regions' if region == ALL_REGIONS else region
+    lines = [f"📈 Sales insights for {year} {quarter} ({scope}; growth is in revenue, share is of {scope} revenue)"]
+    sections = [
+        ("Declining (YoY)", "revenue_yoy_pct < 0", "revenue_yoy_pct ASC"),
+        ("Growing (YoY)", "revenue_yoy_pct > 0", "revenue_yoy_pct DESC"),
+        ("Losing share", "share_change_pts < 0", "share_change_pts ASC"),
+        ("Gaining share", "share_change_pts > 0", "share_change_pts DESC"),
+    ]
+    for title, condition, order in sections:
+        rows = cursor.execute(f'''
+            SELECT * FROM {INSIGHTS_TABLE}
+            WHERE region = ? AND year = ? AND quarter = ? AND {condition}
+            ORDER BY {order} LIMIT ?
+        ''', (region, year, quarter, top_n)).fetchall()
+        lines.append(f"\n{title}:")
+        lines.extend(f"  - {_format_row(row, names.get(row['product_id'], row['product_id']))}" for row in rows)
+        if not rows:
+            lines.append("  (none)")
+
+    anomalies = cursor.execute(f'''
+        SELECT * FROM {INSIGHTS_TABLE}
+        WHERE region = ? AND ABS(anomaly_z) >= ?
+        ORDER BY ABS(anomaly_z) DESC LIMIT ?
+    ''', (region, ANOMALY_Z, top_n)).fetchall()
+    lines.append(f"\nLargest anomalies (|z| >= {ANOMALY_Z:g} vs the previous {HISTORY_QUARTERS} quarters, any quarter):")
+    lines.extend(
+        f"  - {names.get(row['product_id'], row['product_id'])} {row['year']} {row['quarter']}: "
+        f"z {row['anomaly_z']:+.1f}, QoQ {_fmt(row['revenue_qoq_pct'])}"
+        for row in anomalies
+    )
+    if not anomalies:
+        lines.append("  (none)")
+    return "\n".join(lines)
+
+
+def _product_report(cursor: sqlite3.Cursor, product_id: int, name: str, region: str, latest) -> str:
+    scope = 'all regions' if region == ALL_REGIONS else region
+    history = cursor.execute(f'''
+        SELECT * FROM {INSIGHTS_TABLE}
+        WHERE product_id = ? AND region = ?
+        ORDER BY year, quarter
+    ''', (product_id, region)).fetchall()
+    lines = [f"📈 {name} insights ({scope}), quarter by quarter:"]
+    lines.extend(f"  - {_format_row(row, '%s %s' % (row['year'], row['quarter']))}" for row in history)
+
+    if region == ALL_REGIONS:
+        regional = cursor.execute(f'''
+            SELECT * FROM {INSIGHTS_TABLE}
+            WHERE product_id = ? AND region != ? AND year = ? AND quarter = ?
+            ORDER BY revenue_yoy_pct
+        ''', (product_id, ALL_REGIONS, *latest)).fetchall()
+        lines.append(f"\nBy region in {latest[0]} {latest[1]}:")
+        lines.extend(f"  - {_format_row(row, row['region'])}" for row in regional)
+    return "\n".join(lines)
+
+
+@tool
+def get_sales_insights(product: str = "", region: str = "", top_n: int = 5) -> str:
+    """Precomputed sales insights: per product QoQ/YoY revenue growth, share of revenue and its YoY shift, trend slope and anomaly scores. With no product, lists the latest quarter's decliners, growers, share losers/gainers and the largest anomalies; with a product (e.g. "Cosentyx"), its quarterly history and regional split. Optionally limit to one region (e.g. "Europe"). Use this first for "which brand is declining/growing" questions."""
+    print(f"🔧 Tool Called: get_sales_insights (product='{product}', region='{region}')")
+    fresh = insights_fresh()
+    current_span().set(fresh=fresh)
+    result = lookup_insights(product, region, top_n)
+    if not fresh and not result.startswith("❌"):
+        print("⚠️ Insights are behind the sales table until the next refresh; serving the stored ones")
+        result = "⚠️ Note: these insights predate the latest sales rows.\n" + result
+    print(f"✅ Insights retrieved: {len(result.splitlines())} lines")
+    return result
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    print(refresh_insights(get_pool().db_path))
+    print(lookup_insights(*sys.argv[1:3]))
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import cache_path
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+CHUNK_CHARS = 1500
+
+_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for', 'from', 'how',
+    'in', 'is', 'it', 'of', 'on', 'or', 'should', 'that', 'the', 'this', 'to', 'what', 'when',
+    'which', 'who', 'with', 'i', 'me', 'my', 'you', 'your', 'about', 'tell',
+}
+
+
+def _tokenize(text: str) -> List[str]:
+    return [t for t in re.findall(r'[a-z0-9]+', text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _chunk_page(page_number: int, text: str) -> List[Dict[str, Any]]:
+    """Split one page into roughly CHUNK_CHARS-sized chunks along paragraph breaks."""
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', text) if p.strip()]
+    chunks, current = [], ''
+    for paragraph in paragraphs:
+        if current and len(current) + len(paragraph) > CHUNK_CHARS:
+            chunks.append(current)
+            current = ''
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+        while len(current) > CHUNK_CHARS * 2:
+            chunks.append(current[:CHUNK_CHARS])
+            current = current[CHUNK_CHARS:]
+    if current:
+        chunks.append(current)
+    return [{"page": page_number, "text": chunk} for chunk in chunks]
+
+
+def _extract_pages(path: str) -> Optional[List[str]]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        logger.warning("pypdf not installed; PDF questions will send the full document")
+        return None
+    reader = PdfReader(path)
+    return [page.extract_text() or '' for page in reader.pages]
+
+
+class PDFIndex:
+    """
+    BM25 index over the page-level chunks of one PDF.
+
+    Attributes:
+        sha256 (str): Hash of the PDF the index was built from
+        page_count (int): Number of pages in the PDF
+        chunks (List[dict]): {'id', 'page', 'text', 'terms'} per chunk
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, sha256: str, page_count: int, chunks: List[Dict[str, Any]]):
+        self.sha256 = sha256
+        self.page_count = page_count
+        self.chunks = chunks
+
+        self._doc_freq: Counter = Counter()
+        for chunk in chunks:
+            self._doc_freq.update(chunk["terms"].keys())
+        lengths = [sum(chunk["terms"].values()) for chunk in chunks]
+        self._lengths = lengths
+        self._avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, path: str, sha256: str) -> Optional['PDFIndex']:
+        pages = _extract_pages(path)
+        if pages is None:
+            return None
+        chunks = []
+        for number, text in enumerate(pages, start=1):
+            for chunk in _chunk_page(number, text):
+                chunk["id"] = len(chunks)
+                chunk["terms"] = dict(Counter(_tokenize(chunk["text"])))
+                chunks.append(chunk)
+        return cls(sha256, len(pages), chunks)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {"version": INDEX_VERSION, "sha256": self.sha256, "page_count": self.page_count, "chunks": self.chunks}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> Optional['PDFIndex']:
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(data["sha256"], data["page_count"], data["chunks"])
+
+    def search(self, question: str, k: int = 4) -> Tuple[List[Tuple[float, Dict[str, Any]]], float]:
+        """
+        Rank chunks for `question`.
+
+        Returns:
+            tuple: (top-k (score, chunk) pairs, fraction of query terms found in the document)
+        """
+        terms = set(_tokenize(question))
+        if not terms or not self.chunks:
+            return [], 0.0
+
+        n = len(self.chunks)
+        idf = {
+            term: math.log(1 + (n - self._doc_freq[term] + 0.5) / (self._doc_freq[term] + 0.5))
+            for term in terms
+        }
+        scored = []
+        for chunk, length in zip(self.chunks, self._lengths):
+            score = 0.0
+            for term in terms:
+                tf = chunk["terms"].get(term, 0)
+                if tf:
+                    norm = self.K1 * (1 - self.B + self.B * length / (self._avg_length or 1))
+                    score += idf[term] * tf * (self.K1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, chunk))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        coverage = sum(1 for term in terms if self._doc_freq[term]) / len(terms)
+        return scored[:k], coverage
+
+
+_indexes: Dict[Tuple[str, int, int], Optional[PDFIndex]] = {}
+_indexes_lock = threading.Lock()
+_hashes: Dict[Tuple[str, int, int], str] = {}
+
+
+def _memo_key(path: str) -> Tuple[str, int, int]:
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+def pdf_sha256(path: str) -> str:
+    """SHA-256 of a PDF, recomputed only when its size or mtime changes."""
+    memo_key = _memo_key(path)
+    digest = _hashes.get(memo_key)
+    if digest is None:
+        digest = _hashes[memo_key] = file_sha256(path)
+    return digest
+
+
+def get_pdf_index(path: str) -> Optional[PDFIndex]:
+    """
+    Return the index for `path`, building it once per PDF content hash.
+
+    Extracted chunks are cached on disk under the PDF's SHA-256, so the index
+    is only rebuilt when the PDF changes. Returns None if text extraction is
+    unavailable.
+    """
+    memo_key = _memo_key(path)
+    with _indexes_lock:
+        if memo_key in _indexes:
+            return _indexes[memo_key]
+
+        sha256 = pdf_sha256(path)
+        index_file = cache_path(os.path.join('pdf_index', f"{sha256}.json"))
+        index = None
+        if os.path.exists(index_file):
+            try:
+                with open(index_file, 'r', encoding='utf-8') as f:
+                    index = PDFIndex.from_json(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Ignoring unreadable PDF index %s: %s", index_file, e)
+
+        if index is None:
+            print(f"📚 Indexing {os.path.basename(path)}...")
+            index = PDFIndex.build(path, sha256)
+            if index is not None:
+                os.makedirs(os.path.dirname(index_file), exist_ok=True)
+                with open(index_file, 'w', encoding='utf-8') as f:
+                    json.dump(index.to_json(), f)
+
+        _indexes[memo_key] = index
+        return index
+
+
+def retrieve(path: str, question: str, k: int = 4, min_coverage: float = 0.5) -> Optional[List[Dict[str, Any]]]:
+    """
+    Return the top-k chunks of `path` for `question`, or None when retrieval
+    is not confident enough and the full document should be sent instead.
+    """
+    index = get_pdf_index(path)
+    if index is None:
+        return None
+    results, coverage = index.search(question, k=k)
+    if not results or coverage < min_coverage:
+        return None
+    # Present excerpts in document order.
+    return sorted((chunk for _, chunk in results), key=lambda chunk: chunk["id"])
+
+
+def index_directory(directory: str = 'data') -> Dict[str, Optional[PDFIndex]]:
+    """Ingest every PDF in `directory` ahead of time."""
+    indexes = {}
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith('.pdf'):
+            indexes[name] = get_pdf_index(os.path.join(directory, name))
+    return indexes
+
+
+if __name__ == "__main__":
+    for name, index in index_directory().items():
+        if index is None:
+            print(f"{name}: text extraction unavailable")
+        else:
+            print(f"{name}: {index.page_count} pages, {len(index.chunks)} chunks")
@@ -0,0 +1,296 @@
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .db_pool import SQLiteConnectionPool, get_pool
+from .rollups import rewrite_query
+from .schema_cache import get_schema_cache
+
+FAST_PATH_ENABLED = os.getenv('PHARMA_SQL_FAST_PATH', '1') != '0'
+
+METRIC_WORDS = {
+    'units_sold': {'unit', 'units', 'volume', 'volumes'},
+    'revenue_usd': {'revenue', 'revenues', 'dollars', 'usd', 'turnover'},
+}
+DIMENSION_WORDS = {
+    'product': {'product', 'products', 'brand', 'brands'},
+    'region': {'region', 'regions', 'regional'},
+    'country': {'country', 'countries', 'market', 'markets'},
+    'quarter': {'quarter', 'quarters', 'quarterly'},
+}
+YEAR_WORDS = {'year', 'years', 'yearly', 'annual', 'annually'}
+YOY_WORDS = {'yoy', 'growth', 'change', 'changes', 'changed', 'grow', 'grew'}
+# Words that carry no intent of their own. Anything outside these, the
+# metric/dimension words and the database vocabularies sends the question
+# to the LLM instead.
+NEUTRAL_WORDS = {
+    'a', 'an', 'the', 'of', 'for', 'in', 'on', 'by', 'per', 'each', 'every', 'and', 'or', 'to', 'from',
+    'between', 'across', 'over', 'during', 'with', 'vs', 'versus', 'compared', 'split', 'break', 'broken',
+    'down', 'show', 'me', 'give', 'get', 'list', 'what', 'whats', 'was', 'were', 'is', 'are', 'be', 'how',
+    'much', 'many', 'did', 'do', 'does', 'our', 'we', 'all', 'please', 'total', 'totals', 'overall',
+    'sales', 'sale', 'sold', 'sell', 'selling', 'make', 'made', 'generate', 'generated', 'trend', 'trends',
+    'development', 'develop', 'developed', 'evolution', 'evolve', 'evolved', 'performance', 'perform',
+    'performed', 'numbers', 'figures', 'data', 'table', 'can', 'you', 'i', 'want', 'see', 's', 'its',
+    'their', 'net', 'amount', 'value', 'values', 'level', 'levels',
+}
+
+_DIMENSION_COLUMNS = {
+    'product': 'p.product_name',
+    'region': 's.region',
+    'country': 's.country',
+    'year': 's.year',
+    'quarter': 's.quarter',
+}
+
+
+@dataclass
+class TemplateMatch:
+    """
+    A question recognised as one of the fixed query shapes.
+
+    Attributes:
+        sql (str): Parameterized SQL (`?` placeholders)
+        params (Tuple): Values for the placeholders
+        intent (str): Short description of the recognised shape
+        seconds (float): Time spent matching and building the SQL
+    """
+
+    sql: str
+    params: Tuple
+    intent: str
+    seconds: float = 0.0
+
+    def rendered_sql(self) -> str:
+        """The SQL with its parameters inlined, for display and cache keys."""
+        values = iter(self.params)
+        return re.sub(r'\?', lambda _: _literal(next(values)), self.sql)
+
+
+def _literal(value: Any) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _tokens(text: str) -> List[str]:
+    text = re.sub(r'year[\s-]+(?:over|on)[\s-]+year', ' yoy ', text.lower())
+    return re.findall(r'[a-z0-9]+', text)
+
+
+@dataclass
+class _Vocabulary:
+    version: Optional[str] = None
+    # First token -> [(phrase tokens, kind, canonical value)], longest phrases first.
+    phrases: Dict[str, List[Tuple[Tuple[str, ...], str, Any]]] = field(default_factory=dict)
+    years: Dict[str, int] = field(default_factory=dict)
+    quarters: Dict[str, str] = field(default_factory=dict)
+
+
+class QueryTemplates:
+    """
+    Recognises common sales questions and builds their SQL without the LLM.
+
+    Supported shapes: units and/or revenue, by any of product, region,
+    country, year and quarter, filtered by named products, regions,
+    countries, years and quarters, optionally with year-over-year change.
+    Product, region, country, year and quarter values come from the
+    database and are reloaded when the schema cache sees new data.
+
+    A question only matches if every word is understood; anything else
+    (top-N, averages, shares, therapeutic areas, ...) falls back to the LLM.
+    """
+
+    def __init__(self, pool: Optional[SQLiteConnectionPool] = None):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._vocabulary = _Vocabulary()
+        self._stats = {"matched": 0, "fallbacks": 0, "match_seconds": 0.0}
+
+    @property
+    def pool(self) -> SQLiteConnectionPool:
+        return self._pool or get_pool()
+
+    def _load_vocabulary(self) -> _Vocabulary:
+        schema_cache = get_schema_cache()
+        tables = schema_cache.get()
+        if self._vocabulary.version == schema_cache.version:
+            return self._vocabulary
+
+        with self._lock:
+            if self._vocabulary.version == schema_cache.version:
+                return self._vocabulary
+            sales_values = tables.get('sales', {}).get('values', {})
+            with self.pool.connection() as conn:
+                products = [row[0] for row in conn.execute("SELECT product_name FROM products")]
+                # Served from idx_sales_region_country without touching the table.
+                markets = conn.execute("SELECT DISTINCT region, country FROM sales").fetchall()
+                years = sales_values.get('year') or [
+                    row[0] for row in conn.execute("SELECT DISTINCT year FROM sales")
+                ]
+                quarters = sales_values.get('quarter') or [
+                    row[0] for row in conn.execute("SELECT DISTINCT quarter FROM sales")
+                ]
+
+            by_phrase = {}
+            for kind, values in (
+                ('product', products),
+                ('region', sorted({region for region, _ in markets if region})),
+                ('country', sorted({country for _, country in markets if country})),
+            ):
+                for value in values:
+                    phrase = tuple(_tokens(str(value)))
+                    if phrase:
+                        by_phrase.setdefault(phrase, (kind, value))
+            phrases: Dict[str, List[Tuple[Tuple[str, ...], str, Any]]] = {}
+            for phrase, (kind, value) in sorted(by_phrase.items(), key=lambda item: -len(item[0])):
+                phrases.setdefault(phrase[0], []).append((phrase, kind, value))
+            self._vocabulary = _Vocabulary(
+                version=schema_cache.version,
+                phrases=phrases,
+                years={str(year): int(year) for year in years if year is not None},
+                quarters={str(quarter).lower(): quarter for quarter in quarters if quarter is not None},
+            )
+            return self._vocabulary
+
+    def _parse(self, question: str, vocabulary: _Vocabulary) -> Optional[Dict[str, Any]]:
+        tokens = _tokens(question)
+        if not tokens:
+            return None
+        filters: Dict[str, List[Any]] = {'product': [], 'region': [], 'country': [], 'year': [], 'quarter': []}
+        words = set()
+
+        i = 0
+        while i < len(tokens):
+            for phrase, kind, value in vocabulary.phrases.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    if value not in filters[kind]:
+                        filters[kind].append(value)
+                    i += len(phrase)
+                    break
+            else:
+                token = tokens[i]
+                if token in vocabulary.years:
+                    filters['year'].append(vocabulary.years[token])
+                elif token in vocabulary.quarters:
+                    filters['quarter'].append(vocabulary.quarters[token])
+                elif re.fullmatch(r'(19|20)\d\d|q[1-4]', token):
+                    return None  # A period the database does not have.
+                else:
+                    words.add(token)
+                i += 1
+
+        known = NEUTRAL_WORDS | YEAR_WORDS | YOY_WORDS
+        for group in list(METRIC_WORDS.values()) + list(DIMENSION_WORDS.values()):
+            known |= group
+        if words - known:
+            return None
+
+        # "between 2022 and 2024" / "from 2022 to 2024" cover the years in between.
+        span = re.search(r'\b(?:between|from)\s+(\d{4})\s+(?:and|to|-)\s+(\d{4})\b', question.lower())
+        if span:
+            low, high = sorted(int(year) for year in span.groups())
+            filters['year'] = [year for year in sorted(vocabulary.years.values()) if low <= year <= high]
+
+        metrics = [metric for metric, group in METRIC_WORDS.items() if words & group] or list(METRIC_WORDS)
+        dimensions = [
+            dimension for dimension in ('product', 'region', 'country')
+            if words & DIMENSION_WORDS[dimension] or len(filters[dimension]) > 1
+        ]
+        dimensions.append('year')
+        if words & DIMENSION_WORDS['quarter'] or len(filters['quarter']) > 1:
+            dimensions.append('quarter')
+        if not words & (set().union(*METRIC_WORDS.values()) | YOY_WORDS | {'sales', 'sale', 'sold'}):
+            return None  # No metric asked for at all, e.g. "list the products".
+        return {
+            'metrics': metrics,
+            'dimensions': dimensions,
+            'filters': {kind: values for kind, values in filters.items() if values},
+            'yoy': bool(words & YOY_WORDS),
+        }
+
+    def _build(self, intent: Dict[str, Any]) -> Tuple[str, Tuple]:
+        metrics, dimensions, filters = intent['metrics'], intent['dimensions'], intent['filters']
+        years = filters.get('year', [])
+        if intent['yoy'] and years:
+            # The earliest requested year needs its predecessor for the comparison.
+            filters = dict(filters, year=sorted(set(years) | {year - 1 for year in years}))
+
+        select = [f"{_DIMENSION_COLUMNS[d]} AS {d if d != 'product' else 'product_name'}" for d in dimensions]
+        select += [f"SUM(s.{metric}) AS {metric}" for metric in metrics]
+        sql = f"SELECT {', '.join(select)} FROM sales s"
+        if 'product' in dimensions or 'product' in filters:
+            sql += " JOIN products p ON s.product_id = p.product_id"
+
+        conditions, params = [], []
+        for kind, values in filters.items():
+            conditions.append(f"{_DIMENSION_COLUMNS[kind]} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        group = ", ".join(_DIMENSION_COLUMNS[d] for d in dimensions)
+        sql += f" GROUP BY {group} ORDER BY {group}"
+
+        if not intent['yoy']:
+            return sql, tuple(params)
+
+        # Same period one year earlier: partition by everything but the year.
+        # The frame is exactly year - 1, so a year without sales gives NULL
+        # instead of comparing with an older year as LAG() would.
+        names = [d if d != 'product' else 'product_name' for d in dimensions]
+        partition = [name for name in names if name != 'year']
+        window = (
+            f"OVER ({'PARTITION BY ' + ', '.join(partition) + ' ' if partition else ''}"
+            "ORDER BY year RANGE BETWEEN 1 PRECEDING AND 1 PRECEDING)"
+        )
+        changes = []
+        for metric in metrics:
+            previous = f"SUM({metric}) {window}"
+            changes.append(f"{metric} - {previous} AS {metric}_yoy_change")
+            changes.append(f"ROUND(100.0 * ({metric} - {previous}) / NULLIF({previous}, 0), 2) AS {metric}_yoy_pct")
+        # The inner aggregate is a plain single SELECT, so it can still be served from a rollup.
+        sql = f"SELECT *, {', '.join(changes)} FROM ({rewrite_query(sql, self.pool)})"
+        if years:
+            sql = f"SELECT * FROM ({sql}) WHERE year IN ({', '.join('?' * len(years))})"
+            params.extend(sorted(years))
+        sql += f" ORDER BY {', '.join(partition + ['year'])}"
+        return sql, tuple(params)
+
+    def match(self, question: str) -> Optional[TemplateMatch]:
+        """Return the SQL for `question` if it fits a known shape, else None."""
+        started = time.perf_counter()
+        intent = self._parse(question, self._load_vocabulary()) if FAST_PATH_ENABLED else None
+        result = None
+        if intent is not None:
+            sql, params = self._build(intent)
+            description = (
+                f"{' and '.join(intent['metrics'])} by {', '.join(intent['dimensions'])}"
+                + (f" where {', '.join(intent['filters'])}" if intent['filters'] else "")
+                + (", YoY" if intent['yoy'] else "")
+            )
+            result = TemplateMatch(sql, params, description)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._stats["matched" if result else "fallbacks"] += 1
+            self._stats["match_seconds"] += elapsed
+        if result:
+            result.seconds = elapsed
+        return result
+
+    def stats(self) -> Dict[str, float]:
+        """Fast-path matches, LLM fallbacks and the hit rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        total = stats["matched"] + stats["fallbacks"]
+        stats["hit_rate"] = stats["matched"] / total if total else 0.0
+        return stats
+
+
+_templates = QueryTemplates()
+
+
+def get_query_templates() -> QueryTemplates:
+    """Return the shared query template matcher for the sales database."""
+    return _templates
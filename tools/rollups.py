@@ -0,0 +1,271 @@
+import logging
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .db_pool import DB_PATH, DataVersionMemo, SQLiteConnectionPool, get_pool
+from .schema_cache import get_schema_cache
+
+logger = logging.getLogger(__name__)
+
+MEASURES = ('units_sold', 'revenue_usd')
+STATE_TABLE = 'rollup_state'
+
+# Pre-aggregated summaries of `sales`, from finest to coarsest grain.
+ROLLUPS: Dict[str, Tuple[str, ...]] = {
+    'sales_rollup_product_year_quarter_region_country': ('product_id', 'year', 'quarter', 'region', 'country'),
+    'sales_rollup_product_year_quarter_region': ('product_id', 'year', 'quarter', 'region'),
+    'sales_rollup_product_year_quarter': ('product_id', 'year', 'quarter'),
+    'sales_rollup_product_year_region': ('product_id', 'year', 'region'),
+    'sales_rollup_product_year': ('product_id', 'year'),
+}
+
+_SQL_KEYWORDS = {
+    'where', 'join', 'inner', 'left', 'right', 'full', 'outer', 'cross', 'natural', 'on',
+    'using', 'group', 'order', 'limit', 'having', 'union', 'as',
+}
+
+_refresh_lock = threading.Lock()
+
+
+def _create_rollup(cursor: sqlite3.Cursor, name: str, dims: Tuple[str, ...]) -> None:
+    cursor.execute(f'DROP TABLE IF EXISTS {name}')
+    cursor.execute(f'''
+        CREATE TABLE {name} (
+            {', '.join(dims)},
+            units_sold INTEGER,
+            revenue_usd REAL,
+            row_count INTEGER,
+            PRIMARY KEY ({', '.join(dims)})
+        )
+    ''')
+
+
+def _aggregate_into(cursor: sqlite3.Cursor, name: str, dims: Tuple[str, ...], low: int, high: int) -> None:
+    """Fold sales rows with low < smind <= high into the rollup table."""
+    dim_list = ', '.join(dims)
+    cursor.execute(f'''
+        INSERT INTO {name} ({dim_list}, units_sold, revenue_usd, row_count)
+        SELECT {dim_list}, SUM(units_sold), SUM(revenue_usd), COUNT(*)
+        FROM sales
+        WHERE smind > ? AND smind <= ?
+        GROUP BY {dim_list}
+        ON CONFLICT ({dim_list}) DO UPDATE SET
+            units_sold = units_sold + excluded.units_sold,
+            revenue_usd = revenue_usd + excluded.revenue_usd,
+            row_count = row_count + excluded.row_count
+    ''', (low, high))
+
+
+def refresh_rollups(db_path: str = DB_PATH) -> Dict[str, Dict[str, int]]:
+    """
+    Bring every rollup table up to date with `sales`.
+
+    Rollups track the highest `smind` they have absorbed, so new sales rows
+    are folded in incrementally. A rollup is rebuilt from scratch when it is
+    missing or when `sales` was recreated (its max `smind` went backwards).
+    Updates and deletes of existing sales rows are not tracked.
+
+    Returns:
+        dict: Per rollup, the mode ('full', 'incremental' or 'fresh') and row count
+    """
+    summary = {}
+    with _refresh_lock:
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                    name TEXT PRIMARY KEY,
+                    high_water INTEGER,
+                    row_count INTEGER
+                )
+            ''')
+            max_smind = cursor.execute('SELECT COALESCE(MAX(smind), 0) FROM sales').fetchone()[0]
+            existing = {
+                row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            }
+            state = dict(cursor.execute(f'SELECT name, high_water FROM {STATE_TABLE}').fetchall())
+
+            for name, dims in ROLLUPS.items():
+                high_water = state.get(name)
+                if name not in existing or high_water is None or high_water > max_smind:
+                    _create_rollup(cursor, name, dims)
+                    _aggregate_into(cursor, name, dims, 0, max_smind)
+                    mode = 'full'
+                elif high_water < max_smind:
+                    _aggregate_into(cursor, name, dims, high_water, max_smind)
+                    mode = 'incremental'
+                else:
+                    mode = 'fresh'
+
+                if mode != 'fresh':
+                    row_count = cursor.execute(f'SELECT COUNT(*) FROM {name}').fetchone()[0]
+                    cursor.execute(
+                        f'INSERT OR REPLACE INTO {STATE_TABLE} (name, high_water, row_count) VALUES (?, ?, ?)',
+                        (name, max_smind, row_count),
+                    )
+                    summary[name] = {'mode': mode, 'rows': row_count}
+                else:
+                    summary[name] = {'mode': mode, 'rows': None}
+            conn.commit()
+        finally:
+            conn.close()
+
+    refreshed = {name: info for name, info in summary.items() if info['mode'] != 'fresh'}
+    if refreshed:
+        logger.info("Refreshed rollups: %s", refreshed)
+    return summary
+
+
+def _rollup_state(pool: SQLiteConnectionPool) -> Optional[Tuple[int, Dict[str, int]]]:
+    with pool.connection() as conn:
+        has_state = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (STATE_TABLE,)
+        ).fetchone()
+        if not has_state:
+            return None
+        max_smind = conn.execute('SELECT COALESCE(MAX(smind), 0) FROM sales').fetchone()[0]
+        rows = conn.execute(f'SELECT name, high_water, row_count FROM {STATE_TABLE}').fetchall()
+
+    if len(rows) < len(ROLLUPS) or any(high_water != max_smind for _, high_water, _ in rows):
+        return None
+    return max_smind, {name: row_count for name, _, row_count in rows}
+
+
+# (max smind, rollup row counts) while the rollups are fresh, else None.
+_state = DataVersionMemo(_rollup_state)
+
+
+def _mask_literals(sql: str) -> Tuple[str, List[str]]:
+    literals = []
+
+    def _stash(match):
+        literals.append(match.group(0))
+        return f"'{len(literals) - 1}'"
+
+    return re.sub(r"'(?:[^']|'')*'", _stash, sql), literals
+
+
+def _unmask_literals(sql: str, literals: List[str]) -> str:
+    return re.sub(r"'(\d+)'", lambda m: literals[int(m.group(1))], sql)
+
+
+def _table_refs(sql: str) -> List[Tuple[re.Match, str, Optional[str]]]:
+    refs = []
+    keywords = '|'.join(sorted(_SQL_KEYWORDS))
+    pattern = rf'\b(from|join)\s+"?(\w+)"?(?:\s+(?:as\s+)?(?!(?:{keywords})\b)(\w+))?'
+    for match in re.finditer(pattern, sql, flags=re.IGNORECASE):
+        refs.append((match, match.group(2).lower(), match.group(3)))
+    return refs
+
+
+def _choose_rollup(sql: str, columns: Dict[str, List[str]], row_counts: Dict[str, int]) -> Optional[Tuple[str, re.Match, str]]:
+    lowered = sql.lower()
+    if ';' in sql or len(re.findall(r'\bselect\b', lowered)) != 1:
+        return None
+    if re.search(r'\b(with|union|intersect|except|over|avg|total|group_concat)\b', lowered):
+        return None
+    if re.search(r'select\s+(distinct\s+)?\*|\w\.\*|,\s*\*', lowered):
+        return None
+    if re.search(r'\bcount\s*\(\s*(?!\*|1\s*\)|distinct\b)', lowered):
+        return None
+
+    refs = _table_refs(sql)
+    sales_refs = [ref for ref in refs if ref[1] == 'sales']
+    if len(sales_refs) != 1 or any(ref[1] not in ('sales', 'products') for ref in refs):
+        return None
+    from_clause = re.search(r'\bfrom\b(.*?)(\bwhere\b|\bgroup\b|\border\b|\blimit\b|\bhaving\b|$)', lowered, re.S)
+    if from_clause and ',' in from_clause.group(1):
+        return None
+
+    is_aggregate = (
+        re.search(r'\bgroup\s+by\b|\bsum\s*\(|\bcount\s*\(|\bmin\s*\(|\bmax\s*\(', lowered)
+        or re.search(r'\bselect\s+distinct\b', lowered)
+    )
+    if not is_aggregate:
+        return None
+
+    match, _, sales_alias = sales_refs[0]
+    sales_names = {'sales'} | ({sales_alias.lower()} if sales_alias else set())
+    product_names = {'products'} | {
+        alias.lower() for _, table, alias in refs if table == 'products' and alias
+    }
+    sales_columns = set(columns.get('sales', []))
+    select_aliases = {a.lower() for a in re.findall(r'\bas\s+(\w+)', sql, flags=re.IGNORECASE)}
+
+    needed = set()
+    for ref in re.finditer(r'(?:\b(\w+)\s*\.\s*)?\b(\w+)\b', sql):
+        qualifier, name = ref.group(1), ref.group(2).lower()
+        if qualifier and qualifier.lower() in product_names:
+            continue
+        if qualifier and qualifier.lower() not in sales_names:
+            continue
+        if name not in sales_columns:
+            continue
+        if not qualifier and name in select_aliases and name not in MEASURES:
+            continue
+        if not qualifier and re.search(r'\bas\s+$', lowered[max(0, ref.start() - 8):ref.start()]):
+            continue  # The alias in "SUM(revenue_usd) AS revenue_usd"
+
+        if name in MEASURES:
+            before = lowered[:ref.start()]
+            after = lowered[ref.end():]
+            if not re.search(r'\bsum\s*\(\s*$', before) or not re.match(r'\s*\)', after):
+                return None
+            continue
+        needed.add(name)
+
+    candidates = [
+        name for name, dims in ROLLUPS.items() if needed <= set(dims) and name in row_counts
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda name: row_counts[name]), match, sales_alias or 'sales'
+
+
+def rewrite_query(sql_query: str, pool: Optional[SQLiteConnectionPool] = None) -> str:
+    """
+    Rewrite an aggregate query over `sales` to read the smallest rollup that answers it.
+
+    Only single-SELECT queries whose measures appear inside SUM() (and whose
+    other `sales` columns are all rollup dimensions) are rewritten; anything
+    else is returned unchanged. So are all queries while the rollups miss
+    sales rows: this only reads, and the rollups are brought up to date by
+    `refresh_rollups()` at startup (tools.startup.refresh_summaries) or
+    from `python -m tools.rollups`.
+    """
+    state = _state.get(pool or get_pool())
+    if state is None:
+        return sql_query
+    _, row_counts = state
+
+    columns = {
+        table: [col['name'] for col in info['columns']]
+        for table, info in get_schema_cache().get().items()
+    }
+    masked, literals = _mask_literals(sql_query.strip().rstrip(';'))
+    choice = _choose_rollup(masked, columns, row_counts)
+    if choice is None:
+        return sql_query
+
+    rollup, match, alias = choice
+    rewritten = (
+        masked[:match.start()]
+        + f"{match.group(1)} {rollup} AS {alias}"
+        + masked[match.end():]
+    )
+    rewritten = re.sub(
+        r'\bcount\s*\(\s*(\*|1)\s*\)', f'SUM({alias}.row_count)', rewritten, flags=re.IGNORECASE
+    )
+    rewritten = _unmask_literals(rewritten, literals)
+
+    logger.info("Rewrote query to use %s: %s", rollup, rewritten)
+    print(f"🧮 Query rewritten to use rollup {rollup} ({row_counts[rollup]} rows)")
+    return rewritten
+
+
+if __name__ == "__main__":
+    for name, info in refresh_rollups().items():
+        print(f"{name}: {info['mode']} ({info['rows']} rows)")
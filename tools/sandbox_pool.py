@@ -0,0 +1,280 @@
+import atexit
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from .tracing import span, traced
+
+logger = logging.getLogger(__name__)
+
+AGENTCORE_REGION = 'us-west-2'
+
+
+def _default_client_factory(region: str = AGENTCORE_REGION):
+    from bedrock_agentcore.tools.code_interpreter_client import CodeInterpreter
+    return CodeInterpreter(region)
+
+
+class SandboxSession:
+    """A started CodeInterpreter session plus the files it is known to hold."""
+
+    def __init__(self, client, session_id: Optional[str]):
+        self.client = client
+        self.session_id = session_id
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+        self.files: Dict[str, str] = {}
+
+    def invoke(self, tool_name: str, arguments: Dict[str, Any]):
+        return self.client.invoke(tool_name, arguments)
+
+
+class SandboxSessionPool:
+    """
+    A pool of pre-started CodeInterpreter sessions.
+
+    Sessions are reused across tool calls, checked with a cheap `listFiles`
+    call when they have been idle for a while, and stopped after
+    `idle_timeout` seconds without use. Uploads are content-addressed per
+    session, so an unchanged data file is not sent again.
+
+    Attributes:
+        client_factory (Callable): Returns a new, unstarted interpreter client;
+            swap it for a local fake in tests and benchmarks
+        max_size (int): Maximum number of concurrent sessions
+        idle_timeout (float): Seconds before an idle session is stopped
+        health_check_after (float): Idle seconds after which a session is probed
+    """
+
+    def __init__(
+        self,
+        client_factory: Optional[Callable[[], Any]] = None,
+        max_size: int = 4,
+        idle_timeout: float = 600.0,
+        health_check_after: float = 60.0,
+        checkout_timeout: float = 120.0,
+    ):
+        self.client_factory = client_factory or _default_client_factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: List[SandboxSession] = []
+        self._open_count = 0
+        self._cond = threading.Condition()
+        self._reaper = None
+        self._closed = threading.Event()
+        self._stats = {
+            "sessions_started": 0,
+            "sessions_stopped": 0,
+            "checkouts": 0,
+            "health_check_failures": 0,
+            "uploads": 0,
+            "uploads_skipped": 0,
+        }
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._cond:
+            self._stats[name] += value
+
+    @traced('sandbox.start')
+    def _start_session(self) -> SandboxSession:
+        client = self.client_factory()
+        session_id = client.start()
+        self._count("sessions_started")
+        self._ensure_reaper()
+        return SandboxSession(client, session_id)
+
+    def _stop_session(self, session: SandboxSession) -> None:
+        try:
+            session.client.stop()
+        except Exception as e:
+            logger.warning("Error stopping sandbox session %s: %s", session.session_id, e)
+        self._count("sessions_stopped")
+
+    def _is_healthy(self, session: SandboxSession) -> bool:
+        if time.monotonic() - session.last_checked < self.health_check_after:
+            return True
+        try:
+            response = session.invoke("listFiles", {"path": ""})
+            for _ in response["stream"]:
+                break
+        except Exception as e:
+            logger.info("Sandbox session %s failed health check: %s", session.session_id, e)
+            self._count("health_check_failures")
+            return False
+        session.last_checked = time.monotonic()
+        return True
+
+    def prewarm(self, count: int = 1) -> None:
+        """Start up to `count` sessions ahead of the first request."""
+        started = []
+        with self._cond:
+            count = min(count, self.max_size - self._open_count)
+            self._open_count += max(count, 0)
+        try:
+            for _ in range(count):
+                started.append(self._start_session())
+        finally:
+            with self._cond:
+                self._open_count -= count - len(started)
+                self._idle.extend(started)
+                self._cond.notify_all()
+
+    @traced('sandbox.acquire')
+    def acquire(self) -> SandboxSession:
+        """Check out a healthy session, starting one if the pool has room."""
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._open_count >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"No sandbox session available after {self.checkout_timeout}s"
+                        )
+                    self._cond.wait(remaining)
+                session = self._idle.pop() if self._idle else None
+                if session is None:
+                    self._open_count += 1
+                self._stats["checkouts"] += 1
+
+            if session is None:
+                try:
+                    return self._start_session()
+                except Exception:
+                    with self._cond:
+                        self._open_count -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(session):
+                return session
+            self._discard(session)
+
+    def release(self, session: SandboxSession, healthy: bool = True) -> None:
+        """Return a session to the pool, or stop it if it is broken."""
+        if not healthy:
+            self._discard(session)
+            return
+        session.last_used = time.monotonic()
+        with self._cond:
+            self._idle.append(session)
+            self._cond.notify()
+
+    def _discard(self, session: SandboxSession) -> None:
+        self._stop_session(session)
+        with self._cond:
+            self._open_count -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def session(self):
+        """Context manager that checks a session out and back in."""
+        session = self.acquire()
+        try:
+            yield session
+        except BaseException:
+            self.release(session, healthy=False)
+            raise
+        else:
+            self.release(session)
+
+    def upload(self, session: SandboxSession, entries: List[Dict[str, Any]]):
+        """
+        Write files to the sandbox, skipping those it already holds.
+
+        Args:
+            session: Session to upload to
+            entries: `writeFiles` entries ({"path", "text"} or {"path", "blob"})
+
+        Returns:
+            The `writeFiles` response, or None if every file was already present
+        """
+        pending = []
+        for entry in entries:
+            content = entry.get("blob")
+            if content is None:
+                content = entry.get("text", "").encode("utf-8")
+            digest = hashlib.sha256(content).hexdigest()
+            if session.files.get(entry["path"]) == digest:
+                self._count("uploads_skipped")
+                continue
+            pending.append((entry, digest))
+
+        if not pending:
+            return None
+
+        size = sum(len(entry.get("blob") or entry.get("text", "")) for entry, _ in pending)
+        with span('sandbox.upload', files=len(pending), bytes=size):
+            response = session.invoke("writeFiles", {"content": [entry for entry, _ in pending]})
+        for entry, digest in pending:
+            session.files[entry["path"]] = digest
+        self._count("uploads", len(pending))
+        return response
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap_loop, name="sandbox-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_timeout / 4))
+        while not self._closed.wait(interval):
+            self.reap_idle()
+
+    def reap_idle(self) -> int:
+        """Stop sessions idle for longer than `idle_timeout`. Returns how many were stopped."""
+        now = time.monotonic()
+        with self._cond:
+            expired = [s for s in self._idle if now - s.last_used > self.idle_timeout]
+            self._idle = [s for s in self._idle if s not in expired]
+        for session in expired:
+            self._discard(session)
+        return len(expired)
+
+    def close(self) -> None:
+        """Stop all idle sessions and the reaper thread."""
+        self._closed.set()
+        with self._cond:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            self._discard(session)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open_count
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open_count - len(self._idle)
+            return stats
+
+
+_pool: Optional[SandboxSessionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxSessionPool:
+    """Return the shared sandbox session pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxSessionPool(
+                max_size=int(os.getenv('AGENTCORE_POOL_SIZE', '4')),
+                idle_timeout=float(os.getenv('AGENTCORE_IDLE_TIMEOUT', '600')),
+            )
+            atexit.register(_pool.close)
+        return _pool
+
+
+def set_sandbox_pool(pool: SandboxSessionPool) -> None:
+    """Replace the shared pool, e.g. with one backed by a local fake interpreter."""
+    global _pool
+    with _pool_lock:
+        _pool = pool
@@ -0,0 +1,221 @@
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from .db_pool import SQLiteConnectionPool, get_pool
+
+# Bookkeeping tables that are not meant to be queried by generated SQL.
+INTERNAL_TABLE_PREFIXES = ('sqlite_', 'sales_rollup_', 'rollup_', 'insights_')
+
+
+class SchemaCache:
+    """
+    Versioned cache of the sales database schema for NL-to-SQL prompts.
+
+    The structural part (columns, types, foreign keys) is rebuilt only when
+    `PRAGMA schema_version` changes; the data-dependent part (row counts and
+    value lists for low-cardinality columns) only when the pool's data
+    version changes. Row counts and cardinalities come from sqlite_stat1
+    where ANALYZE has run, and value lists from a bounded sample of rows
+    spread over the table, so no statistic needs a full table scan.
+
+    Attributes:
+        max_distinct (int): Columns with more distinct values than this are
+            not enumerated in the prompt
+        sample_rows (int): Rows read per table to collect value lists
+    """
+
+    MAX_DISTINCT = 25
+    SAMPLE_ROWS = 5000
+
+    def __init__(self, pool: Optional[SQLiteConnectionPool] = None, max_distinct: int = MAX_DISTINCT,
+                 sample_rows: int = SAMPLE_ROWS):
+        self._pool = pool
+        self.max_distinct = max_distinct
+        self.sample_rows = sample_rows
+        self._lock = threading.Lock()
+        self._schema_version = None
+        self._data_version = None
+        self._tables: Dict[str, Dict[str, Any]] = {}
+        self._text = ""
+
+    @property
+    def pool(self) -> SQLiteConnectionPool:
+        return self._pool or get_pool()
+
+    @property
+    def schema_version(self) -> Optional[int]:
+        """`PRAGMA schema_version` of the currently cached structure."""
+        return self._schema_version
+
+    @property
+    def version(self) -> str:
+        """Combined schema/data version of the currently cached description."""
+        return f"{self._schema_version}:{self._data_version}"
+
+    def current_schema_version(self) -> int:
+        """Return `PRAGMA schema_version`, refreshing the cached description first if it is stale."""
+        self._refresh_if_stale()
+        return self._schema_version
+
+    def get(self) -> Dict[str, Dict[str, Any]]:
+        """Return the cached table metadata, refreshing it if the database changed."""
+        self._refresh_if_stale()
+        return self._tables
+
+    def describe(self) -> str:
+        """Return the cached schema rendered as prompt text."""
+        self._refresh_if_stale()
+        return self._text
+
+    def column_types(self) -> Dict[str, str]:
+        """Declared type per column name, for names declared with the same type in every table."""
+        types: Dict[str, Optional[str]] = {}
+        for info in self.get().values():
+            for col in info["columns"]:
+                declared = col["type"].upper()
+                types[col["name"]] = declared if types.get(col["name"], declared) == declared else None
+        return {name: declared for name, declared in types.items() if declared}
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._schema_version = None
+            self._data_version = None
+
+    def _refresh_if_stale(self) -> None:
+        pool = self.pool
+        schema_version = pool.schema_version()
+        data_version = pool.data_version()
+        if schema_version == self._schema_version and data_version == self._data_version:
+            return
+
+        with self._lock:
+            if schema_version != self._schema_version:
+                self._tables = self._load_structure(pool)
+                self._data_version = None
+            if data_version != self._data_version:
+                self._load_statistics(pool, self._tables)
+            self._text = self._render(self._tables)
+            self._schema_version = schema_version
+            self._data_version = data_version
+
+    def _load_structure(self, pool: SQLiteConnectionPool) -> Dict[str, Dict[str, Any]]:
+        tables = {}
+        with pool.connection() as conn:
+            names = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name;"
+            ).fetchall()
+            for (table_name,) in names:
+                if table_name.startswith(INTERNAL_TABLE_PREFIXES):
+                    continue
+                columns = [
+                    {
+                        "name": col[1],
+                        "type": col[2] or "",
+                        "not_null": bool(col[3]),
+                        "primary_key": bool(col[5]),
+                    }
+                    for col in conn.execute(f'PRAGMA table_info("{table_name}");')
+                ]
+                foreign_keys = [
+                    {"column": fk[3], "ref_table": fk[2], "ref_column": fk[4]}
+                    for fk in conn.execute(f'PRAGMA foreign_key_list("{table_name}");')
+                ]
+                tables[table_name] = {
+                    "columns": columns,
+                    "foreign_keys": foreign_keys,
+                    "row_count": None,
+                    "values": {},
+                }
+        return tables
+
+    @staticmethod
+    def _analyze_statistics(conn: sqlite3.Connection):
+        """Row count per table and distinct-value estimate per (table, leading index column) from sqlite_stat1."""
+        row_counts: Dict[str, int] = {}
+        distinct: Dict[tuple, float] = {}
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+            return row_counts, distinct
+        for table_name, index_name, stat in conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall():
+            numbers = [int(n) for n in stat.split() if n.isdigit()]
+            if not numbers:
+                continue
+            row_counts[table_name] = numbers[0]
+            if index_name and len(numbers) > 1:
+                first = conn.execute(f'PRAGMA index_info("{index_name}");').fetchone()
+                if first and first[2]:
+                    # stat = "rows avg-rows-per-key(col1) ...": rows / avg is the key count.
+                    distinct[(table_name, first[2])] = numbers[0] / max(numbers[1], 1)
+        return row_counts, distinct
+
+    def _sample(self, conn: sqlite3.Connection, table_name: str, columns: List[str]) -> List[tuple]:
+        """Up to `sample_rows` rows, one from each equal slice of the table's rowid range."""
+        selected = ", ".join(f'"{name}"' for name in columns)
+        try:
+            max_rowid = conn.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM "{table_name}";').fetchone()[0]
+        except sqlite3.OperationalError:
+            # WITHOUT ROWID table: take the first rows instead.
+            return conn.execute(f'SELECT {selected} FROM "{table_name}" LIMIT {self.sample_rows};').fetchall()
+        step = max(1, -(-max_rowid // self.sample_rows))
+        slices = -(-max_rowid // step)
+        # The row taken from each slice is at a hashed offset, so a fixed stride
+        # does not alias with data generated in repeating patterns. Each pick is
+        # a rowid lookup, so the cost is bounded by sample_rows.
+        return conn.execute(
+            f'WITH RECURSIVE slices(s) AS (SELECT 0 UNION ALL SELECT s + 1 FROM slices WHERE s + 1 < {slices}) '
+            f'SELECT {selected} FROM "{table_name}" '
+            f'WHERE rowid IN (SELECT s * {step} + 1 + (s * 2654435761) % {step} FROM slices);'
+        ).fetchall()
+
+    def _load_statistics(self, pool: SQLiteConnectionPool, tables: Dict[str, Dict[str, Any]]) -> None:
+        with pool.connection() as conn:
+            row_counts, distinct = self._analyze_statistics(conn)
+            for table_name, info in tables.items():
+                if table_name in row_counts:
+                    info["row_count"] = row_counts[table_name]
+                else:
+                    try:
+                        # MAX(rowid) is a single B-tree descent; exact unless rows were deleted.
+                        info["row_count"] = conn.execute(
+                            f'SELECT COALESCE(MAX(rowid), 0) FROM "{table_name}";'
+                        ).fetchone()[0]
+                    except sqlite3.OperationalError:
+                        info["row_count"] = conn.execute(f'SELECT COUNT(*) FROM "{table_name}";').fetchone()[0]
+
+                candidates = [
+                    col["name"] for col in info["columns"]
+                    if not col["primary_key"] and col["type"].upper() != "REAL"
+                    and distinct.get((table_name, col["name"]), 0) <= self.max_distinct
+                ]
+                values = {}
+                if candidates:
+                    rows = self._sample(conn, table_name, candidates)
+                    for i, name in enumerate(candidates):
+                        seen = {row[i] for row in rows if row[i] is not None}
+                        if len(seen) <= self.max_distinct:
+                            values[name] = sorted(seen, key=lambda v: (type(v).__name__, v))
+                info["values"] = values
+
+    @staticmethod
+    def _render(tables: Dict[str, Dict[str, Any]]) -> str:
+        lines: List[str] = []
+        for table_name, info in tables.items():
+            columns = ", ".join(
+                f"{col['name']} {col['type']}{' PK' if col['primary_key'] else ''}".strip()
+                for col in info["columns"]
+            )
+            lines.append(f"- {table_name} ({info['row_count']} rows): {columns}")
+            for fk in info["foreign_keys"]:
+                lines.append(f"    FK {fk['column']} -> {fk['ref_table']}.{fk['ref_column']}")
+            for column, values in info["values"].items():
+                rendered = ", ".join(repr(v) if isinstance(v, str) else str(v) for v in values)
+                lines.append(f"    {column} values: {rendered}")
+        return "\n".join(lines)
+
+
+_schema_cache = SchemaCache()
+
+
+def get_schema_cache() -> SchemaCache:
+    """Return the shared schema cache for the sales database."""
+    return _schema_cache
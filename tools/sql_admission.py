@@ -0,0 +1,621 @@
+import hashlib
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .db_pool import SQLiteConnectionPool, get_pool
+from .schema_cache import get_schema_cache
+
+logger = logging.getLogger(__name__)
+
+SQL_TIMEOUT = float(os.getenv('PHARMA_SQL_TIMEOUT', '60'))
+SQL_MAX_VM_STEPS = int(os.getenv('PHARMA_SQL_MAX_VM_STEPS', '0'))
+# 'off', 'propose' (print the CREATE INDEX) or 'create' (build it in the background).
+AUTO_INDEX_MODE = os.getenv('PHARMA_SQL_AUTO_INDEX', 'propose').lower()
+AUTO_INDEX_AFTER = int(os.getenv('PHARMA_SQL_AUTO_INDEX_AFTER', '3'))
+AUTO_INDEX_PREFIX = 'idx_auto_'
+# Tables smaller than this are cheap to scan and never get an index proposed.
+LARGE_TABLE_ROWS = int(os.getenv('PHARMA_SQL_LARGE_TABLE_ROWS', '10000'))
+# Proposed indexes must cut the estimated plan cost at least this many times.
+MIN_IMPROVEMENT = 2.0
+MAX_INDEX_COLUMNS = 6
+PROGRESS_INTERVAL = 10_000
+
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_READ, sqlite3.SQLITE_SELECT, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+_READ_ONLY_PRAGMAS = {
+    'table_info', 'table_xinfo', 'index_list', 'index_info', 'index_xinfo',
+    'foreign_key_list', 'database_list', 'table_list',
+}
+_ACTION_NAMES = {
+    getattr(sqlite3, name): name[len('SQLITE_'):].lower().replace('_', ' ')
+    for name in dir(sqlite3)
+    if name.startswith(('SQLITE_CREATE_', 'SQLITE_DROP_')) or name in (
+        'SQLITE_INSERT', 'SQLITE_UPDATE', 'SQLITE_DELETE', 'SQLITE_PRAGMA', 'SQLITE_TRANSACTION',
+        'SQLITE_ATTACH', 'SQLITE_DETACH', 'SQLITE_ALTER_TABLE', 'SQLITE_REINDEX', 'SQLITE_ANALYZE',
+        'SQLITE_SAVEPOINT',
+    )
+}
+
+_LOOP_STEP = re.compile(r'^(SCAN|SEARCH)\s+(?:TABLE\s+)?(\w+)(?:\s+AS\s+(\w+))?(.*)$')
+_SUBQUERY_STEP = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE)\s+(\w+)')
+
+
+class QueryRejected(Exception):
+    """Raised when a query is refused: it writes, or it ran past its time/VM-step budget."""
+
+
+@dataclass
+class QueryPlan:
+    """
+    `EXPLAIN QUERY PLAN` of a query, classified for admission.
+
+    Attributes:
+        sql (str): The statement that was explained
+        params (Tuple): Values bound to its placeholders
+        steps (List[str]): Plan lines, indented by nesting depth
+        category (str): Worst trait: 'cartesian', 'join_fanout', 'full_scan', 'temp_btree' or 'indexed'
+        full_scans (List[str]): Tables of LARGE_TABLE_ROWS or more read without an index
+        temp_btrees (List[str]): What temporary B-trees are built for (ORDER BY, GROUP BY, DISTINCT)
+        automatic_indexes (List[Tuple[str, List[str]]]): (table, columns) of indexes SQLite builds per query
+        loops (int): Nested loops in the outermost query
+        fan_out (float): Estimated rows produced by the outermost join
+        cost (float): Estimated rows visited, used to compare plans
+    """
+
+    sql: str
+    params: Tuple = ()
+    steps: List[str] = field(default_factory=list)
+    category: str = 'indexed'
+    full_scans: List[str] = field(default_factory=list)
+    temp_btrees: List[str] = field(default_factory=list)
+    automatic_indexes: List[Tuple[str, List[str]]] = field(default_factory=list)
+    loops: int = 0
+    fan_out: float = 0.0
+    cost: float = 0.0
+
+    def describe(self) -> str:
+        details = []
+        if self.full_scans:
+            details.append(f"full scan of {', '.join(self.full_scans)}")
+        if self.automatic_indexes:
+            details.append("automatic index on " + ", ".join(
+                f"{table}({', '.join(columns)})" for table, columns in self.automatic_indexes))
+        if self.temp_btrees:
+            details.append(f"temp B-tree for {', '.join(self.temp_btrees)}")
+        if self.loops > 1:
+            details.append(f"{self.loops}-way join, ~{self.fan_out:,.0f} rows")
+        return f"{self.category} (est. cost {self.cost:,.0f}" + (f"; {'; '.join(details)})" if details else ")")
+
+
+def _table_aliases(sql: str) -> Dict[str, str]:
+    """Map every table name and alias in FROM/JOIN clauses to its table."""
+    aliases = {}
+    pattern = r'\b(?:from|join)\s+"?(\w+)"?(?:\s+(?:as\s+)?(?!(?:where|join|inner|left|right|full|outer|cross|natural|on|using|group|order|limit|having|union)\b)(\w+))?'
+    for match in re.finditer(pattern, sql, flags=re.IGNORECASE):
+        table = match.group(1)
+        aliases[table.lower()] = table
+        if match.group(2):
+            aliases[match.group(2).lower()] = table
+        # "FROM a, b" lists further tables after commas.
+        tail = re.match(r'\s*((?:,\s*"?\w+"?(?:\s+(?:as\s+)?\w+)?)+)', sql[match.end():], flags=re.IGNORECASE)
+        if tail:
+            for extra in re.finditer(r',\s*"?(\w+)"?(?:\s+(?:as\s+)?(\w+))?', tail.group(1), flags=re.IGNORECASE):
+                aliases[extra.group(1).lower()] = extra.group(1)
+                if extra.group(2):
+                    aliases[extra.group(2).lower()] = extra.group(1)
+    return aliases
+
+
+def _search_selectivity(detail: str) -> Tuple[int, int]:
+    """Equality and range terms of a SEARCH step, e.g. '(product_id=? AND year>?)'."""
+    terms = re.search(r'\((.*)\)\s*$', detail)
+    if not terms:
+        return 0, 0
+    text = terms.group(1)
+    equalities = len(re.findall(r'\w+=\?', text)) + len(re.findall(r'ANY\(', text))
+    ranges = len(re.findall(r'\w+[<>]=?\?', text))
+    return equalities, ranges
+
+
+@dataclass
+class TableStatistics:
+    """
+    Sizes used to estimate plan costs.
+
+    Attributes:
+        row_counts (Dict[str, int]): Approximate rows per table
+        index_rows (Dict[str, List[float]]): Per index, average rows matching
+            an equality on its first 1, 2, ... columns (from sqlite_stat1)
+    """
+
+    row_counts: Dict[str, int] = field(default_factory=dict)
+    index_rows: Dict[str, List[float]] = field(default_factory=dict)
+
+
+def _classify(sql: str, rows: List[Tuple[int, int, Any, str]], statistics: TableStatistics) -> QueryPlan:
+    plan = QueryPlan(sql=sql)
+    aliases = _table_aliases(sql)
+    children: Dict[int, List[Tuple[int, str]]] = {}
+    for step_id, parent, _, detail in rows:
+        children.setdefault(parent, []).append((step_id, detail))
+
+    subquery_rows: Dict[str, float] = {}
+
+    def walk(parent: int, depth: int) -> Tuple[float, float]:
+        """Cost and output rows of the steps under `parent`, as nested loops."""
+        cost, cardinality, loops = 0.0, 1.0, 0
+        for step_id, detail in children.get(parent, []):
+            plan.steps.append("  " * depth + detail)
+            loop = _LOOP_STEP.match(detail)
+            if loop:
+                kind, name, alias, rest = loop.groups()
+                table = aliases.get((alias or name).lower(), name)
+                if table in subquery_rows:
+                    table_rows = subquery_rows[table]
+                else:
+                    table_rows = float(statistics.row_counts.get(table, 1000))
+                if kind == 'SCAN':
+                    step_rows = table_rows
+                    step_cost = table_rows * (0.5 if 'COVERING INDEX' in rest else 1.0)
+                    if 'INDEX' not in rest and table_rows >= LARGE_TABLE_ROWS and table not in subquery_rows:
+                        plan.full_scans.append(table)
+                    if loops and table not in subquery_rows:
+                        # An inner loop that reads every row for each outer row.
+                        plan.category = 'cartesian'
+                elif 'INTEGER PRIMARY KEY' in rest:
+                    step_rows = 1.0 if '=' in rest else table_rows / 3
+                    step_cost = math.log2(table_rows + 1)
+                else:
+                    equalities, ranges = _search_selectivity(rest)
+                    index = re.search(r'INDEX (\w+)', rest)
+                    index_rows = statistics.index_rows.get(index.group(1)) if index else None
+                    if index_rows and 0 < equalities <= len(index_rows):
+                        step_rows = max(1.0, index_rows[equalities - 1] / (3 ** ranges))
+                    else:
+                        step_rows = max(1.0, table_rows / (10 ** equalities) / (3 ** ranges))
+                    step_cost = math.log2(table_rows + 1) + step_rows
+                    if 'AUTOMATIC' in rest:
+                        columns = re.findall(r'(\w+)=\?', rest)
+                        plan.automatic_indexes.append((table, columns))
+                        # Built once per query, before the loop runs.
+                        cost += table_rows * math.log2(table_rows + 1)
+                cost += cardinality * step_cost
+                cardinality *= step_rows
+                loops += 1
+            elif detail.startswith('USE TEMP B-TREE FOR'):
+                plan.temp_btrees.append(detail[len('USE TEMP B-TREE FOR '):])
+                cost += cardinality * math.log2(cardinality + 1)
+            else:
+                sub_cost, sub_rows = walk(step_id, depth + 1)
+                named = _SUBQUERY_STEP.match(detail)
+                if named:
+                    subquery_rows[named.group(1)] = sub_rows
+                # Correlated subqueries run once per outer row.
+                cost += sub_cost * (cardinality if detail.startswith('CORRELATED') else 1.0)
+                if detail.startswith(('COMPOUND', 'LEFT-MOST', 'UNION', 'MULTI-INDEX')):
+                    cardinality = max(cardinality, sub_rows)
+        if parent == 0:
+            plan.loops, plan.fan_out = loops, cardinality if loops else 0.0
+        return cost, cardinality
+
+    plan.cost, _ = walk(0, 0)
+    largest = max((statistics.row_counts.get(table, 0) for table in set(aliases.values())), default=0)
+    if plan.category != 'cartesian':
+        if plan.loops > 1 and (plan.fan_out > max(largest, 1) or plan.automatic_indexes):
+            plan.category = 'join_fanout'
+        elif plan.full_scans:
+            plan.category = 'full_scan'
+        elif plan.temp_btrees:
+            plan.category = 'temp_btree'
+    return plan
+
+
+def _set_authorizer(conn: sqlite3.Connection, authorizer) -> None:
+    try:
+        conn.set_authorizer(authorizer)
+    except TypeError:
+        # Python < 3.11 cannot clear an authorizer; allow everything instead.
+        conn.set_authorizer(lambda *args: sqlite3.SQLITE_OK)
+
+
+_SQL_COMMENT = re.compile(r'--[^\n]*|/\*.*?(?:\*/|$)', re.S)
+
+
+def _check_single_statement(sql: str) -> None:
+    """Reject `sql` unless it is exactly one statement; a single trailing `;` or comment is fine."""
+    body = sql.strip()
+    for i, char in enumerate(body):
+        if char == ';' and sqlite3.complete_statement(body[:i + 1]):
+            if _SQL_COMMENT.sub('', body[i + 1:]).strip():
+                raise QueryRejected("only a single SQL statement is allowed")
+            return
+
+
+def explain(conn: sqlite3.Connection, sql: str, statistics: Optional[TableStatistics] = None,
+            params: Sequence[Any] = ()) -> QueryPlan:
+    """
+    Run `EXPLAIN QUERY PLAN` for `sql` and classify the plan.
+
+    Compiling the statement goes through an authorizer that only permits
+    reads, so write statements (INSERT, UPDATE, DELETE, DDL, ATTACH,
+    PRAGMA assignments, ...) are rejected before anything runs.
+
+    Raises:
+        QueryRejected: If the statement writes or `sql` holds more than one statement
+    """
+    _check_single_statement(sql)
+    denied = []
+
+    def authorize(action, arg1, arg2, db_name, trigger):
+        if action in _ALLOWED_ACTIONS:
+            return sqlite3.SQLITE_OK
+        if action == sqlite3.SQLITE_PRAGMA and arg1 in _READ_ONLY_PRAGMAS:
+            return sqlite3.SQLITE_OK
+        denied.append(_ACTION_NAMES.get(action, str(action)) + (f" {arg1}" if arg1 else ""))
+        return sqlite3.SQLITE_DENY
+
+    _set_authorizer(conn, authorize)
+    try:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.DatabaseError:
+        if denied:
+            action = next((d for d in denied if 'sqlite_' not in d), denied[0])
+            raise QueryRejected(f"only read-only queries are allowed (statement would {action})") from None
+        raise
+    finally:
+        _set_authorizer(conn, None)
+    plan = _classify(sql, rows, statistics or TableStatistics())
+    plan.params = tuple(params)
+    return plan
+
+
+@contextmanager
+def query_budget(conn: sqlite3.Connection, timeout: float = SQL_TIMEOUT, max_vm_steps: int = SQL_MAX_VM_STEPS):
+    """
+    Interrupt queries on `conn` that run longer than `timeout` seconds or
+    `max_vm_steps` SQLite VM instructions (0 disables either limit).
+
+    Raises:
+        QueryRejected: If the budget ran out
+    """
+    started = time.monotonic()
+    steps = [0]
+    exceeded = []
+
+    def progress() -> int:
+        steps[0] += PROGRESS_INTERVAL
+        if timeout and time.monotonic() - started > timeout:
+            exceeded.append(f"time budget of {timeout:g}s")
+        elif max_vm_steps and steps[0] > max_vm_steps:
+            exceeded.append(f"budget of {max_vm_steps:,} VM steps")
+        return 1 if exceeded else 0
+
+    conn.set_progress_handler(progress, PROGRESS_INTERVAL)
+    try:
+        yield
+    except sqlite3.OperationalError:
+        if exceeded:
+            raise QueryRejected(f"query interrupted after exceeding its {exceeded[0]}") from None
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
+
+
+@dataclass
+class _IndexCandidate:
+    table: str
+    columns: Tuple[str, ...]
+    seen: int = 0
+    example_sql: str = ''
+    example_params: Tuple = ()
+    status: str = 'observed'
+    cost_before: Optional[float] = None
+    cost_after: Optional[float] = None
+
+    @property
+    def name(self) -> str:
+        name = f"{AUTO_INDEX_PREFIX}{self.table}_{'_'.join(self.columns)}"
+        if len(name) > 60:
+            name = name[:51] + '_' + hashlib.sha1(name.encode()).hexdigest()[:8]
+        return name
+
+    @property
+    def ddl(self) -> str:
+        return f'CREATE INDEX IF NOT EXISTS {self.name} ON "{self.table}" ({", ".join(self.columns)})'
+
+
+def _index_columns(sql: str, names: List[str], columns: List[str], other_columns: set) -> Tuple[str, ...]:
+    """
+    Index columns for the predicates and grouping on one table in `sql`:
+    equality columns, then GROUP BY columns, then one range column, then the
+    other referenced columns so the index covers the query when it is small enough.
+    """
+    lowered = re.sub(r"'(?:[^']|'')*'", "?", sql).lower()
+    names = {name.lower() for name in names}
+    known = {column.lower(): column for column in columns}
+    clauses = re.findall(r'\bwhere\b(.*?)(?=\bgroup\s+by\b|\border\s+by\b|\blimit\b|\bhaving\b|\bunion\b|\)|$)', lowered, re.S)
+    clauses += re.findall(r'\bon\b(.*?)(?=\bjoin\b|\bwhere\b|\bgroup\s+by\b|\border\s+by\b|\blimit\b|$)', lowered, re.S)
+    grouping = re.findall(r'\bgroup\s+by\b(.*?)(?=\bhaving\b|\border\s+by\b|\blimit\b|\)|$)', lowered, re.S)
+
+    def refs(text: str):
+        for match in re.finditer(r'(?:\b(\w+)\s*\.\s*)?\b(\w+)\b', text):
+            qualifier, name = match.group(1), match.group(2)
+            if name not in known or (qualifier and qualifier not in names):
+                continue
+            if not qualifier and name in other_columns:
+                continue
+            yield match, known[name]
+
+    equalities, ranges, grouped, referenced = [], [], [], []
+    for clause in clauses:
+        for match, column in refs(clause):
+            before, after = clause[:match.start()], clause[match.end():]
+            if re.match(r'\s*(==?|\bin\b|\bis\b)', after) or re.search(r'==?\s*$', before):
+                equalities.append(column)
+            elif re.match(r'\s*([<>]=?|\bbetween\b|\blike\b)', after) or re.search(r'[<>]=?\s*$', before):
+                ranges.append(column)
+    for clause in grouping:
+        grouped += [column for _, column in refs(clause)]
+    referenced = [column for _, column in refs(lowered)]
+
+    if not (equalities or ranges or grouped):
+        return ()
+    ordered = list(dict.fromkeys(equalities + grouped + ranges[:1]))
+    covering = list(dict.fromkeys(ordered + referenced))
+    return tuple(covering if len(covering) <= MAX_INDEX_COLUMNS else ordered[:MAX_INDEX_COLUMNS])
+
+
+class IndexAdvisor:
+    """
+    Records recurring full-scan and automatic-index patterns and proposes
+    (or creates) covering indexes for them.
+
+    Once a (table, columns) pattern has been seen `threshold` times, the
+    index is tried on an empty in-memory copy of the schema: the query is
+    explained there with and without it, and the index is only proposed
+    if the estimated plan cost drops at least MIN_IMPROVEMENT times. In
+    'create' mode it is then built on a writable connection in the
+    background. Like any schema change, that invalidates the cached SQL.
+
+    Attributes:
+        mode (str): 'off', 'propose' or 'create'
+        threshold (int): Sightings of a pattern before it is evaluated
+    """
+
+    def __init__(self, mode: str = AUTO_INDEX_MODE, threshold: int = AUTO_INDEX_AFTER):
+        self.mode = mode
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._candidates: Dict[Tuple[str, Tuple[str, ...]], _IndexCandidate] = {}
+
+    def observe(self, plan: QueryPlan, pool: Optional[SQLiteConnectionPool] = None) -> None:
+        """Record the index patterns of an admitted query and act on recurring ones."""
+        if self.mode == 'off' or not (plan.full_scans or plan.automatic_indexes):
+            return
+        pool = pool or get_pool()
+        tables = {table: [col['name'] for col in info['columns']] for table, info in get_schema_cache().get().items()}
+        aliases = _table_aliases(plan.sql)
+
+        patterns = set()
+        for table, columns in plan.automatic_indexes:
+            if table in tables and columns:
+                patterns.add((table, tuple(columns)))
+        for table in plan.full_scans:
+            if table not in tables:
+                continue
+            names = [name for name, target in aliases.items() if target == table]
+            others = {column.lower() for name, cols in tables.items() if name != table and name in aliases.values() for column in cols}
+            primary_keys = {col['name'] for col in get_schema_cache().get()[table]['columns'] if col['primary_key']}
+            columns = _index_columns(plan.sql, names, [c for c in tables[table] if c not in primary_keys], others)
+            if columns:
+                patterns.add((table, columns))
+
+        ready = []
+        with self._lock:
+            for key in patterns:
+                candidate = self._candidates.setdefault(key, _IndexCandidate(*key))
+                candidate.seen += 1
+                candidate.example_sql, candidate.example_params = plan.sql, plan.params
+                if candidate.seen >= self.threshold and candidate.status == 'observed':
+                    candidate.status = 'evaluating'
+                    ready.append(candidate)
+
+        for candidate in ready:
+            self._evaluate(candidate, pool, plan)
+
+    def _what_if(self, pool: SQLiteConnectionPool, candidate: _IndexCandidate, statistics: TableStatistics) -> Tuple[float, float]:
+        """Estimated plan cost without and with the candidate, on an empty copy of the schema."""
+        with pool.connection() as conn:
+            ddl = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+            ).fetchall()
+            has_stats = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()
+            stats = conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall() if has_stats else []
+
+        shadow = sqlite3.connect(':memory:')
+        try:
+            for (statement,) in ddl:
+                shadow.execute(statement)
+            if stats:
+                # Give the planner the real table statistics.
+                shadow.execute("ANALYZE")
+                shadow.execute("DELETE FROM sqlite_stat1")
+                shadow.executemany("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", stats)
+                shadow.execute("ANALYZE sqlite_master")
+            before = explain(shadow, candidate.example_sql, statistics, candidate.example_params).cost
+            shadow.execute(candidate.ddl)
+            after = explain(shadow, candidate.example_sql, statistics, candidate.example_params).cost
+        finally:
+            shadow.close()
+        return before, after
+
+    def _evaluate(self, candidate: _IndexCandidate, pool: SQLiteConnectionPool, plan: QueryPlan) -> None:
+        try:
+            before, after = self._what_if(pool, candidate, table_statistics(pool))
+        except (sqlite3.Error, QueryRejected) as e:
+            logger.warning("Could not evaluate index %s: %s", candidate.name, e)
+            candidate.status = 'failed'
+            return
+
+        candidate.cost_before, candidate.cost_after = before, after
+        if after <= 0 or before / after < MIN_IMPROVEMENT:
+            candidate.status = 'rejected'
+            logger.info("Index %s would not help enough (%.0f -> %.0f)", candidate.name, before, after)
+            return
+
+        if self.mode == 'create':
+            candidate.status = 'creating'
+            threading.Thread(target=self._create, args=(candidate, pool), name='auto-index', daemon=True).start()
+        else:
+            candidate.status = 'proposed'
+            print(f"💡 Suggested index after {candidate.seen} similar queries: {candidate.ddl} "
+                  f"(estimated plan cost {before:,.0f} -> {after:,.0f}, {before / after:,.0f}x)")
+
+    def _create(self, candidate: _IndexCandidate, pool: SQLiteConnectionPool) -> None:
+        started = time.perf_counter()
+        try:
+            statistics = table_statistics(pool)
+            conn = sqlite3.connect(pool.db_path, timeout=30)
+            try:
+                conn.execute(candidate.ddl)
+                conn.commit()
+                # Pooled connections may still hold statements compiled against the old schema.
+                candidate.cost_after = explain(conn, candidate.example_sql, statistics, candidate.example_params).cost
+            finally:
+                conn.close()
+        except (sqlite3.Error, QueryRejected) as e:
+            logger.warning("Could not create index %s: %s", candidate.name, e)
+            candidate.status = 'failed'
+            return
+        candidate.status = 'created'
+        improvement = candidate.cost_before / candidate.cost_after if candidate.cost_after else float('inf')
+        print(f"🗂️ Created index {candidate.name} in {time.perf_counter() - started:.1f}s: "
+              f"plan cost {candidate.cost_before:,.0f} -> {candidate.cost_after:,.0f} ({improvement:,.0f}x)")
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Every recorded pattern with its status, DDL and estimated plan cost before/after."""
+        with self._lock:
+            candidates = sorted(self._candidates.values(), key=lambda c: c.seen, reverse=True)
+            return [
+                {
+                    "table": c.table, "columns": list(c.columns), "seen": c.seen, "status": c.status,
+                    "ddl": c.ddl, "cost_before": c.cost_before, "cost_after": c.cost_after,
+                    "improvement": c.cost_before / c.cost_after if c.cost_before and c.cost_after else None,
+                    "example_sql": c.example_sql,
+                }
+                for c in candidates
+            ]
+
+
+_statistics: Dict[str, Any] = {"version": None, "value": TableStatistics()}
+_statistics_lock = threading.Lock()
+
+
+def table_statistics(pool: Optional[SQLiteConnectionPool] = None) -> TableStatistics:
+    """Table sizes (rollups included) and sqlite_stat1 index statistics, refreshed when the data changes."""
+    pool = pool or get_pool()
+    version = pool.data_version()
+    with _statistics_lock:
+        if _statistics["version"] != version:
+            statistics = TableStatistics()
+            with pool.connection() as conn:
+                tables = conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
+                ).fetchall()
+                for (table,) in tables:
+                    # MAX(rowid) is a single B-tree descent; exact enough for plan costs.
+                    try:
+                        statistics.row_counts[table] = conn.execute(
+                            f'SELECT COALESCE(MAX(rowid), 0) FROM "{table}"'
+                        ).fetchone()[0]
+                    except sqlite3.OperationalError:
+                        # WITHOUT ROWID tables (insights_quarterly) have to be counted.
+                        statistics.row_counts[table] = conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+                    for _, index, stat in conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1 WHERE idx IS NOT NULL"):
+                        numbers = [float(n) for n in stat.split() if n.isdigit()]
+                        statistics.index_rows[index] = numbers[1:]
+            _statistics.update(version=version, value=statistics)
+        return _statistics["value"]
+
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"admitted": 0, "rejected_writes": 0, "interrupted": 0, "explain_s": 0.0, "categories": {}}
+_advisor = IndexAdvisor()
+
+
+def get_index_advisor() -> IndexAdvisor:
+    return _advisor
+
+
+def _count(name: str, value: float = 1) -> None:
+    with _stats_lock:
+        _stats[name] += value
+
+
+def admit(conn: sqlite3.Connection, sql: str, pool: Optional[SQLiteConnectionPool] = None,
+          params: Sequence[Any] = ()) -> QueryPlan:
+    """
+    Explain and classify `sql` before it runs on `conn`.
+
+    Raises:
+        QueryRejected: If the statement writes
+    """
+    started = time.perf_counter()
+    try:
+        plan = explain(conn, sql, table_statistics(pool), params)
+    except QueryRejected:
+        _count("rejected_writes")
+        raise
+    finally:
+        _count("explain_s", time.perf_counter() - started)
+    with _stats_lock:
+        _stats["admitted"] += 1
+        _stats["categories"][plan.category] = _stats["categories"].get(plan.category, 0) + 1
+    return plan
+
+
+@contextmanager
+def guarded_execution(conn: sqlite3.Connection, sql: str, pool: Optional[SQLiteConnectionPool] = None,
+                      params: Sequence[Any] = ()):
+    """
+    Admit `sql` and run the block under the query budget, then feed the plan
+    to the index advisor. Yields the QueryPlan.
+
+    Raises:
+        QueryRejected: If the statement writes or exceeds its budget
+    """
+    plan = admit(conn, sql, pool, params)
+    try:
+        with query_budget(conn):
+            yield plan
+    except QueryRejected:
+        _count("interrupted")
+        raise
+    _advisor.observe(plan, pool)
+
+
+def admission_stats() -> Dict[str, Any]:
+    """Admitted queries per plan category, rejections, interruptions and time spent explaining."""
+    with _stats_lock:
+        return dict(_stats, categories=dict(_stats["categories"]))
+
+
+def index_report() -> List[Dict[str, Any]]:
+    return _advisor.report()
+
+
+if __name__ == "__main__":
+    import sys
+
+    with get_pool().connection() as conn:
+        plan = explain(conn, " ".join(sys.argv[1:]), table_statistics())
+    print("\n".join(plan.steps))
+    print(plan.describe())
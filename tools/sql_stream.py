@@ -0,0 +1,148 @@
+import random
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+@dataclass
+class ResultSummary:
+    """Bounded description of a streamed query result."""
+
+    columns: List[str] = field(default_factory=list)
+    row_count: int = 0
+    bytes_written: int = 0
+    truncated: bool = False
+    truncated_reason: Optional[str] = None
+    head: List[Tuple[Any, ...]] = field(default_factory=list)
+    sample: List[Tuple[Any, ...]] = field(default_factory=list)
+    numeric_stats: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    fetch_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+
+class _RunningStats:
+    """Per-column min/max/sum/count over numeric values seen so far."""
+
+    def __init__(self, columns: List[str]):
+        self.columns = columns
+        self.stats: List[Optional[List[float]]] = [None] * len(columns)
+        self.non_numeric = [False] * len(columns)
+
+    def update(self, rows: List[Tuple[Any, ...]]) -> None:
+        for i in range(len(self.columns)):
+            if self.non_numeric[i]:
+                continue
+            values = [row[i] for row in rows if row[i] is not None]
+            if not values:
+                continue
+            if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                self.non_numeric[i] = True
+                self.stats[i] = None
+                continue
+            current = self.stats[i]
+            chunk = [min(values), max(values), sum(values), len(values)]
+            if current is None:
+                self.stats[i] = chunk
+            else:
+                current[0] = min(current[0], chunk[0])
+                current[1] = max(current[1], chunk[1])
+                current[2] += chunk[2]
+                current[3] += chunk[3]
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {
+            column: {"min": s[0], "max": s[1], "sum": s[2], "count": s[3]}
+            for column, s in zip(self.columns, self.stats)
+            if s is not None
+        }
+
+
+def stream_query(
+    conn: sqlite3.Connection,
+    sql_query: str,
+    writer,
+    chunk_size: int = 10_000,
+    max_rows: int = 0,
+    max_bytes: int = 0,
+    head_size: int = 5,
+    sample_size: int = 20,
+    seed: int = 0,
+    params: Sequence[Any] = (),
+) -> ResultSummary:
+    """
+    Execute `sql_query` and stream its rows to `writer` in chunks.
+
+    Only a bounded amount of the result is kept in memory: the first
+    `head_size` rows, a reservoir sample of `sample_size` rows and running
+    min/max/sum per numeric column.
+
+    Args:
+        conn: Connection to execute on
+        sql_query: Query to run
+        writer: Object with `write(columns, rows)` and a `bytes_written` attribute
+        chunk_size: Rows fetched per `fetchmany`
+        max_rows: Stop after this many rows (0 = unlimited)
+        max_bytes: Stop once the writer has produced this many bytes (0 = unlimited)
+        head_size: Number of leading rows kept for the preview
+        sample_size: Size of the reservoir sample
+        seed: Seed for the reservoir sampler, so previews are reproducible
+        params: Values bound to the query's `?` placeholders
+
+    Returns:
+        ResultSummary: Row count, truncation info, preview rows and column stats
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute(sql_query, params)
+    columns = [description[0] for description in cursor.description or []]
+
+    summary = ResultSummary(columns=columns)
+    stats = _RunningStats(columns)
+    summary.fetch_seconds = time.perf_counter() - started
+    writer.write(columns, [])
+
+    while True:
+        fetch = chunk_size
+        if max_rows:
+            fetch = min(fetch, max_rows - summary.row_count + 1)
+        started = time.perf_counter()
+        rows = cursor.fetchmany(fetch)
+        summary.fetch_seconds += time.perf_counter() - started
+        if not rows:
+            break
+
+        if max_rows and summary.row_count + len(rows) > max_rows:
+            rows = rows[:max_rows - summary.row_count]
+            summary.truncated = True
+            summary.truncated_reason = f"row cap of {max_rows:,} reached"
+
+        started = time.perf_counter()
+        writer.write(columns, rows)
+        summary.write_seconds += time.perf_counter() - started
+        stats.update(rows)
+
+        for row in rows:
+            seen = summary.row_count
+            if seen < head_size:
+                summary.head.append(row)
+            if seen < sample_size:
+                summary.sample.append(row)
+            else:
+                slot = rng.randint(0, seen)
+                if slot < sample_size:
+                    summary.sample[slot] = row
+            summary.row_count += 1
+
+        summary.bytes_written = writer.bytes_written
+        if summary.truncated:
+            break
+        if max_bytes and summary.bytes_written >= max_bytes:
+            summary.truncated = True
+            summary.truncated_reason = f"byte cap of {max_bytes:,} reached"
+            break
+
+    cursor.close()
+    summary.numeric_stats = stats.as_dict()
+    return summary
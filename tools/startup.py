@@ -0,0 +1,218 @@
+"""
+Startup helpers: loading .env, background pre-warming of the heavy
+dependencies the tools import on first use, and an import-time report.
+
+Usage:
+    python -m tools.startup                       # where the agent's startup time goes
+    python -m tools.startup --budget 1.5          # exit non-zero above 1.5s or on eager heavy imports
+    python -m tools.startup --module tools --json
+"""
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PREWARM_ENABLED = os.getenv('PHARMA_PREWARM', '1') != '0'
+
+# Third-party packages the tools import lazily. None of them should be
+# pulled in by importing the agent module or `tools`.
+HEAVY_MODULES = [
+    'pandas',
+    'boto3',
+    'botocore.config',
+    'tavily',
+    'dotenv',
+    'bedrock_agentcore.tools.code_interpreter_client',
+]
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Load `.env` into the environment once (python-dotenv is imported on the first call)."""
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def _warm(modules: List[str], tasks: tuple) -> None:
+    import importlib
+
+    start = time.perf_counter()
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.debug("Prewarm skipped %s: %s", module, e)
+    for task in tasks:
+        try:
+            task()
+        except Exception as e:
+            logger.warning("Prewarm task %s failed: %s", getattr(task, '__name__', task), e)
+    logger.info("Prewarm finished in %.2fs", time.perf_counter() - start)
+
+
+def prewarm(*tasks: Callable[[], Any], modules: Optional[List[str]] = None) -> Optional[threading.Thread]:
+    """
+    Import the heavy dependencies, then run `tasks`, in a daemon thread.
+
+    Call it once the prompt is on screen: the imports overlap with the user
+    typing, so the first tool call does not pay for them.
+
+    Args:
+        *tasks: Extra zero-argument callables to run after the imports
+        modules (Optional[List[str]]): Modules to import (default HEAVY_MODULES)
+
+    Returns:
+        Optional[threading.Thread]: The warming thread, or None if PHARMA_PREWARM=0
+    """
+    if not PREWARM_ENABLED:
+        return None
+    thread = threading.Thread(
+        target=_warm, args=(list(HEAVY_MODULES if modules is None else modules), tasks),
+        name='tools-prewarm', daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def warm_tool_clients() -> None:
+    """Load .env and create the shared Bedrock client (botocore reads its service model here)."""
+    load_env()
+    from .bedrock_client import get_bedrock_client
+    get_bedrock_client()
+
+
+def refresh_summaries(db_path: Optional[str] = None) -> None:
+    """
+    Fold new sales rows into the rollups and the precomputed insights.
+
+    Run once at startup (or after loading data) rather than per query: it
+    writes to the database, which also changes the data version that keys
+    the query result cache. Read-only deployments keep what was built when
+    the data was loaded.
+    """
+    import sqlite3
+
+    from .db_pool import DB_PATH
+    from .insights import refresh_insights
+    from .rollups import refresh_rollups
+
+    try:
+        refresh_rollups(db_path or DB_PATH)
+        refresh_insights(db_path or DB_PATH)
+    except sqlite3.Error as e:
+        logger.warning("Could not refresh rollups and insights: %s", e)
+
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def _parse_importtime(stderr: str, module: str) -> Dict[str, float]:
+    """Cumulative seconds of `module` and every module it imported, from `python -X importtime` output."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append((match.group(4), len(match.group(3)), int(match.group(2)) / 1e6))
+    # A module's line follows the (more indented) lines of everything it imported.
+    end = next((i for i, entry in enumerate(entries) if entry[0] == module), None)
+    if end is None:
+        return {}
+    start = end
+    while start > 0 and entries[start - 1][1] > entries[end][1]:
+        start -= 1
+    return {name: seconds for name, _, seconds in entries[start:end + 1]}
+
+
+def measure_import(module: str = 'pharma_salesanalysts_agent', runs: int = 5, top: int = 15) -> Dict[str, Any]:
+    """
+    Time `import module` in fresh interpreters.
+
+    Args:
+        module (str): Module to import
+        runs (int): Number of fresh processes; the median run is reported in detail
+        top (int): Number of slowest top-level packages to report
+
+    Returns:
+        Dict[str, Any]: seconds (per run), median_seconds, packages (slowest
+        top-level packages of the median run, cumulative seconds) and heavy
+        (HEAVY_MODULES that the import pulled in)
+    """
+    samples = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+            env=dict(os.environ, PHARMA_TRACING='0', PHARMA_PREWARM='0'),
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{completed.stderr.splitlines()[-1:]}")
+        cumulative = _parse_importtime(completed.stderr, module)
+        samples.append((cumulative.get(module, 0.0), cumulative))
+
+    samples.sort(key=lambda sample: sample[0])
+    seconds, cumulative = samples[len(samples) // 2]
+    packages = sorted(
+        ((name, value) for name, value in cumulative.items() if '.' not in name and name != module),
+        key=lambda item: item[1], reverse=True,
+    )
+    return {
+        "module": module,
+        "seconds": [sample[0] for sample in samples],
+        "median_seconds": statistics.median(sample[0] for sample in samples),
+        "packages": dict(packages[:top]),
+        "heavy": [name for name in HEAVY_MODULES if name in cumulative],
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"⏱️ import {report['module']}: {report['median_seconds']:.3f}s "
+          f"(median of {len(report['seconds'])}, min {min(report['seconds']):.3f}s)")
+    for name, seconds in report["packages"].items():
+        print(f"   {name:40s} {seconds:7.3f}s")
+    if report["heavy"]:
+        print(f"⚠️ Imported eagerly: {', '.join(report['heavy'])}")
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Report where startup import time goes.")
+    parser.add_argument('--module', action='append', help="Module to import (repeatable; default the agent and tools)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, help="Fail if any module takes longer than this many seconds")
+    parser.add_argument('--json', action='store_true', help="Print the report as JSON")
+    args = parser.parse_args()
+
+    reports = [measure_import(module, runs=args.runs) for module in args.module or ['pharma_salesanalysts_agent', 'tools']]
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            _print_report(report)
+
+    if args.budget is not None:
+        failed = [r for r in reports if r["median_seconds"] > args.budget or r["heavy"]]
+        for report in failed:
+            print(f"❌ import {report['module']} over budget: {report['median_seconds']:.3f}s > {args.budget:.3f}s"
+                  if report["median_seconds"] > args.budget else
+                  f"❌ import {report['module']} pulls in {', '.join(report['heavy'])}")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv('PHARMA_TRACING', '1') != '0'
+TRACE_FILE = os.getenv('PHARMA_TRACE_FILE', os.path.join(os.getenv('PHARMA_CACHE_DIR', '.cache'), 'traces.jsonl'))
+# The trace file is rotated at this size, keeping TRACE_BACKUPS older files (traces.jsonl.1, ...).
+TRACE_MAX_BYTES = int(os.getenv('PHARMA_TRACE_MAX_MB', '64')) * 1024 * 1024
+TRACE_BACKUPS = int(os.getenv('PHARMA_TRACE_BACKUPS', '3'))
+METRICS_HOST = os.getenv('PHARMA_METRICS_HOST', '127.0.0.1')
+
+# Latency histogram buckets, in seconds.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Numeric span attributes that are also summed into Prometheus counters.
+COUNTED_ATTRIBUTES = ('input_tokens', 'output_tokens', 'rows', 'bytes', 'throttles', 'retries')
+
+
+class Span:
+    """
+    One timed operation in a trace.
+
+    Attributes:
+        name (str): Operation name, e.g. 'bedrock.converse'
+        trace_id (str): Shared by every span of one top-level operation
+        span_id (str): Unique id of this span
+        parent_id (Optional[str]): Enclosing span, if any
+        attributes (Dict[str, Any]): Sizes, counts, cache hits, model ids, ...
+    """
+
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start', 'duration', 'attributes', 'status')
+
+    def __init__(self, name: str, parent: Optional['Span'], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self.duration = 0.0
+        self.attributes = attributes
+        self.status = 'ok'
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, name: str, value: float) -> None:
+        """Accumulate a numeric attribute (e.g. tokens over several model calls)."""
+        self.attributes[name] = self.attributes.get(name, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id,
+            "parent_id": self.parent_id, "start": self.start, "duration_s": self.duration,
+            "status": self.status, "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is disabled."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def add(self, name: str, value: float) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+
+
+class _Metrics:
+    """Per-span-name latency histograms and counters, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, List[float]] = {}
+        self._counters: Dict[tuple, float] = {}
+
+    def observe(self, span: Span) -> None:
+        with self._lock:
+            hist = self._histograms.get(span.name)
+            if hist is None:
+                # bucket counts..., +Inf count, sum
+                hist = self._histograms[span.name] = [0] * (len(BUCKETS) + 2)
+            hist[bisect_left(BUCKETS, span.duration)] += 1
+            hist[-1] += span.duration
+            if span.status != 'ok':
+                key = ('errors', span.name)
+                self._counters[key] = self._counters.get(key, 0) + 1
+            for attribute in COUNTED_ATTRIBUTES:
+                value = span.attributes.get(attribute)
+                if isinstance(value, (int, float)) and value:
+                    key = (attribute, span.name)
+                    self._counters[key] = self._counters.get(key, 0) + value
+            if span.attributes.get('cache_hit') is not None:
+                key = ('cache_hits' if span.attributes['cache_hit'] else 'cache_misses', span.name)
+                self._counters[key] = self._counters.get(key, 0) + 1
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP pharma_span_duration_seconds Duration of traced operations.",
+            "# TYPE pharma_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            histograms = {name: list(hist) for name, hist in self._histograms.items()}
+            counters = dict(self._counters)
+        for name, hist in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist):
+                cumulative += count
+                lines.append(f'pharma_span_duration_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            cumulative += hist[len(BUCKETS)]
+            lines.append(f'pharma_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {cumulative}')
+            lines.append(f'pharma_span_duration_seconds_sum{{span="{name}"}} {hist[-1]}')
+            lines.append(f'pharma_span_duration_seconds_count{{span="{name}"}} {cumulative}')
+        for metric in sorted({metric for metric, _ in counters}):
+            lines.append(f"# TYPE pharma_{metric}_total counter")
+            for (name_metric, span_name), value in sorted(counters.items()):
+                if name_metric == metric:
+                    lines.append(f'pharma_{metric}_total{{span="{span_name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class _JSONLExporter:
+    """
+    Appends finished spans to a JSONL file from a background thread (serialization happens there too).
+
+    Once the file reaches `max_bytes` it is rotated to `path.1` (shifting
+    older files up to `path.<backups>`, beyond which they are deleted), so
+    the traces on disk stay bounded at about (backups + 1) * max_bytes.
+    """
+
+    def __init__(self, path: str, max_queue: int = 10_000, max_bytes: int = TRACE_MAX_BYTES,
+                 backups: int = TRACE_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        while True:
+            record = self._queue.get()
+            if record is None:
+                return
+            batch = [record]
+            while len(batch) < 500:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write(batch)
+                    return
+                batch.append(record)
+            self._write(batch)
+
+    def _write(self, batch: List[Span]) -> None:
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(record.to_dict(), default=str) + "\n" for record in batch))
+                size = f.tell()
+            if self.max_bytes and size >= self.max_bytes:
+                self._rotate()
+        except OSError as e:
+            logger.warning("Could not write traces to %s: %s", self.path, e)
+
+    def _rotate(self) -> None:
+        if self.backups < 1:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self, timeout: float = 2.0) -> None:
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_metrics = _Metrics()
+_exporter: Optional[_JSONLExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> Optional[_JSONLExporter]:
+    global _exporter
+    if _exporter is None and TRACE_FILE:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = _JSONLExporter(TRACE_FILE)
+                atexit.register(_exporter.close)
+    return _exporter
+
+
+def current_span():
+    """The innermost open span in this context (a no-op span if there is none)."""
+    return _current_span.get() or _NOOP
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    Time a block as a span nested under the current one.
+
+    Usage:
+        with span('sqlite.query', sql=sql) as s:
+            ...
+            s.set(rows=summary.row_count)
+    """
+    if not TRACING_ENABLED:
+        yield _NOOP
+        return
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.status = 'error'
+        current.attributes.setdefault('error', f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        _current_span.reset(token)
+        _metrics.observe(current)
+        exporter = _get_exporter()
+        if exporter is not None:
+            exporter.export(current)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator that runs a sync or async function inside a span."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def prometheus_text() -> str:
+    """All span metrics in the Prometheus text exposition format."""
+    return _metrics.prometheus_text()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        payload = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics for Prometheus on `port` (default $PHARMA_METRICS_PORT; unset = don't serve).
+
+    Binds to localhost unless $PHARMA_METRICS_HOST (or `host`) says otherwise.
+    """
+    port = port if port is not None else int(os.getenv('PHARMA_METRICS_PORT', '0'))
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    print(f"📈 Prometheus metrics on http://{host}:{port}/metrics")
+    return server
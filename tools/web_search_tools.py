@@ -0,0 +1,409 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.tools import StructuredTool
+
+from .startup import load_env
+from .tracing import current_span, span
+
+logger = logging.getLogger(__name__)
+
+# Approximate tokens of result text returned to the agent per web_search call.
+WEB_SEARCH_TOKEN_BUDGET = int(os.getenv('WEB_SEARCH_TOKEN_BUDGET', '600'))
+# Most results returned per web_search call, best score first.
+WEB_SEARCH_MAX_RESULTS = int(os.getenv('WEB_SEARCH_MAX_RESULTS', '3'))
+# Set to 0 to stop keeping Tavily responses in the on-disk read-through cache.
+WEB_SEARCH_CACHE = os.getenv('WEB_SEARCH_CACHE', '1') != '0'
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so equivalent queries share a cache entry."""
+    return " ".join(re.findall(r"[\w$%.+-]+", query.lower())).strip(" .")
+
+
+def simhash(text: str, bits: int = 64) -> int:
+    """64-bit SimHash over word 3-shingles; near-identical texts differ in only a few bits."""
+    words = re.findall(r"\w+", text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * bits
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def _hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def allocate_snippets(results: List[Dict[str, Any]], token_budget: int, min_tokens: int = 40,
+                      max_results: int = WEB_SEARCH_MAX_RESULTS) -> List[str]:
+    """
+    Split a token budget across results in proportion to their relevance score.
+
+    Only the first `max_results` results are kept (callers pass them best
+    score first). Each gets at least `min_tokens` (about 4 characters per
+    token); text comes from `content` and continues into `raw_content` when
+    the share allows. Results that do not fit the minimum share are dropped.
+
+    Returns:
+        List[str]: One snippet per kept result, in the same order
+    """
+    if not results:
+        return []
+    keep = max(1, min(len(results), max_results, token_budget // min_tokens))
+    results = results[:keep]
+    scores = [max(float(r.get("score") or 0.0), 0.0) for r in results]
+    total = sum(scores) or len(results)
+    spare = token_budget - min_tokens * len(results)
+
+    snippets = []
+    for result, score in zip(results, scores):
+        share = score / total if sum(scores) else 1 / len(results)
+        chars = 4 * (min_tokens + int(spare * share))
+        text = (result.get("content") or "").strip()
+        raw = (result.get("raw_content") or "").strip()
+        if len(text) < chars and raw:
+            text = f"{text}\n{raw}" if text else raw
+        if len(text) > chars:
+            cut = text.rfind(" ", 0, chars)
+            text = text[:cut if cut > chars // 2 else chars].rstrip() + "..."
+        snippets.append(text)
+    return snippets
+
+
+class SearchCache:
+    """
+    Read-through cache of Tavily responses, one JSON file per normalized query.
+
+    Entries older than `ttl_seconds` are treated as misses (but can still be
+    served when the live search fails). Once the directory exceeds
+    `max_bytes`, the least recently used files are deleted.
+
+    Attributes:
+        output_dir (str): Directory holding search_<sha256>.json files
+        ttl_seconds (float): Freshness window for cached responses
+        max_bytes (int): Size budget for the whole directory
+    """
+
+    def __init__(self, output_dir: str = "search_results", ttl_seconds: float = 24 * 3600, max_bytes: int = 64 * 1024 * 1024):
+        self.output_dir = output_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stale_hits": 0, "evictions": 0}
+
+    def _path(self, query: str) -> Path:
+        query_hash = hashlib.sha256(normalize_query(query).encode()).hexdigest()
+        return Path(self.output_dir) / f"search_{query_hash}.json"
+
+    def get(self, query: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        file_path = self._path(query)
+        try:
+            entry = json.loads(file_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            if not allow_stale:
+                self.stats["misses"] += 1
+            return None
+
+        age = time.time() - entry.get("cached_at", 0)
+        if age > self.ttl_seconds:
+            if not allow_stale:
+                self.stats["misses"] += 1
+                return None
+            self.stats["stale_hits"] += 1
+        else:
+            self.stats["hits"] += 1
+
+        # mtime doubles as the LRU clock; `cached_at` keeps the TTL honest.
+        try:
+            os.utime(file_path)
+        except OSError:
+            pass
+        return entry.get("response", entry)
+
+    def put(self, query: str, response: Dict[str, Any]) -> None:
+        try:
+            output_path = Path(self.output_dir)
+            output_path.mkdir(parents=True, exist_ok=True)
+            entry = {"cached_at": time.time(), "query": query, "response": response}
+            self._path(query).write_text(
+                json.dumps(entry, indent=2, ensure_ascii=False), encoding="utf-8"
+            )
+        except Exception as e:
+            raise IOError(f"Error saving search results: {str(e)}") from e
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            files = []
+            for file_path in Path(self.output_dir).glob("search_*.json"):
+                try:
+                    st = file_path.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, file_path))
+            total = sum(size for _, size, _ in files)
+            for _, size, file_path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                file_path.unlink(missing_ok=True)
+                total -= size
+                self.stats["evictions"] += 1
+
+
+class WebSearch:
+    """
+    A class to perform concurrent web searches using the Tavily API.
+
+    Attributes:
+        output_dir (str): Directory to save search results
+        save_search_results (bool): Whether to save search results to files
+        tavily_async (AsyncTavilyClient): Async client for Tavily API
+        cache (SearchCache): Read-through cache over `output_dir`, or None
+    """
+
+    MAX_RESULTS = 5
+    SEARCH_TOPIC = "general"
+    # Max differing SimHash bits for two sources to count as near-duplicates.
+    # Unrelated texts differ in ~32 of 64 bits; mirrored snippets with
+    # different boilerplate typically stay under 8.
+    NEAR_DUPLICATE_BITS = 8
+
+    def __init__(
+        self,
+        tavily_api_key: str,
+        save_search_results: bool = False,
+        output_dir: str = "search_results",
+        use_cache: bool = True,
+        cache_ttl_seconds: float = 24 * 3600,
+        cache_max_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.output_dir = output_dir
+        self.save_search_results = save_search_results
+        from tavily import AsyncTavilyClient
+
+        self.tavily_async = AsyncTavilyClient(api_key=tavily_api_key)
+        self.cache = SearchCache(output_dir, cache_ttl_seconds, cache_max_bytes) if use_cache else None
+
+    async def search(self, search_queries: List[str]) -> List[Dict[str, Any]]:
+        """
+        Performs concurrent web searches using the Tavily API.
+
+        Args:
+            search_queries (List[SearchQuery]): List of search queries to process
+
+        Returns:
+                List[dict]: List of search responses from Tavily API, one per query. Each response has format:
+                    {
+                        'query': str, # The original search query
+                        'follow_up_questions': None,
+                        'answer': None,
+                        'images': list,
+                        'results': [                     # List of search results
+                            {
+                                'title': str,            # Title of the webpage
+                                'url': str,              # URL of the result
+                                'content': str,          # Summary/snippet of content
+                                'score': float,          # Relevance score
+                                'raw_content': str|None  # Full page content if available
+                            },
+                            ...
+                        ]
+                    }
+        """
+        if not search_queries:
+            raise ValueError("Search queries list cannot be empty")
+
+        if not all(isinstance(query, str) for query in search_queries):
+            raise ValueError("All search queries must be strings")
+
+        search_docs: List[Optional[Dict[str, Any]]] = [None] * len(search_queries)
+        if self.cache is not None:
+            for i, query in enumerate(search_queries):
+                search_docs[i] = self.cache.get(query)
+
+        missing = [i for i, docs in enumerate(search_docs) if docs is None]
+        search_tasks = []
+        for i in missing:
+            search_tasks.append(
+                self.tavily_async.search(
+                    search_queries[i],
+                    max_results=self.MAX_RESULTS,
+                    include_raw_content=True,
+                    topic=self.SEARCH_TOPIC,
+                )
+            )
+
+        current_span().set(cache_hits=len(search_queries) - len(missing), cache_hit=not missing)
+
+        # Execute all searches concurrently
+        with span('tavily.search', queries=len(search_tasks)):
+            fetched = await asyncio.gather(*search_tasks, return_exceptions=True)
+        for i, docs in zip(missing, fetched):
+            if isinstance(docs, Exception):
+                # Serve an expired cache entry rather than failing (e.g. offline).
+                stale = self.cache.get(search_queries[i], allow_stale=True) if self.cache else None
+                if stale is None:
+                    raise docs
+                logger.warning("Search for %r failed (%s); using stale cached result", search_queries[i], docs)
+                search_docs[i] = stale
+            else:
+                search_docs[i] = docs
+                if self.cache is not None or self.save_search_results:
+                    await self._save_search_docs([docs], query=search_queries[i])
+
+        unique_docs = self._deduplicate_sources(search_docs)
+
+        return unique_docs
+
+    def _deduplicate_sources(self, search_response) -> List[Dict[str, Any]]:
+        """
+        Merge results from all queries, dropping exact-URL and near-duplicate content.
+
+        Sources are visited best score first, so the highest-scoring copy of a
+        mirrored or syndicated article is kept; it inherits the best score seen
+        for any of its copies and records how many queries/copies matched.
+        """
+        # Collect all results
+        sources_list = []
+        for response in search_response:
+            sources_list.extend(response["results"])
+        sources_list.sort(key=lambda source: source.get("score") or 0.0, reverse=True)
+
+        kept: List[Dict[str, Any]] = []
+        fingerprints: List[int] = []
+        by_url: Dict[str, Dict[str, Any]] = {}
+        for source in sources_list:
+            duplicate = by_url.get(source["url"])
+            if duplicate is None:
+                text = (source.get("raw_content") or source.get("content") or "")[:5000]
+                fingerprint = simhash(text) if text else None
+                if fingerprint is not None:
+                    for other, other_fingerprint in zip(kept, fingerprints):
+                        if other_fingerprint is not None and _hamming(fingerprint, other_fingerprint) <= self.NEAR_DUPLICATE_BITS:
+                            duplicate = other
+                            break
+
+            if duplicate is not None:
+                duplicate["score"] = max(duplicate.get("score") or 0.0, source.get("score") or 0.0)
+                duplicate["duplicates"] = duplicate.get("duplicates", 0) + 1
+                by_url.setdefault(source["url"], duplicate)
+                continue
+
+            source = dict(source)
+            kept.append(source)
+            fingerprints.append(fingerprint)
+            by_url[source["url"]] = source
+
+        return kept
+
+    async def _save_search_docs(self, search_docs: List[Dict[str, Any]], query: Optional[str] = None) -> None:
+        """
+        Save search results to files in the specified directory.
+        Creates one file per search query, keyed by the normalized query.
+
+        Args:
+            search_docs: List of search results to save
+            query: Query the results were fetched for (defaults to each response's own query)
+        """
+        cache = self.cache or SearchCache(self.output_dir)
+        for docs in search_docs:
+            cache.put(query or docs["query"], docs)
+
+
+_search_client: Optional[WebSearch] = None
+_search_client_key: Optional[str] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_lock = threading.Lock()
+
+
+def _get_search_client(tavily_api_key: str) -> WebSearch:
+    """Return the long-lived WebSearch client, recreating it only if the API key changes."""
+    global _search_client, _search_client_key
+    with _client_lock:
+        if _search_client is None or _search_client_key != tavily_api_key:
+            _search_client = WebSearch(tavily_api_key=tavily_api_key, use_cache=WEB_SEARCH_CACHE)
+            _search_client_key = tavily_api_key
+        return _search_client
+
+
+def set_search_client(client: WebSearch, tavily_api_key: str) -> None:
+    """Replace the shared WebSearch client used for `tavily_api_key` (e.g. with a stub in benchmarks)."""
+    global _search_client, _search_client_key
+    with _client_lock:
+        _search_client = client
+        _search_client_key = tavily_api_key
+
+
+def _submit(coro):
+    """Schedule `coro` on a persistent background event loop instead of a fresh asyncio.run loop."""
+    global _loop
+    with _client_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="web-search-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coro, _loop)
+
+
+def _run_async(coro):
+    return _submit(coro).result()
+
+
+async def _search_and_format(query: str) -> str:
+    """Search the web for information using Tavily API."""
+    print(f"🔧 Tool Called: web_search with query: '{query}'")
+    
+    load_env()
+    tavily_api_key = os.getenv('TAVILY_API_KEY')
+    if not tavily_api_key:
+        return "❌ Error: TAVILY_API_KEY not found in environment variables"
+    
+    try:
+        search_client = _get_search_client(tavily_api_key)
+        with span('web_search.search') as trace:
+            results = await search_client.search([query])
+            trace.set(results=len(results))
+        
+        # Format results for the agent, sharing the snippet budget by relevance
+        results = list(results)
+        snippets = allocate_snippets(results, WEB_SEARCH_TOKEN_BUDGET)
+        formatted_results = []
+        for result, snippet in zip(results, snippets):
+            formatted_results.append(f"Title: {result['title']}\nURL: {result['url']}\nContent: {snippet}")
+        
+        output = "\n\n".join(formatted_results)
+        current_span().set(bytes=len(output))
+        print(f"✅ Web search completed: {len(formatted_results)} results found")
+        return output
+        
+    except Exception as e:
+        error_msg = f"❌ Error performing web search: {str(e)}"
+        print(error_msg)
+        return error_msg
+
+
+def _web_search(query: str) -> str:
+    return _run_async(_search_and_format(query))
+
+
+async def _aweb_search(query: str) -> str:
+    # The Tavily client lives on the search loop; hop there and await the result.
+    return await asyncio.wrap_future(_submit(_search_and_format(query)))
+
+
+web_search = StructuredTool.from_function(
+    func=_web_search,
+    coroutine=_aweb_search,
+    name="web_search",
+    description="Search the web for information using Tavily API.",
+)